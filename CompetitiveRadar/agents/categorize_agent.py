@@ -1,7 +1,10 @@
 import os
 import json
 from google import genai
-from google.genai import types
+from agents.prompts import PromptTemplate, PromptUsage
+from agents.routing import LOCAL_TIER, ROUTE_CONFIDENCE_THRESHOLD, ModelRouter
+from agents.structured_output import CATEGORY_SCHEMA, parse_response, process_with_retries
+from local_stages import categorize_with_confidence
 
 # IMPORTANT: KEEP THIS COMMENT - using blueprint:python_gemini
 # Note that the newest Gemini model series is "gemini-2.5-flash" or "gemini-2.5-pro"
@@ -9,74 +12,103 @@ from google.genai import types
 GEMINI_API_KEY = os.environ.get("GEMINI_FREE_API_KEY") or os.environ.get("GEMINI_API_KEY")
 client = genai.Client(api_key=GEMINI_API_KEY)
 
-def categorize_agent(processed_updates):
+def _categorize_locally(update):
+    """Keyword classifier tier; a category supplied by the source is taken as certain"""
+    if update.get('category'):
+        return {**update, "category_reasoning": "Category provided by the source", "category_confidence": 1.0}
+    category, confidence = categorize_with_confidence(update['original_update'])
+    return {
+        **update,
+        "category": category,
+        "category_reasoning": "Keyword match on update text",
+        "category_confidence": confidence
+    }
+
+CATEGORIZE_PROMPT = PromptTemplate(
+    'categorize',
+    system_instruction="You are a business strategist categorizing competitive intelligence. Always respond with valid JSON.",
+    instructions="""
+    Classify the competitor update below into ONE primary category:
+    
+    Categories:
+    - Product: New features, product launches, technical updates, integrations
+    - Pricing: Pricing changes, new pricing tiers, discounts, pricing strategy
+    - Marketing: Campaigns, branding, content marketing, partnerships, PR
+    
+    Respond in JSON format with keys: category, reasoning, confidence (0-1)
+    """,
+    data_template="""
+    Competitor: {competitor}
+    Update: {update}
+    Analysis: {analysis}
+    """,
+    response_schema=CATEGORY_SCHEMA,
+)
+
+def _categorize_update(update, model="gemini-2.5-flash", router=None, usage=None):
+    """One Gemini call for one update; raises on API, parse or schema errors"""
+    response = CATEGORIZE_PROMPT.generate(client, model, router, usage, competitor=update['competitor'],
+                                          update=update['original_update'], analysis=json.dumps(update['analysis']))
+    
+    categorization = parse_response(response.text, CATEGORY_SCHEMA)
+    
+    # If category already exists in data, use it; otherwise use AI categorization
+    return {
+        **update,
+        "category": update.get('category') or categorization['category'],
+        "category_reasoning": categorization.get('reasoning', ''),
+        "category_confidence": categorization.get('confidence', 0.8)
+    }
+
+def categorize_agent(processed_updates, checkpoint=None, log_stats=True):
     """
     Categorization Agent: Classifies each update into Product / Pricing / Marketing.
     Uses AI to determine the primary category based on content analysis.
+    With a checkpoint, updates finished by an earlier run are reused and new results are recorded.
+    log_stats=False keeps the run's routing and prompt stats out of the shared logs.
+    Each update starts at the cheapest tier (the local keyword classifier by default) and only
+    moves to a bigger model while its category_confidence is below ROUTE_CONFIDENCE_THRESHOLD.
     """
     print("🏷️  Categorization Agent: Classifying updates...")
     
-    categorized_updates = []
+    done = checkpoint.completed('categorize') if checkpoint else {}
+    router = ModelRouter('categorize')
+    usage = PromptUsage(CATEGORIZE_PROMPT)
+    
+    def attempt(update, tier):
+        if tier == LOCAL_TIER:
+            return _categorize_locally(update)
+        return _categorize_update(update, tier, router, usage)
+    
+    def uncertain(categorized):
+        confidence = categorized.get('category_confidence', 0.0)
+        if confidence < ROUTE_CONFIDENCE_THRESHOLD:
+            return f"confidence {confidence:.2f}"
+        return None
     
+    def categorize_one(update):
+        categorized = router.route(update, lambda tier: attempt(update, tier), uncertain)
+        if checkpoint:
+            checkpoint.record('categorize', categorized)
+        return categorized
+    
+    # Only updates that failed to parse or validate are re-requested
+    todo = [update for update in processed_updates if str(update['id']) not in done]
+    results = dict(zip((str(u['id']) for u in todo), process_with_retries(todo, categorize_one, "categorizing")))
+    
+    categorized_updates = []
     for update in processed_updates:
-        prompt = f"""
-        Classify this competitor update into ONE primary category:
-        
-        Competitor: {update['competitor']}
-        Update: {update['original_update']}
-        Analysis: {json.dumps(update['analysis'])}
-        
-        Categories:
-        - Product: New features, product launches, technical updates, integrations
-        - Pricing: Pricing changes, new pricing tiers, discounts, pricing strategy
-        - Marketing: Campaigns, branding, content marketing, partnerships, PR
-        
-        Respond in JSON format with keys: category, reasoning, confidence (0-1)
-        """
-        
-        try:
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=[
-                    types.Content(role="user", parts=[types.Part(text=prompt)])
-                ],
-                config=types.GenerateContentConfig(
-                    system_instruction="You are a business strategist categorizing competitive intelligence. Always respond with valid JSON.",
-                    response_mime_type="application/json"
-                )
-            )
-            
-            content = response.text
-            if content:
-                categorization = json.loads(content)
-            else:
-                raise ValueError("Empty response from API")
-            
-            # If category already exists in data, use it; otherwise use AI categorization
-            existing_category = update.get('category')
-            if existing_category:
-                categorized_updates.append({
-                    **update,
-                    "category": existing_category,
-                    "category_reasoning": categorization.get('reasoning', ''),
-                    "category_confidence": categorization.get('confidence', 0.8)
-                })
-            else:
-                categorized_updates.append({
-                    **update,
-                    "category": categorization['category'],
-                    "category_reasoning": categorization.get('reasoning', ''),
-                    "category_confidence": categorization.get('confidence', 0.8)
-                })
-            
-        except Exception as e:
-            print(f"Error categorizing update {update['id']}: {e}")
-            categorized_updates.append({
+        categorized = done.get(str(update['id'])) or results.get(str(update['id']))
+        if categorized is None:
+            categorized = {
                 **update,
                 "category": "Unknown",
                 "category_reasoning": "Error in categorization",
                 "category_confidence": 0.0
-            })
+            }
+        categorized_updates.append(categorized)
     
+    router.finish(log_stats)
+    usage.finish(log_stats)
     print(f"✅ Categorization Agent: Classified {len(categorized_updates)} updates")
     return categorized_updates
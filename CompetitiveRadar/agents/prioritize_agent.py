@@ -1,7 +1,10 @@
 import os
 import json
 from google import genai
-from google.genai import types
+from agents.prompts import PromptTemplate, PromptUsage
+from agents.routing import ModelRouter
+from agents.structured_output import PRIORITY_SCHEMA, parse_response, process_with_retries
+from agents.score_history import SCORE_BORDERLINE_MARGIN, ScoreHistory
 
 # IMPORTANT: KEEP THIS COMMENT - using blueprint:python_gemini
 # Note that the newest Gemini model series is "gemini-2.5-flash" or "gemini-2.5-pro"
@@ -9,80 +12,178 @@ from google.genai import types
 GEMINI_API_KEY = os.environ.get("GEMINI_FREE_API_KEY") or os.environ.get("GEMINI_API_KEY")
 client = genai.Client(api_key=GEMINI_API_KEY)
 
-def prioritize_agent(categorized_updates):
+# Reuse stored scores and the local score model across runs (see agents/score_history.py)
+SCORE_HISTORY_ENABLED = os.environ.get('SCORE_HISTORY', 'true').lower() == 'true'
+SCORE_FIELDS = ['priority_score', 'impact_areas', 'urgency_level', 'strategic_implication']
+
+PRIORITIZE_PROMPT = PromptTemplate(
+    'prioritize',
+    system_instruction="You are a strategic advisor for startup founders, evaluating competitive threats and opportunities. Always respond with valid JSON.",
+    instructions="""
+    Score the competitor update below from 1-10 based on its potential impact on a startup founder's decisions.
+    
+    Consider:
+    - Strategic threat level (does this change the competitive landscape?)
+    - Urgency (how quickly should the founder respond?)
+    - Impact on roadmap, pricing, or positioning decisions
+    - Market signal strength (what does this indicate about market trends?)
+    
+    Respond in JSON format with keys: 
+    - priority_score (1-10, where 10 is highest priority)
+    - impact_areas (list of affected areas: roadmap, pricing, positioning, marketing)
+    - urgency_level (low, medium, high)
+    - strategic_implication (brief explanation)
+    """,
+    data_template="""
+    Competitor: {competitor}
+    Category: {category}
+    Update: {update}
+    Analysis: {analysis}
+    """,
+    response_schema=PRIORITY_SCHEMA,
+)
+
+def _prioritize_update(update, model="gemini-2.5-flash", router=None, usage=None):
+    """One Gemini call for one update; raises on API, parse or schema errors"""
+    response = PRIORITIZE_PROMPT.generate(client, model, router, usage, competitor=update['competitor'], category=update['category'],
+                                          update=update['original_update'], analysis=json.dumps(update['analysis']))
+    
+    priority_data = parse_response(response.text, PRIORITY_SCHEMA)
+    
+    return {
+        **update,
+        "priority_score": priority_data['priority_score'],
+        "impact_areas": priority_data.get('impact_areas', []),
+        "urgency_level": priority_data.get('urgency_level', 'medium'),
+        "strategic_implication": priority_data.get('strategic_implication', ''),
+        "score_source": "llm"
+    }
+
+def _urgency_for(score):
+    return 'high' if score >= 8 else 'medium' if score >= 5 else 'low'
+
+def score_updates(categorized_updates, checkpoint=None, top_k=3, record_history=True, log_stats=True):
     """
-    Prioritization Agent: Scores each update 1-10 based on potential impact for startup founders.
-    Considers factors like competitive threat, market impact, and strategic relevance.
-    Returns top 3 most important updates.
+    Scores each update 1-10 based on potential impact for startup founders and returns
+    all updates sorted by priority (highest first).
+    With a checkpoint, updates finished by an earlier run are reused and new results are recorded.
+    Unchanged updates reuse their stored LLM score; once enough history exists, updates the local
+    score model confidently places outside the top-K are scored locally instead of by the LLM.
+    With record_history=False the history is only read, so side runs don't change the shared model,
+    and log_stats=False keeps the run's routing and prompt stats out of the shared logs.
+    LLM scoring starts on the cheapest model tier; scores within SCORE_BORDERLINE_MARGIN of the
+    top-K cutoff are re-scored on the next tier up, since those decide what makes the digest.
     """
     print("⚡ Prioritization Agent: Scoring updates by founder impact...")
     
-    scored_updates = []
+    done = checkpoint.completed('prioritize') if checkpoint else {}
+    history = ScoreHistory() if SCORE_HISTORY_ENABLED else None
+    router = ModelRouter('prioritize')
+    usage = PromptUsage(PRIORITIZE_PROMPT)
     
+    scored = {}
     for update in categorized_updates:
-        prompt = f"""
-        Score this competitor update from 1-10 based on its potential impact on a startup founder's decisions.
-        
-        Competitor: {update['competitor']}
-        Category: {update['category']}
-        Update: {update['original_update']}
-        Analysis: {json.dumps(update['analysis'])}
-        
-        Consider:
-        - Strategic threat level (does this change the competitive landscape?)
-        - Urgency (how quickly should the founder respond?)
-        - Impact on roadmap, pricing, or positioning decisions
-        - Market signal strength (what does this indicate about market trends?)
+        key = str(update['id'])
+        if key in done:
+            scored[key] = done[key]
+            continue
+        stored = history.lookup(update) if history else None
+        if stored:
+            scored[key] = {**update, **{field: stored[field] for field in SCORE_FIELDS}, "score_source": "history"}
+    remaining = [update for update in categorized_updates if str(update['id']) not in scored]
+    if history:
+        print(f"   Score history: {len(scored) - len(done)} unchanged updates reuse their stored score")
+    
+    to_llm = remaining
+    model = history.train() if history and remaining else None
+    if model:
+        predictions = {str(u['id']): model.predict(history.features(u)) for u in remaining}
+        known = sorted([u['priority_score'] for u in scored.values()] + list(predictions.values()), reverse=True)
+        cutoff = known[min(top_k, len(known)) - 1]
+        # Anything that could plausibly reach the top-K still gets a full LLM assessment
+        threshold = cutoff - SCORE_BORDERLINE_MARGIN - model.rmse
+        to_llm = [u for u in remaining if predictions[str(u['id'])] >= threshold]
+        for update in remaining:
+            predicted = predictions[str(update['id'])]
+            if predicted < threshold:
+                scored[str(update['id'])] = {
+                    **update,
+                    "priority_score": int(round(predicted)),
+                    "impact_areas": [],
+                    "urgency_level": _urgency_for(predicted),
+                    "strategic_implication": f"Predicted locally from {model.samples} past scores",
+                    "score_source": "model"
+                }
+        print(f"   Score model ({model.samples} samples, RMSE {model.rmse:.2f}): "
+              f"{len(remaining) - len(to_llm)} predicted locally, {len(to_llm)} sent to LLM")
+    
+    def prioritize_one(update, start=0, reason=None):
+        scored_update = router.route(update, lambda model: _prioritize_update(update, model, router, usage),
+                                     start=start, reason=reason)
+        if checkpoint:
+            checkpoint.record('prioritize', scored_update)
+        return scored_update
+    
+    # Only updates that failed to parse or validate are re-requested
+    results = process_with_retries(to_llm, prioritize_one, "prioritizing")
+    llm_scored = {str(update['id']): result for update, result in zip(to_llm, results) if result}
+    
+    # Borderline scores from a lower tier get a second opinion from the next one
+    if llm_scored and len(router.tiers) > 1:
+        ranked = sorted([u['priority_score'] for u in scored.values()] +
+                        [r['priority_score'] for r in llm_scored.values()], reverse=True)
+        cutoff = ranked[min(top_k, len(ranked)) - 1]
+        borderline = [u for u in to_llm if str(u['id']) in llm_scored
+                      and router.tier_index(u) < len(router.tiers) - 1
+                      and abs(llm_scored[str(u['id'])]['priority_score'] - cutoff) <= SCORE_BORDERLINE_MARGIN]
         
-        Respond in JSON format with keys: 
-        - priority_score (1-10, where 10 is highest priority)
-        - impact_areas (list of affected areas: roadmap, pricing, positioning, marketing)
-        - urgency_level (low, medium, high)
-        - strategic_implication (brief explanation)
-        """
+        def rescore_one(update):
+            score = llm_scored[str(update['id'])]['priority_score']
+            return prioritize_one(update, router.tier_index(update) + 1, f"score {score} near top-{top_k} cutoff {cutoff}")
         
-        try:
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=[
-                    types.Content(role="user", parts=[types.Part(text=prompt)])
-                ],
-                config=types.GenerateContentConfig(
-                    system_instruction="You are a strategic advisor for startup founders, evaluating competitive threats and opportunities. Always respond with valid JSON.",
-                    response_mime_type="application/json"
-                )
-            )
-            
-            content = response.text
-            if content:
-                priority_data = json.loads(content)
-            else:
-                raise ValueError("Empty response from API")
-            
-            scored_updates.append({
-                **update,
-                "priority_score": priority_data.get('priority_score', 5),
-                "impact_areas": priority_data.get('impact_areas', []),
-                "urgency_level": priority_data.get('urgency_level', 'medium'),
-                "strategic_implication": priority_data.get('strategic_implication', '')
-            })
-            
-        except Exception as e:
-            print(f"Error prioritizing update {update['id']}: {e}")
-            scored_updates.append({
+        for update, rescored in zip(borderline, process_with_retries(borderline, rescore_one, "re-scoring")):
+            if rescored:
+                llm_scored[str(update['id'])] = rescored
+    
+    for update in to_llm:
+        scored_update = llm_scored.get(str(update['id']))
+        if scored_update is None:
+            scored_update = {
                 **update,
                 "priority_score": 5,
                 "impact_areas": [],
                 "urgency_level": 'medium',
                 "strategic_implication": 'Error in prioritization'
-            })
+            }
+        scored[str(update['id'])] = scored_update
+    
+    router.finish(log_stats)
+    usage.finish(log_stats)
+    if history and record_history:
+        for scored_update in list(done.values()) + list(llm_scored.values()):
+            history.record(scored_update)
+        history.save()
+    
+    scored_updates = [scored[str(update['id'])] for update in categorized_updates]
     
-    # Sort by priority score (highest first) and select top 3
+    # Sort by priority score (highest first)
     scored_updates.sort(key=lambda x: x['priority_score'], reverse=True)
-    top_updates = scored_updates[:3]
+    return scored_updates
+
+def select_top(scored_updates, top_k=3):
+    """Top-K of updates already sorted by score_updates()"""
+    top_updates = scored_updates[:top_k]
     
-    print(f"✅ Prioritization Agent: Selected top 3 from {len(scored_updates)} updates")
+    print(f"✅ Prioritization Agent: Selected top {top_k} from {len(scored_updates)} updates")
     for i, update in enumerate(top_updates, 1):
         print(f"   #{i}: {update['competitor']} - Score: {update['priority_score']}/10")
     
     return top_updates
+
+def prioritize_agent(categorized_updates, checkpoint=None, top_k=3):
+    """
+    Prioritization Agent: Scores each update 1-10 based on potential impact for startup founders.
+    Considers factors like competitive threat, market impact, and strategic relevance.
+    Returns top 3 most important updates.
+    """
+    return select_top(score_updates(categorized_updates, checkpoint=checkpoint, top_k=top_k), top_k)
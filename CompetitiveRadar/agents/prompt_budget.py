@@ -0,0 +1,98 @@
+"""
+Prompt budgeting helpers for CompetitiveRadar agents.
+Estimates prompt tokens locally and compacts update blocks to fit a budget.
+"""
+import os
+
+# Gemini tokenizers average roughly 4 characters per token on English business text
+CHARS_PER_TOKEN = 4
+
+SUMMARY_PROMPT_TOKEN_BUDGET = int(os.environ.get('SUMMARY_PROMPT_TOKEN_BUDGET', 6000))
+
+# Per-field token caps for each compaction level (None = untrimmed, 0 = dropped)
+COMPACTION_LEVELS = [
+    {"update": None, "implication": None, "impact_areas": True, "source_type": True},
+    {"update": 80, "implication": 40, "impact_areas": True, "source_type": False},
+    {"update": 40, "implication": 20, "impact_areas": False, "source_type": False},
+    {"update": 25, "implication": 0, "impact_areas": False, "source_type": False},
+]
+
+
+def estimate_tokens(text):
+    """Cheap local token estimate, no API round trip"""
+    if not text:
+        return 0
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Trim text to roughly max_tokens, cutting at a word boundary"""
+    if max_tokens is None or estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ''
+    cut = text[:max_tokens * CHARS_PER_TOKEN]
+    if ' ' in cut:
+        cut = cut[:cut.rfind(' ')]
+    return cut.rstrip(' ,.;:') + '…'
+
+
+def compact_update_block(index, update, level=0):
+    """Render one update as a compact, unindented prompt block at a compaction level"""
+    caps = COMPACTION_LEVELS[level]
+    competitor_cat = update.get('competitor_category', 'Unknown')
+    source = update.get('source', 'N/A')
+    if caps['source_type']:
+        source = f"{source} ({update.get('source_type', 'N/A')})"
+
+    lines = [
+        f"#{index} {update['competitor']} ({competitor_cat}) | {update.get('category', 'N/A')} | "
+        f"{source} | Priority {update.get('priority_score', 0)}/10 | Urgency {update.get('urgency_level', 'N/A')}",
+        "Update: " + truncate_to_tokens(update.get('original_update', update.get('update', 'N/A')), caps['update']),
+    ]
+    if update.get('digest_change'):
+        lines.append(f"Since last digest: {update['digest_change']}")
+    implication = truncate_to_tokens(update.get('strategic_implication', ''), caps['implication'])
+    if implication:
+        lines.append(f"Implication: {implication}")
+    if caps['impact_areas'] and update.get('impact_areas'):
+        lines.append(f"Impact: {', '.join(update['impact_areas'])}")
+    return "\n".join(lines)
+
+
+def build_budgeted_blocks(updates, budget, overhead_tokens=0):
+    """
+    Build update blocks that fit within budget tokens (including overhead_tokens for the
+    static part of the prompt). Lower-priority updates are compacted first; if every block
+    is at the most compact level and the prompt still does not fit, trailing updates are dropped
+    (the top update is always kept).
+    Returns (blocks, stats).
+    """
+    levels = [0] * len(updates)
+    blocks = [compact_update_block(i, u) for i, u in enumerate(updates, 1)]
+    costs = [estimate_tokens(b) for b in blocks]
+    max_level = len(COMPACTION_LEVELS) - 1
+
+    total = overhead_tokens + sum(costs)
+    while total > budget and blocks:
+        # Compact the lowest-priority block that still has room to shrink
+        target = next((i for i in range(len(blocks) - 1, -1, -1) if levels[i] < max_level), None)
+        if target is None:
+            if len(blocks) == 1:
+                break
+            blocks.pop()
+            costs.pop()
+            levels.pop()
+        else:
+            levels[target] += 1
+            blocks[target] = compact_update_block(target + 1, updates[target], levels[target])
+            costs[target] = estimate_tokens(blocks[target])
+        total = overhead_tokens + sum(costs)
+
+    stats = {
+        "estimated_tokens": total,
+        "budget": budget,
+        "compacted": sum(1 for level in levels if level > 0),
+        "dropped": len(updates) - len(blocks),
+    }
+    return blocks, stats
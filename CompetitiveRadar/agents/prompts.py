@@ -0,0 +1,197 @@
+"""
+Prompt templates for CompetitiveRadar agents.
+Each agent prompt is split into a static prefix (system instruction + instruction block), built
+once at import, and a short dynamic suffix with the update's data, filled in per call. The
+static part always comes first so repeated calls share a prefix:
+  - PROMPT_CACHE=auto (default): when the prefix reaches the model's minimum cacheable size, it is
+    uploaded once as a Gemini context cache and each call only sends the dynamic part. Shorter
+    prefixes go inline and rely on Gemini's implicit prefix caching
+  - PROMPT_CACHE=local: a local stand-in that counts repeated prefixes as cached without any
+    remote cache (also used automatically for clients without a caches API, e.g. in benchmarks)
+  - PROMPT_CACHE=off: inline prompts, no cache accounting
+Each agent run passes a PromptUsage to its calls, which records every call's static / dynamic /
+cached token split and latency; at the end of the run it prints a summary and appends one JSON
+line to .state/prompts.jsonl. Concurrent runs of the same agent each keep their own figures.
+"""
+import hashlib
+import json
+import os
+import textwrap
+import threading
+import time
+from datetime import datetime
+from google.genai import types
+from agents.prompt_budget import estimate_tokens
+from storage import state_path
+
+PROMPT_CACHE = os.environ.get('PROMPT_CACHE', 'auto').lower()  # auto | local | off
+PROMPT_CACHE_TTL = int(os.environ.get('PROMPT_CACHE_TTL', 3600))
+PROMPT_LOG = os.environ.get('PROMPT_LOG', 'prompts.jsonl')
+
+# Smallest prefix (tokens) Gemini accepts for an explicit context cache
+CACHE_MIN_TOKENS = {
+    "gemini-2.5-flash-lite": 1024,
+    "gemini-2.5-flash": 1024,
+    "gemini-2.5-pro": 4096,
+}
+# Remote caches are renewed this long before they expire
+CACHE_REFRESH_MARGIN = 60
+
+
+class LocalPrefixCache:
+    """Stand-in for a context cache: remembers which prefixes were sent in the last TTL seconds"""
+
+    def __init__(self, ttl=PROMPT_CACHE_TTL):
+        self.ttl = ttl
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key):
+        """True if `key` was sent within the TTL; registers it otherwise"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._seen.get(key, float('-inf')) < self.ttl:
+                return True
+            self._seen[key] = now
+            return False
+
+
+local_cache = LocalPrefixCache()
+_remote_caches = {}  # (client id, model, prefix key) -> (cache name, expires at)
+_remote_failed = set()
+_remote_lock = threading.Lock()
+
+
+def _remote_cache(client, model, template):
+    """Name of a live context cache holding the template's prefix, or None if one can't be used"""
+    key = (id(client), model, template.key)
+    with _remote_lock:
+        if key in _remote_failed:
+            return None
+        name, expires = _remote_caches.get(key, (None, 0))
+        if name and time.time() < expires - CACHE_REFRESH_MARGIN:
+            return name
+        try:
+            cache = client.caches.create(model=model, config=types.CreateCachedContentConfig(
+                display_name=f"competitiveradar-{template.agent}",
+                system_instruction=template.system_instruction,
+                contents=[types.Content(role="user", parts=[template.static_part])],
+                ttl=f"{PROMPT_CACHE_TTL}s",
+            ))
+        except Exception as e:
+            # Unsupported model or prefix too short for this account: stay inline from now on
+            print(f"   Prompt cache for {template.agent} on {model} unavailable: {str(e)[:100]}")
+            _remote_failed.add(key)
+            return None
+        _remote_caches[key] = (cache.name, time.time() + PROMPT_CACHE_TTL)
+        return cache.name
+
+
+class PromptTemplate:
+    """
+    A static instruction prefix compiled once and a dynamic data template (str.format fields)
+    filled per call
+    """
+
+    def __init__(self, agent, system_instruction, instructions, data_template, response_schema=None):
+        self.agent = agent
+        self.system_instruction = system_instruction
+        self.instructions = textwrap.dedent(instructions).strip()
+        self.data_template = textwrap.dedent(data_template).strip()
+        self.response_schema = response_schema
+        self.static_part = types.Part(text=self.instructions)
+        self.static_tokens = estimate_tokens(system_instruction) + estimate_tokens(self.instructions)
+        self.key = hashlib.sha1(f"{system_instruction}\0{self.instructions}".encode('utf-8')).hexdigest()[:16]
+        self._configs = {}
+
+    def config(self, cached_content=None):
+        """GenerateContentConfig, built once per cache (None: system instruction inline)"""
+        config = self._configs.get(cached_content)
+        if config is None:
+            options = {"cached_content": cached_content} if cached_content else {"system_instruction": self.system_instruction}
+            if self.response_schema:
+                options.update(response_mime_type="application/json", response_schema=self.response_schema)
+            config = self._configs[cached_content] = types.GenerateContentConfig(**options)
+        return config
+
+    def render(self, **fields):
+        return self.data_template.format(**fields)
+
+    def request(self, client, model, **fields):
+        """(generate_content kwargs, static tokens the model should find cached)"""
+        dynamic = types.Part(text=self.render(**fields))
+        if PROMPT_CACHE == 'auto' and hasattr(client, 'caches') and self.static_tokens >= CACHE_MIN_TOKENS.get(model, 1024):
+            name = _remote_cache(client, model, self)
+            if name:
+                contents = [types.Content(role="user", parts=[dynamic])]
+                return dict(model=model, contents=contents, config=self.config(name)), self.static_tokens
+        contents = [types.Content(role="user", parts=[self.static_part, dynamic])]
+        cached = 0
+        if PROMPT_CACHE == 'local' or (PROMPT_CACHE == 'auto' and not hasattr(client, 'caches')):
+            cached = self.static_tokens if local_cache.hit((model, self.key)) else 0
+        return dict(model=model, contents=contents, config=self.config()), cached
+
+    def generate(self, client, model, router=None, usage=None, **fields):
+        """One model call (through the router when given), recording its token split and latency in usage"""
+        request, cached = self.request(client, model, **fields)
+        dynamic_tokens = estimate_tokens(request["contents"][0].parts[-1].text)
+        start = time.perf_counter()
+        response = router.generate(client, **request) if router else client.models.generate_content(**request)
+        seconds = time.perf_counter() - start
+        if usage is not None:
+            response_usage = getattr(response, 'usage_metadata', None)
+            # The API's own count of prefix tokens served from cache (explicit or implicit) wins
+            reported = getattr(response_usage, 'cached_content_token_count', None)
+            usage.observe(model, self.static_tokens, dynamic_tokens, reported if reported is not None else cached, seconds)
+        return response
+
+
+class PromptUsage:
+    """Prompt token accounting for one agent run of one template"""
+
+    def __init__(self, template):
+        self.template = template
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def observe(self, model, static_tokens, dynamic_tokens, cached_tokens, seconds):
+        with self._lock:
+            self.calls.append((model, static_tokens, dynamic_tokens, cached_tokens, seconds))
+
+    def summary(self):
+        with self._lock:
+            calls = list(self.calls)
+        static = sum(call[1] for call in calls)
+        dynamic = sum(call[2] for call in calls)
+        cached = sum(call[3] for call in calls)
+        return {
+            "agent": self.template.agent,
+            "at": datetime.now().isoformat(timespec='seconds'),
+            "mode": PROMPT_CACHE,
+            "calls": len(calls),
+            "static_tokens": static,
+            "dynamic_tokens": dynamic,
+            "cached_tokens": cached,
+            "billed_prompt_tokens": static + dynamic - cached,
+            "avg_latency_ms": round(sum(call[4] for call in calls) * 1000 / len(calls), 1) if calls else None,
+            # model, static, dynamic, cached, latency ms
+            "per_call": [[m, s, d, c, round(t * 1000, 1)] for m, s, d, c, t in calls],
+        }
+
+    def finish(self, log=True):
+        """Print this run's prompt token split and append it to the prompt log (unless log is False)"""
+        summary = self.summary()
+        if not summary["calls"]:
+            return summary
+        total = summary["static_tokens"] + summary["dynamic_tokens"]
+        print(f"   Prompt tokens: {summary['static_tokens']} static ({summary['cached_tokens']} cached) + "
+              f"{summary['dynamic_tokens']} dynamic over {summary['calls']} calls; "
+              f"~{summary['billed_prompt_tokens'] / total:.0%} billed at full rate")
+        if not log:
+            return summary
+        try:
+            with open(state_path(PROMPT_LOG), 'a') as f:
+                f.write(json.dumps(summary, separators=(',', ':')) + "\n")
+        except OSError as e:
+            print(f"   Prompt log skipped: {e}")
+        return summary
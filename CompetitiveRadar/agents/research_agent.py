@@ -1,7 +1,8 @@
 import os
-import json
 from google import genai
-from google.genai import types
+from agents.prompts import PromptTemplate, PromptUsage
+from agents.routing import ModelRouter
+from agents.structured_output import RESEARCH_SCHEMA, parse_response, process_with_retries
 
 # IMPORTANT: KEEP THIS COMMENT - using blueprint:python_gemini
 # Note that the newest Gemini model series is "gemini-2.5-flash" or "gemini-2.5-pro"
@@ -9,67 +10,80 @@ from google.genai import types
 GEMINI_API_KEY = os.environ.get("GEMINI_FREE_API_KEY") or os.environ.get("GEMINI_API_KEY")
 client = genai.Client(api_key=GEMINI_API_KEY)
 
-def research_agent(competitor_updates):
+RESEARCH_PROMPT = PromptTemplate(
+    'research',
+    system_instruction="You are a business intelligence analyst extracting key insights from competitor updates. Always respond with valid JSON.",
+    instructions="""
+    Analyze the competitor update below and extract the key details:
+    
+    1. Main feature/change/announcement
+    2. Key metrics or numbers mentioned
+    3. Target audience or market
+    4. Potential business impact
+    
+    Respond in JSON format with keys: main_point, metrics, target, impact
+    """,
+    data_template="""
+    Competitor: {competitor}
+    Update: {update}
+    Date: {date}
+    Source: {source}
+    """,
+    response_schema=RESEARCH_SCHEMA,
+)
+
+def _research_update(update, model="gemini-2.5-flash", router=None, usage=None):
+    """One Gemini call for one update; raises on API, parse or schema errors"""
+    response = RESEARCH_PROMPT.generate(client, model, router, usage, competitor=update['competitor'],
+                                        update=update['update'], date=update['date'], source=update['source'])
+    
+    analysis = parse_response(response.text, RESEARCH_SCHEMA)
+    
+    return {
+        "id": update['id'],
+        "competitor": update['competitor'],
+        "competitor_category": update.get('competitor_category', 'Unknown'),
+        "original_update": update.get('update', ''),
+        "update": update.get('update', ''),
+        "date": update['date'],
+        "source": update['source'],
+        "source_type": update.get('source_type', 'Unknown'),
+        "impact_score": update.get('impact_score', 5),
+        "analysis": analysis
+    }
+
+def research_agent(competitor_updates, checkpoint=None, log_stats=True):
     """
     Research Agent: Extracts relevant details from competitor updates.
     Takes raw competitor data and structures it with key insights.
+    With a checkpoint, updates finished by an earlier run are reused and new results are recorded.
+    log_stats=False keeps the run's routing and prompt stats out of the shared logs.
+    Extraction runs on the cheapest model tier; an update moves up a tier only if that tier fails.
     """
     print("🔍 Research Agent: Analyzing competitor updates...")
     
-    processed_updates = []
+    done = checkpoint.completed('research') if checkpoint else {}
+    router = ModelRouter('research')
+    usage = PromptUsage(RESEARCH_PROMPT)
+    
+    def research_one(update):
+        processed = router.route(update, lambda model: _research_update(update, model, router, usage))
+        if checkpoint:
+            checkpoint.record('research', processed)
+        return processed
     
+    # Only updates that failed to parse or validate are re-requested
+    todo = [update for update in competitor_updates if str(update['id']) not in done]
+    results = dict(zip((str(u['id']) for u in todo), process_with_retries(todo, research_one, "processing")))
+    
+    processed_updates = []
     for update in competitor_updates:
-        prompt = f"""
-        Analyze this competitor update and extract the key details:
-        
-        Competitor: {update['competitor']}
-        Update: {update['update']}
-        Date: {update['date']}
-        Source: {update['source']}
-        
-        Extract:
-        1. Main feature/change/announcement
-        2. Key metrics or numbers mentioned
-        3. Target audience or market
-        4. Potential business impact
-        
-        Respond in JSON format with keys: main_point, metrics, target, impact
-        """
-        
-        try:
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=[
-                    types.Content(role="user", parts=[types.Part(text=prompt)])
-                ],
-                config=types.GenerateContentConfig(
-                    system_instruction="You are a business intelligence analyst extracting key insights from competitor updates. Always respond with valid JSON.",
-                    response_mime_type="application/json"
-                )
-            )
-            
-            content = response.text
-            if content:
-                analysis = json.loads(content)
-            else:
-                raise ValueError("Empty response from API")
-            
-            processed_updates.append({
-                "id": update['id'],
-                "competitor": update['competitor'],
-                "competitor_category": update.get('competitor_category', 'Unknown'),
-                "original_update": update.get('update', ''),
-                "update": update.get('update', ''),
-                "date": update['date'],
-                "source": update['source'],
-                "source_type": update.get('source_type', 'Unknown'),
-                "impact_score": update.get('impact_score', 5),
-                "analysis": analysis
-            })
-            
-        except Exception as e:
-            print(f"Error processing update {update['id']}: {e}")
-            continue
+        processed = done.get(str(update['id'])) or results.get(str(update['id']))
+        # Updates that failed every attempt are skipped, as before
+        if processed:
+            processed_updates.append(processed)
     
+    router.finish(log_stats)
+    usage.finish(log_stats)
     print(f"✅ Research Agent: Processed {len(processed_updates)} updates")
     return processed_updates
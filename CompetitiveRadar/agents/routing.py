@@ -0,0 +1,188 @@
+"""
+Model routing tiers for CompetitiveRadar agents.
+Each agent has a list of tiers, cheapest first ('local' is the keyword classifier in
+local_stages.py). An item goes to the first tier and moves up only when the tier fails or the
+agent flags its result as uncertain (low category confidence, a priority score near the top-K
+cutoff). Every decision is recorded with per-tier call latency and token counts: a summary is
+printed after each agent and one JSON line per run is appended to .state/routing.jsonl.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from agents.prompt_budget import estimate_tokens
+from checkpoints import is_fatal_api_error
+from storage import state_path
+
+LOCAL_TIER = 'local'
+
+MODEL_ROUTING = os.environ.get('MODEL_ROUTING', 'true').lower() == 'true'
+# Categorizations below this confidence go to the next tier
+ROUTE_CONFIDENCE_THRESHOLD = float(os.environ.get('ROUTE_CONFIDENCE_THRESHOLD', 0.75))
+ROUTING_LOG = os.environ.get('ROUTING_LOG', 'routing.jsonl')
+
+# Override per agent with e.g. CATEGORIZE_MODEL_TIERS="local,gemini-2.5-flash"
+DEFAULT_TIERS = {
+    "research": "gemini-2.5-flash-lite,gemini-2.5-flash",
+    "categorize": "local,gemini-2.5-flash-lite,gemini-2.5-flash",
+    "prioritize": "gemini-2.5-flash-lite,gemini-2.5-flash",
+    # Map briefs on the first tier, the digest itself on the last
+    "summarize": "gemini-2.5-flash,gemini-2.5-pro",
+}
+# What each agent used before routing; MODEL_ROUTING=false restores it
+FIXED_TIERS = {
+    "research": "gemini-2.5-flash",
+    "categorize": "gemini-2.5-flash",
+    "prioritize": "gemini-2.5-flash",
+    "summarize": "gemini-2.5-flash,gemini-2.5-pro",
+}
+
+# USD per 1M tokens (input, output) for the logged cost estimate
+MODEL_PRICES = {
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+
+
+def tiers_for(agent):
+    """Configured tiers for an agent, cheapest first"""
+    default = DEFAULT_TIERS[agent] if MODEL_ROUTING else FIXED_TIERS[agent]
+    value = os.environ.get(f"{agent.upper()}_MODEL_TIERS", default) if MODEL_ROUTING else default
+    return [tier.strip() for tier in value.split(',') if tier.strip()]
+
+
+def _cost(model, input_tokens, output_tokens):
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+class ModelRouter:
+    """Routing state for one agent run: where each item ended up and what each tier cost"""
+
+    def __init__(self, agent, tiers=None):
+        self.agent = agent
+        self.tiers = tiers or tiers_for(agent)
+        self.decisions = {}
+        self.tier_stats = {tier: {"calls": 0, "seconds": 0.0, "input_tokens": 0, "output_tokens": 0} for tier in self.tiers}
+        self._lock = threading.Lock()
+
+    def _observe(self, tier, seconds, input_tokens=0, output_tokens=0):
+        with self._lock:
+            stats = self.tier_stats.setdefault(tier, {"calls": 0, "seconds": 0.0, "input_tokens": 0, "output_tokens": 0})
+            stats["calls"] += 1
+            stats["seconds"] += seconds
+            stats["input_tokens"] += input_tokens
+            stats["output_tokens"] += output_tokens
+
+    def generate(self, client, model, contents, config):
+        """client.models.generate_content, timed and token-counted against the model's tier"""
+        start = time.perf_counter()
+        response = client.models.generate_content(model=model, contents=contents, config=config)
+        usage = getattr(response, 'usage_metadata', None)
+        input_tokens = getattr(usage, 'prompt_token_count', None)
+        output_tokens = getattr(usage, 'candidates_token_count', None)
+        if input_tokens is None:
+            input_tokens = sum(estimate_tokens(part.text) for content in contents for part in content.parts if part.text)
+        if output_tokens is None:
+            output_tokens = estimate_tokens(response.text)
+        self._observe(model, time.perf_counter() - start, input_tokens, output_tokens)
+        return response
+
+    def tier_index(self, item):
+        decision = self.decisions.get(str(item['id']))
+        return self.tiers.index(decision["tier"]) if decision else -1
+
+    def route(self, item, attempt, escalate=None, start=0, reason=None):
+        """
+        Result of attempt(tier) for the first tier from `start` that succeeds and that escalate(result)
+        does not flag (it returns a reason string to move up). The last tier's result or error is final.
+        """
+        key = str(item['id'])
+        with self._lock:
+            previous = self.decisions.get(key)
+        path = list(previous["path"]) if previous and start else []
+        reasons = list(previous["reasons"]) if previous and start else []
+        if reason:
+            reasons.append(reason)
+        for index in range(start, len(self.tiers)):
+            tier = self.tiers[index]
+            last = index == len(self.tiers) - 1
+            path.append(tier)
+            begin = time.perf_counter()
+            try:
+                result = attempt(tier)
+            except Exception as e:
+                if last or is_fatal_api_error(e):
+                    raise
+                reasons.append(f"{tier} failed: {e}")
+                continue
+            finally:
+                if tier == LOCAL_TIER:
+                    self._observe(tier, time.perf_counter() - begin)
+            flagged = None if last or escalate is None else escalate(result)
+            if flagged:
+                reasons.append(f"{tier}: {flagged}")
+                continue
+            if len(path) > 1:
+                print(f"   ↗️  {self.agent} update {key}: {' → '.join(path)} ({'; '.join(reasons)})")
+            with self._lock:
+                self.decisions[key] = {"tier": tier, "path": path, "reasons": reasons}
+            return result
+
+    def summary(self):
+        final = {tier: 0 for tier in self.tiers}
+        for decision in self.decisions.values():
+            final[decision["tier"]] = final.get(decision["tier"], 0) + 1
+        tiers = {}
+        calls = input_tokens = output_tokens = cost = 0
+        for tier, stats in self.tier_stats.items():
+            tier_cost = _cost(tier, stats["input_tokens"], stats["output_tokens"])
+            tiers[tier] = {
+                "final": final.get(tier, 0),
+                "calls": stats["calls"],
+                "avg_latency_ms": round(stats["seconds"] * 1000 / stats["calls"], 1) if stats["calls"] else None,
+                "input_tokens": stats["input_tokens"],
+                "output_tokens": stats["output_tokens"],
+                "cost_usd": round(tier_cost, 6),
+            }
+            if tier != LOCAL_TIER:
+                calls += stats["calls"]
+                input_tokens += stats["input_tokens"]
+                output_tokens += stats["output_tokens"]
+                cost += tier_cost
+        # What the same items would have cost on the agent's previous fixed model
+        fixed = FIXED_TIERS[self.agent].split(',')[-1]
+        items = len(self.decisions)
+        baseline = _cost(fixed, input_tokens / calls * items, output_tokens / calls * items) if calls else 0.0
+        return {
+            "agent": self.agent,
+            "at": datetime.now().isoformat(timespec='seconds'),
+            "items": items,
+            "escalated": sum(1 for d in self.decisions.values() if len(d["path"]) > 1),
+            "tiers": tiers,
+            "cost_usd": round(cost, 6),
+            "fixed_model": fixed,
+            "fixed_cost_usd": round(baseline, 6),
+            "decisions": self.decisions,
+        }
+
+    def finish(self, log=True):
+        """Print this run's routing summary and append it to the routing log (unless log is False)"""
+        summary = self.summary()
+        if not summary["items"]:
+            return summary
+        mix = ", ".join(f"{info['final']} {tier}" for tier, info in summary["tiers"].items() if info["final"])
+        latency = ", ".join(f"{tier} {info['avg_latency_ms']}ms x{info['calls']}"
+                            for tier, info in summary["tiers"].items() if info["calls"])
+        print(f"   Routing: {mix}; {summary['escalated']} escalated | avg latency: {latency}")
+        print(f"   Est. cost ${summary['cost_usd']:.4f} (all on {summary['fixed_model']}: ~${summary['fixed_cost_usd']:.4f})")
+        if not log:
+            return summary
+        try:
+            with open(state_path(ROUTING_LOG), 'a') as f:
+                f.write(json.dumps(summary, separators=(',', ':')) + "\n")
+        except OSError as e:
+            print(f"   Routing log skipped: {e}")
+        return summary
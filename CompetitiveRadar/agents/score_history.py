@@ -0,0 +1,201 @@
+"""
+Priority score history and local score model for the Prioritization Agent.
+Every LLM score is stored per update content hash (grouped by competitor × category), so
+unchanged updates keep their score across runs. A small ridge regression trained on past
+LLM scores predicts scores for new updates; only updates that could make the top-K are
+sent to the LLM. The fitted weights are stored with the history and only refitted after it
+changes, and entries past SCORE_HISTORY_MAX_AGE_DAYS or beyond the newest
+SCORE_HISTORY_MAX_ENTRIES are dropped, so the file and the fit stay bounded.
+"""
+import hashlib
+import os
+from datetime import datetime, timedelta
+from storage import read_json, state_path, write_json_atomic
+
+SCORE_HISTORY_FILE = os.environ.get('SCORE_HISTORY_FILE', 'score_history.json')
+# Train the local model only once this many LLM scores are on record
+SCORE_MODEL_MIN_SAMPLES = int(os.environ.get('SCORE_MODEL_MIN_SAMPLES', 30))
+# Predictions within this many points (plus model RMSE) of the top-K cutoff go to the LLM
+SCORE_BORDERLINE_MARGIN = float(os.environ.get('SCORE_BORDERLINE_MARGIN', 1.0))
+# Older scores are dropped: competitors' priorities drift, and the fit is O(entries)
+SCORE_HISTORY_MAX_AGE_DAYS = int(os.environ.get('SCORE_HISTORY_MAX_AGE_DAYS', 180))
+SCORE_HISTORY_MAX_ENTRIES = int(os.environ.get('SCORE_HISTORY_MAX_ENTRIES', 5000))
+RIDGE_LAMBDA = 1.0
+
+CATEGORIES = ['Product', 'Pricing', 'Marketing']
+COMPETITOR_CATEGORIES = ['Direct Competitor', 'Market Leader', 'Emerging Threat', 'Adjacent Player']
+SOURCE_BUCKETS = 8
+KEYWORDS = [
+    'ai', '$', '%', 'launch', 'pricing', 'price', 'raised', 'funding', 'series', 'acqui',
+    'partner', 'enterprise', 'free', 'integration', 'viral', 'users', 'customers', 'hiring',
+]
+
+
+def content_hash(update):
+    """Identity of an update's scoring-relevant content"""
+    text = "|".join([
+        str(update.get('competitor', '')),
+        str(update.get('category', '')),
+        update.get('original_update') or update.get('update', ''),
+    ])
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _group_key(competitor, category):
+    return f"{competitor}|{category}"
+
+
+def _features(update, group_mean):
+    text = (update.get('original_update') or update.get('update', '')).lower()
+    source_bucket = int(hashlib.md5(str(update.get('source_type', '')).encode('utf-8')).hexdigest(), 16) % SOURCE_BUCKETS
+    x = [1.0, float(update.get('impact_score', 5)) / 10, group_mean / 10]
+    x += [1.0 if update.get('category') == c else 0.0 for c in CATEGORIES]
+    x += [1.0 if update.get('competitor_category') == c else 0.0 for c in COMPETITOR_CATEGORIES]
+    x += [1.0 if b == source_bucket else 0.0 for b in range(SOURCE_BUCKETS)]
+    x += [1.0 if k in text else 0.0 for k in KEYWORDS]
+    return x
+
+
+def _solve(a, b):
+    """Gaussian elimination with partial pivoting for the small ridge normal equations"""
+    n = len(b)
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(m[r][col]))
+        m[col], m[pivot] = m[pivot], m[col]
+        if abs(m[col][col]) < 1e-12:
+            continue
+        for r in range(n):
+            if r != col:
+                factor = m[r][col] / m[col][col]
+                if factor:
+                    for c in range(col, n + 1):
+                        m[r][c] -= factor * m[col][c]
+    return [m[i][n] / m[i][i] if abs(m[i][i]) > 1e-12 else 0.0 for i in range(n)]
+
+
+class ScoreModel:
+    """Ridge regression over update features, fitted on stored LLM scores"""
+
+    def __init__(self, weights, rmse, samples):
+        self.weights = weights
+        self.rmse = rmse
+        self.samples = samples
+
+    def predict(self, features):
+        score = sum(w * x for w, x in zip(self.weights, features))
+        return min(10.0, max(1.0, score))
+
+
+class ScoreHistory:
+    """Stored LLM priority scores keyed by content hash, with per competitor × category stats"""
+
+    def __init__(self, path=None):
+        self.path = path or state_path(SCORE_HISTORY_FILE)
+        data = read_json(self.path, {})
+        self.entries = data.get('entries', {})
+        # Bumped whenever the entries change; the cached model is valid for one revision
+        self.revision = data.get('revision', 0)
+        self._model = data.get('model')
+        self._groups = {}
+        self._prune()
+
+    def _prune(self):
+        """Drop entries older than SCORE_HISTORY_MAX_AGE_DAYS, then all but the newest SCORE_HISTORY_MAX_ENTRIES"""
+        cutoff = (datetime.now() - timedelta(days=SCORE_HISTORY_MAX_AGE_DAYS)).isoformat(timespec='seconds')
+        kept = {key: e for key, e in self.entries.items() if e.get('scored_at', cutoff) >= cutoff}
+        if len(kept) > SCORE_HISTORY_MAX_ENTRIES:
+            newest = sorted(kept, key=lambda key: kept[key].get('scored_at', ''), reverse=True)
+            kept = {key: kept[key] for key in newest[:SCORE_HISTORY_MAX_ENTRIES]}
+        if len(kept) != len(self.entries):
+            self.entries = kept
+            self.revision += 1
+        self._groups = {}
+        for entry in self.entries.values():
+            self._add_to_group(entry)
+
+    def _add_to_group(self, entry):
+        key = _group_key(entry['competitor'], entry['category'])
+        count, total = self._groups.get(key, (0, 0.0))
+        self._groups[key] = (count + 1, total + entry['priority_score'])
+
+    def _global_mean(self):
+        if not self.entries:
+            return 5.0
+        return sum(e['priority_score'] for e in self.entries.values()) / len(self.entries)
+
+    def group_mean(self, competitor, category, exclude_score=None):
+        """Mean past score for competitor × category (leave-one-out when exclude_score is given)"""
+        count, total = self._groups.get(_group_key(competitor, category), (0, 0.0))
+        if exclude_score is not None:
+            count, total = count - 1, total - exclude_score
+        return total / count if count > 0 else self._global_mean()
+
+    def lookup(self, update):
+        """Previously stored LLM result for identical content, or None"""
+        return self.entries.get(content_hash(update))
+
+    def record(self, scored_update):
+        """Store an LLM-scored update"""
+        key = content_hash(scored_update)
+        previous = self.entries.get(key)
+        if previous:
+            count, total = self._groups[_group_key(previous['competitor'], previous['category'])]
+            self._groups[_group_key(previous['competitor'], previous['category'])] = (count - 1, total - previous['priority_score'])
+        entry = {
+            "competitor": scored_update['competitor'],
+            "category": scored_update.get('category', 'Unknown'),
+            "competitor_category": scored_update.get('competitor_category', 'Unknown'),
+            "source_type": scored_update.get('source_type', 'Unknown'),
+            "impact_score": scored_update.get('impact_score', 5),
+            "original_update": scored_update.get('original_update', scored_update.get('update', '')),
+            "priority_score": scored_update['priority_score'],
+            "impact_areas": scored_update.get('impact_areas', []),
+            "urgency_level": scored_update.get('urgency_level', 'medium'),
+            "strategic_implication": scored_update.get('strategic_implication', ''),
+            "scored_at": datetime.now().isoformat(timespec='seconds'),
+        }
+        if not previous or {**previous, 'scored_at': None} != {**entry, 'scored_at': None}:
+            self.revision += 1
+        self.entries[key] = entry
+        self._add_to_group(entry)
+
+    def features(self, update):
+        return _features(update, self.group_mean(update['competitor'], update.get('category', 'Unknown')))
+
+    def train(self):
+        """
+        Fit the local model on stored LLM scores; None until SCORE_MODEL_MIN_SAMPLES exist.
+        The weights from the last fit are reused while the entries are unchanged.
+        """
+        if len(self.entries) < SCORE_MODEL_MIN_SAMPLES:
+            return None
+        cached = self._model
+        if (cached and cached.get('revision') == self.revision
+                and len(cached.get('weights', [])) == len(_features({}, 5.0))):
+            return ScoreModel(cached['weights'], cached['rmse'], cached['samples'])
+        rows, targets = [], []
+        for entry in self.entries.values():
+            score = entry['priority_score']
+            rows.append(_features(entry, self.group_mean(entry['competitor'], entry['category'], exclude_score=score)))
+            targets.append(score)
+
+        d = len(rows[0])
+        xtx = [[0.0] * d for _ in range(d)]
+        xty = [0.0] * d
+        for x, y in zip(rows, targets):
+            for i in range(d):
+                xty[i] += x[i] * y
+                for j in range(d):
+                    xtx[i][j] += x[i] * x[j]
+        for i in range(1, d):  # do not penalize the bias term
+            xtx[i][i] += RIDGE_LAMBDA
+        model = ScoreModel(_solve(xtx, xty), 0.0, len(rows))
+        model.rmse = (sum((model.predict(x) - y) ** 2 for x, y in zip(rows, targets)) / len(rows)) ** 0.5
+        self._model = {"revision": self.revision, "weights": model.weights, "rmse": model.rmse, "samples": model.samples}
+        return model
+
+    def save(self):
+        self._prune()
+        write_json_atomic(self.path, {"version": 1, "revision": self.revision, "entries": self.entries,
+                                      "model": self._model})
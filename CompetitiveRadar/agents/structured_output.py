@@ -0,0 +1,194 @@
+"""
+Structured-output helpers for CompetitiveRadar agents.
+Response schemas are sent to Gemini as response_schema and reused locally to validate
+(and lightly coerce) the JSON that comes back. Parsing uses orjson when installed and
+repairs common truncations before giving up; only items that still fail are re-requested.
+"""
+import json
+import os
+import re
+from checkpoints import is_fatal_api_error
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib parser is the fallback
+    orjson = None
+
+# How many extra passes over the items that failed to parse or validate
+AGENT_RETRIES = int(os.environ.get('AGENT_RETRIES', 1))
+
+RESEARCH_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "main_point": {"type": "STRING"},
+        "metrics": {"type": "STRING"},
+        "target": {"type": "STRING"},
+        "impact": {"type": "STRING"},
+    },
+    "required": ["main_point"],
+}
+
+CATEGORY_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "category": {"type": "STRING", "enum": ["Product", "Pricing", "Marketing"]},
+        "reasoning": {"type": "STRING"},
+        "confidence": {"type": "NUMBER", "minimum": 0, "maximum": 1},
+    },
+    "required": ["category"],
+}
+
+PRIORITY_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "priority_score": {"type": "INTEGER", "minimum": 1, "maximum": 10},
+        "impact_areas": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "urgency_level": {"type": "STRING", "enum": ["low", "medium", "high"]},
+        "strategic_implication": {"type": "STRING"},
+    },
+    "required": ["priority_score"],
+}
+
+
+class ResponseValidationError(ValueError):
+    """Model output could not be parsed or does not match the response schema"""
+
+
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+
+
+def loads(text):
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def repair_json(text):
+    """
+    Best-effort fix for truncated or chatty JSON: strips code fences and prose around the
+    payload, closes an unterminated string and any open brackets, and if the last member
+    is incomplete, cuts back to the previous comma. Returns the first candidate that parses.
+    """
+    text = _FENCE_RE.sub('', text.strip())
+    starts = [i for i in (text.find('{'), text.find('[')) if i != -1]
+    if starts:
+        text = text[min(starts):]
+
+    stack, in_string, escaped = [], False, False
+    commas = []  # (position, closers needed at that point)
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append('}' if ch == '{' else ']')
+        elif ch in '}]':
+            if stack:
+                stack.pop()
+            if not stack:
+                # Anything after the closed top-level value is prose
+                text = text[:i + 1]
+                break
+        elif ch == ',':
+            commas.append((i, ''.join(reversed(stack))))
+
+    closed = text + ('"' if in_string else '')
+    candidates = [closed + ''.join(reversed(stack))]
+    candidates += [text[:position] + closers for position, closers in reversed(commas)]
+    for candidate in candidates:
+        candidate = _TRAILING_COMMA_RE.sub(r'\1', candidate)
+        try:
+            loads(candidate)
+            return candidate
+        except ValueError:
+            continue
+    return candidates[0]
+
+
+def _coerce(value, schema, path):
+    kind = schema.get("type")
+    if kind == "OBJECT":
+        if not isinstance(value, dict):
+            raise ResponseValidationError(f"{path}: expected object")
+        for key in schema.get("required", []):
+            if key not in value or value[key] is None:
+                raise ResponseValidationError(f"{path}.{key}: missing required field")
+        properties = schema.get("properties", {})
+        return {key: _coerce(v, properties[key], f"{path}.{key}") if key in properties else v
+                for key, v in value.items() if v is not None}
+    if kind == "ARRAY":
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, list):
+            raise ResponseValidationError(f"{path}: expected array")
+        return [_coerce(v, schema.get("items", {}), f"{path}[{i}]") for i, v in enumerate(value)]
+    if kind in ("INTEGER", "NUMBER"):
+        if isinstance(value, bool):
+            raise ResponseValidationError(f"{path}: expected number")
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ResponseValidationError(f"{path}: expected number, got {value!r}")
+        if "minimum" in schema:
+            number = max(schema["minimum"], number)
+        if "maximum" in schema:
+            number = min(schema["maximum"], number)
+        return int(round(number)) if kind == "INTEGER" else number
+    if kind == "STRING":
+        if isinstance(value, (list, dict)):
+            value = json.dumps(value) if isinstance(value, dict) else ", ".join(str(v) for v in value)
+        value = str(value)
+        if "enum" in schema:
+            match = next((option for option in schema["enum"] if option.lower() == value.strip().lower()), None)
+            if match is None:
+                raise ResponseValidationError(f"{path}: {value!r} not in {schema['enum']}")
+            value = match
+        return value
+    return value
+
+
+def parse_response(text, schema):
+    """Parse and validate a model response against schema; raises ResponseValidationError"""
+    if not text:
+        raise ResponseValidationError("Empty response from API")
+    try:
+        data = loads(text)
+    except ValueError:
+        try:
+            data = loads(repair_json(text))
+        except ValueError as e:
+            raise ResponseValidationError(f"Unparseable JSON: {e}")
+    return _coerce(data, schema, "$")
+
+
+def process_with_retries(items, handle, error_label, retries=AGENT_RETRIES):
+    """
+    Run handle(item) for every item, then re-run only the failures up to `retries` times.
+    Returns results aligned with items (None where an item failed every attempt).
+    Quota / rate-limit errors are re-raised immediately so the run can be resumed later.
+    """
+    results = [None] * len(items)
+    pending = list(range(len(items)))
+    for attempt in range(retries + 1):
+        if not pending:
+            break
+        if attempt:
+            print(f"   Retrying {len(pending)} failed updates (attempt {attempt + 1})")
+        failed = []
+        for i in pending:
+            try:
+                results[i] = handle(items[i])
+            except Exception as e:
+                print(f"Error {error_label} update {items[i]['id']}: {e}")
+                if is_fatal_api_error(e):
+                    raise
+                failed.append(i)
+        pending = failed
+    return results
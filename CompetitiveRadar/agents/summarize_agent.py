@@ -1,8 +1,11 @@
 import os
-import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from google import genai
-from google.genai import types
+from agents.prompt_budget import SUMMARY_PROMPT_TOKEN_BUDGET, build_budgeted_blocks, estimate_tokens
+from agents.prompts import PromptTemplate, PromptUsage
+from agents.routing import tiers_for
+from trends import TRENDS_ENABLED, TREND_WINDOW_WEEKS, trend_context
 
 # IMPORTANT: KEEP THIS COMMENT - using blueprint:python_gemini
 # Note that the newest Gemini model series is "gemini-2.5-flash" or "gemini-2.5-pro"
@@ -10,6 +13,126 @@ from google.genai import types
 GEMINI_API_KEY = os.environ.get("GEMINI_FREE_API_KEY") or os.environ.get("GEMINI_API_KEY")
 client = genai.Client(api_key=GEMINI_API_KEY)
 
+# Above this many updates the digest is built map-reduce style: flash briefs per chunk, pro for the final pass
+SUMMARY_MAP_REDUCE_THRESHOLD = int(os.environ.get('SUMMARY_MAP_REDUCE_THRESHOLD', 8))
+SUMMARY_MAP_CHUNK_SIZE = int(os.environ.get('SUMMARY_MAP_CHUNK_SIZE', 5))
+SUMMARY_MAP_WORKERS = int(os.environ.get('SUMMARY_MAP_WORKERS', 4))
+# Map briefs use the cheapest summarize tier, the digest itself the top one (see agents/routing.py)
+SUMMARY_TIERS = tiers_for('summarize')
+SUMMARY_MAP_MODEL, SUMMARY_MODEL = SUMMARY_TIERS[0], SUMMARY_TIERS[-1]
+
+SYSTEM_INSTRUCTION = "You are an expert business strategist creating executive briefings for startup founders. Your summaries are concise, actionable, and strategically insightful."
+
+DIGEST_INSTRUCTIONS = """
+Create a beautiful, actionable weekly digest for a startup founder from the competitor updates that follow.
+
+Generate a compelling digest with:
+1. A catchy headline for each update with appropriate emoji
+2. Competitor category badge (Direct Competitor, Market Leader, Emerging Threat, or Adjacent Player)
+3. Brief but insightful summary (2-3 sentences max per update)
+4. Source attribution (where this intel came from)
+5. Clear category indicator (Product/Pricing/Marketing)
+6. A strategic "Founder Takeaway" section at the end with specific next actions
+
+Make it:
+- Actionable and business-focused for startup founders
+- Easy to scan (use emojis and clear formatting)
+- Strategic (what should the founder do about this?)
+- Include competitor categorization to help founders prioritize
+
+Format in clean, readable markdown. Use emojis to make it engaging but professional.
+Do NOT include the title "CompetitiveRadar – Weekly Digest" as that will be added separately.
+"""
+
+MAP_INSTRUCTIONS = """
+For each update write a markdown brief: a headline with emoji, competitor name and category badge,
+source, category (Product/Pricing/Marketing), priority score, and a 2 sentence strategic summary.
+Keep the original priority order. No introduction or conclusion.
+"""
+
+# Instructions are the cached static prefix; only the update blocks change between calls
+DIGEST_PROMPT = PromptTemplate('summarize', SYSTEM_INSTRUCTION, DIGEST_INSTRUCTIONS, "{data}")
+MAP_PROMPT = PromptTemplate('summarize_map', SYSTEM_INSTRUCTION, MAP_INSTRUCTIONS, "{data}")
+
+
+def _generate(usage, model, data):
+    """Single Gemini call shared by the map and reduce passes, counted in usage (one per template)"""
+    return usage.template.generate(client, model, usage=usage, data=data).text
+
+
+def _digest_prompt(blocks, count, item_label="competitor updates", trends=""):
+    trend_section = f"""
+Trend context (activity over the last {TREND_WINDOW_WEEKS} weeks; mention momentum where it matters):
+{trends}
+""" if trends else ""
+    return f"""Top {count} {item_label}:
+
+{(chr(10) * 2).join(blocks)}
+{trend_section}"""
+
+
+def _trend_context(top_updates):
+    """Rollup summary for the digest's competitors; the digest never fails because of it"""
+    if not TRENDS_ENABLED:
+        return ""
+    try:
+        return trend_context(top_updates)
+    except Exception as e:
+        print(f"   Trend context skipped: {e}")
+        return ""
+
+
+def _budgeted_digest_prompt(top_updates, trends=""):
+    overhead = DIGEST_PROMPT.static_tokens + estimate_tokens(_digest_prompt([], len(top_updates), trends=trends))
+    blocks, stats = build_budgeted_blocks(top_updates, SUMMARY_PROMPT_TOKEN_BUDGET, overhead)
+    print(f"   Prompt budget: ~{stats['estimated_tokens']}/{stats['budget']} tokens "
+          f"({stats['compacted']} compacted, {stats['dropped']} dropped)")
+    return _digest_prompt(blocks, len(blocks), trends=trends)
+
+
+def _map_reduce_digest(top_updates, trends, map_usage, digest_usage):
+    """Summarize chunks in parallel with the fast model, then merge the briefs with the top model"""
+    chunks = [top_updates[i:i + SUMMARY_MAP_CHUNK_SIZE] for i in range(0, len(top_updates), SUMMARY_MAP_CHUNK_SIZE)]
+    chunk_budget = SUMMARY_PROMPT_TOKEN_BUDGET // 2
+    print(f"   Map-reduce mode: {len(top_updates)} updates in {len(chunks)} chunks")
+
+    def map_chunk(start, chunk):
+        overhead = MAP_PROMPT.static_tokens
+        blocks, _ = build_budgeted_blocks(chunk, chunk_budget, overhead)
+        # Keep global numbering so the reduce pass sees the overall priority order
+        blocks = [block.replace(f"#{i}", f"#{start + i}", 1) for i, block in enumerate(blocks, 1)]
+        return _generate(map_usage, SUMMARY_MAP_MODEL, "\n\n".join(blocks))
+
+    with ThreadPoolExecutor(max_workers=SUMMARY_MAP_WORKERS) as executor:
+        briefs = list(executor.map(map_chunk, range(0, len(top_updates), SUMMARY_MAP_CHUNK_SIZE), chunks))
+
+    # Briefs are already compact; fit the largest prefix of them into the reduce budget
+    overhead = DIGEST_PROMPT.static_tokens + estimate_tokens(_digest_prompt([], len(top_updates), "update briefs", trends))
+    kept, used = [], overhead
+    for brief in briefs:
+        cost = estimate_tokens(brief or '')
+        if kept and used + cost > SUMMARY_PROMPT_TOKEN_BUDGET:
+            break
+        kept.append(brief or '')
+        used += cost
+    print(f"   Reduce prompt: ~{used}/{SUMMARY_PROMPT_TOKEN_BUDGET} tokens from {len(kept)} briefs")
+
+    return _generate(digest_usage, SUMMARY_MODEL, _digest_prompt(kept, len(kept), "competitor update briefs", trends))
+
+
+def generate_digest_content(top_updates):
+    """Digest body (headlines, summaries, Founder Takeaway) without the header; raises on API errors"""
+    trends = _trend_context(top_updates)
+    map_usage, digest_usage = PromptUsage(MAP_PROMPT), PromptUsage(DIGEST_PROMPT)
+    try:
+        if len(top_updates) > SUMMARY_MAP_REDUCE_THRESHOLD:
+            return _map_reduce_digest(top_updates, trends, map_usage, digest_usage)
+        return _generate(digest_usage, SUMMARY_MODEL, _budgeted_digest_prompt(top_updates, trends))
+    finally:
+        map_usage.finish()
+        digest_usage.finish()
+
+
 def summarize_agent(top_updates, founder_persona="Startup Founder"):
     """
     Summarization Agent: Generates beautiful Markdown digest with emojis, headlines,
@@ -17,60 +140,8 @@ def summarize_agent(top_updates, founder_persona="Startup Founder"):
     """
     print("📝 Summarization Agent: Generating digest...")
     
-    # Prepare context for AI
-    updates_summary = []
-    for i, update in enumerate(top_updates, 1):
-        competitor_cat = update.get('competitor_category', 'Unknown')
-        source = update.get('source', 'N/A')
-        source_type = update.get('source_type', 'N/A')
-        
-        updates_summary.append(f"""
-        Update #{i}:
-        Competitor: {update['competitor']} ({competitor_cat})
-        Category: {update.get('category', 'N/A')}
-        Source: {source} ({source_type})
-        Priority Score: {update.get('priority_score', 0)}/10
-        Urgency: {update.get('urgency_level', 'N/A')}
-        Update: {update.get('original_update', update.get('update', 'N/A'))}
-        Strategic Implication: {update.get('strategic_implication', 'N/A')}
-        Impact Areas: {', '.join(update.get('impact_areas', []))}
-        """)
-    
-    prompt = f"""
-    Create a beautiful, actionable weekly digest for a startup founder based on these top 3 competitor updates.
-    
-    {chr(10).join(updates_summary)}
-    
-    Generate a compelling digest with:
-    1. A catchy headline for each update with appropriate emoji
-    2. Competitor category badge (Direct Competitor, Market Leader, Emerging Threat, or Adjacent Player)
-    3. Brief but insightful summary (2-3 sentences max per update)
-    4. Source attribution (where this intel came from)
-    5. Clear category indicator (Product/Pricing/Marketing)
-    6. A strategic "Founder Takeaway" section at the end with specific next actions
-    
-    Make it:
-    - Actionable and business-focused for startup founders
-    - Easy to scan (use emojis and clear formatting)
-    - Strategic (what should the founder do about this?)
-    - Include competitor categorization to help founders prioritize
-    
-    Format in clean, readable markdown. Use emojis to make it engaging but professional.
-    Do NOT include the title "CompetitiveRadar – Weekly Digest" as that will be added separately.
-    """
-    
     try:
-        response = client.models.generate_content(
-            model="gemini-2.5-pro",
-            contents=[
-                types.Content(role="user", parts=[types.Part(text=prompt)])
-            ],
-            config=types.GenerateContentConfig(
-                system_instruction="You are an expert business strategist creating executive briefings for startup founders. Your summaries are concise, actionable, and strategically insightful."
-            )
-        )
-        
-        digest_content = response.text
+        digest_content = generate_digest_content(top_updates)
         
         # Create full digest with header
         current_date = datetime.now().strftime("%B %d, %Y")
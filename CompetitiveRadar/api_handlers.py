@@ -0,0 +1,180 @@
+"""
+Framework-neutral logic for the LLM-backed API endpoints.
+app.py (Flask, sync Gemini client) and asgi.py (async Gemini client) both build their model
+requests and response payloads here, so the two stay byte-for-byte identical; only the way
+the model is awaited differs.
+"""
+import json
+from google.genai import types
+from chat_index import CHAT_SYSTEM_INSTRUCTION, answer_locally, fallback_answer, remember
+from digest_renderer import render_personalized_digest
+from pipeline import analyze_watchlist
+from singleflight import SingleFlight, fingerprint
+from watchlist import Watchlist
+
+CHAT_INVALID_REQUEST = {"response": "Invalid request format. Please try again!"}
+CHAT_EMPTY_MESSAGE = {"response": "Please ask me a question!"}
+CHAT_ERROR = {"response": "I'm having trouble right now. Please try the Demo or contact support!"}
+
+# Founders who picked the same competitors at the same time share one watchlist run
+watchlist_flight = SingleFlight("Watchlist analysis")
+
+
+def parse_json_body(content_type, body):
+    """JSON request body, with Flask's request.get_json() rules: JSON content type required, errors raise"""
+    mimetype = (content_type or '').split(';')[0].strip().lower()
+    if not (mimetype == 'application/json' or (mimetype.startswith('application/') and mimetype.endswith('+json'))):
+        raise ValueError("Unsupported Media Type: expected application/json")
+    return json.loads(body)
+
+
+# Chat
+
+def chat_local_reply(data):
+    """
+    Chat answer that needs no model call, as ((payload, status), None), or (None, message) when
+    the question should go to Gemini
+    """
+    if not data:
+        return (CHAT_INVALID_REQUEST, 400), None
+    user_message = data.get('message', '').strip()
+    if not user_message:
+        return (CHAT_EMPTY_MESSAGE, 400), None
+    # Repeat and FAQ-style questions are answered from the local index without a model call
+    local_response, _ = answer_locally(user_message)
+    if local_response:
+        return ({"response": local_response}, 200), None
+    return None, user_message
+
+
+def chat_model_request(user_message):
+    """generate_content() arguments for a novel chat question"""
+    return dict(
+        model="gemini-2.5-flash",
+        contents=[
+            types.Content(role="user", parts=[types.Part(text=user_message)])
+        ],
+        config=types.GenerateContentConfig(
+            system_instruction=CHAT_SYSTEM_INSTRUCTION,
+            temperature=0.7,
+            max_output_tokens=150
+        )
+    )
+
+
+def chat_model_reply(user_message, response):
+    """Payload for a model response, or None when it came back empty"""
+    if response.text:
+        bot_response = response.text.strip()
+        remember(user_message, bot_response)
+        return {"response": bot_response}
+    return None
+
+
+def chat_fallback(user_message):
+    """Closest FAQ answer when the model is unavailable"""
+    return {"response": fallback_answer(user_message)}
+
+
+# Competitor discovery
+
+def discovery_model_request(startup_type, description):
+    """generate_content() arguments asking Gemini for 10-12 real competitors"""
+    prompt = f"""You are a competitive intelligence analyst. Based on this startup description, identify 10-12 real competitors.
+
+Startup Type: {startup_type}
+Description: {description}
+
+For each competitor, provide:
+1. Company name (real, existing companies)
+2. Category: "Direct Competitor" (immediate rivals), "Market Leader" (established players), "Emerging Threat" (fast-growing startups), or "Adjacent Player" (related market)
+3. Brief description (1 sentence)
+4. Key differentiator
+
+Return ONLY valid JSON array format:
+[{{"name": "CompanyName", "category": "Direct Competitor", "description": "Brief description", "differentiator": "Key strength"}}]"""
+
+    return dict(
+        model="gemini-2.5-flash",
+        contents=[types.Content(role="user", parts=[types.Part(text=prompt)])],
+        config=types.GenerateContentConfig(
+            temperature=0.7,
+            response_mime_type="application/json"
+        )
+    )
+
+
+def parse_discovery(response):
+    competitors_json = response.text.strip() if response.text else "[]"
+    return json.loads(competitors_json)
+
+
+def generate_demo_competitors(startup_type, description):
+    """Generate demo competitors when AI is unavailable"""
+    competitors_by_type = {
+        "saas": [
+            {"name": "Salesforce", "category": "Market Leader", "description": "Leading CRM platform", "differentiator": "Ecosystem & enterprise features"},
+            {"name": "HubSpot", "category": "Market Leader", "description": "Marketing & sales platform", "differentiator": "All-in-one solution"},
+            {"name": "Pipedrive", "category": "Direct Competitor", "description": "Sales CRM for small teams", "differentiator": "Simple pipeline management"},
+            {"name": "Close", "category": "Direct Competitor", "description": "Sales engagement platform", "differentiator": "Built-in calling"},
+            {"name": "Attio", "category": "Emerging Threat", "description": "Modern CRM for startups", "differentiator": "Flexible data model"},
+        ],
+        "ecommerce": [
+            {"name": "Shopify", "category": "Market Leader", "description": "E-commerce platform", "differentiator": "Ease of use & app ecosystem"},
+            {"name": "WooCommerce", "category": "Market Leader", "description": "WordPress e-commerce plugin", "differentiator": "Open source & customizable"},
+            {"name": "BigCommerce", "category": "Direct Competitor", "description": "SaaS e-commerce platform", "differentiator": "Enterprise features"},
+        ],
+        "fintech": [
+            {"name": "Stripe", "category": "Market Leader", "description": "Payment processing platform", "differentiator": "Developer experience"},
+            {"name": "PayPal", "category": "Market Leader", "description": "Digital payments", "differentiator": "Consumer trust & reach"},
+            {"name": "Plaid", "category": "Direct Competitor", "description": "Financial data connectivity", "differentiator": "Bank integration API"},
+        ],
+    }
+
+    # Get competitors for type or use generic SaaS
+    competitors = competitors_by_type.get(startup_type, competitors_by_type["saas"])
+
+    # Add a few more generic ones
+    competitors.extend([
+        {"name": "Monday.com", "category": "Adjacent Player", "description": "Work management platform", "differentiator": "Visual workflows"},
+        {"name": "Notion", "category": "Adjacent Player", "description": "All-in-one workspace", "differentiator": "Flexibility & collaboration"},
+        {"name": "Airtable", "category": "Adjacent Player", "description": "Low-code platform", "differentiator": "Database flexibility"},
+    ])
+
+    return competitors[:10]
+
+
+# Personalized digest
+
+def tracked_updates(selected_competitors, top_k=3):
+    """Top updates for the selected competitors, from a pipeline run over just their watchlist"""
+    watchlist = Watchlist.from_competitors(selected_competitors)
+    if watchlist is None:
+        return []
+    try:
+        scored = watchlist_flight.do(fingerprint(watchlist.fingerprint()), analyze_watchlist, watchlist)
+    except Exception as e:
+        print(f"Watchlist analysis error: {e}")
+        return []
+    return scored[:top_k]
+
+
+def generate_personalized_digest(selected_competitors, startup_description):
+    """Generate personalized digest based on selected competitors"""
+    return render_personalized_digest(selected_competitors, startup_description, tracked_updates(selected_competitors))
+
+
+def personalized_digest_reply(session):
+    """(payload, status) for /api/generate-personalized-digest; stores the digest in the session"""
+    selected_competitors = session.get('selected_competitors', [])
+
+    if not selected_competitors:
+        return {"error": "No competitors selected"}, 400
+
+    # Generate digest based on selected competitors
+    digest = generate_personalized_digest(selected_competitors, session.get('startup_description', ''))
+
+    # Save to session
+    session['personalized_digest'] = digest
+
+    return {"success": True, "digest": digest}, 200
@@ -0,0 +1,285 @@
+"""
+Append-only archive of raw competitor updates for long-range history and trends.
+
+Layout (under ARCHIVE_DIR):
+    updates.bin   records as <uint32 length><compact JSON>, appended only
+    by_id.idx     sorted (uint64 id hash, uint64 offset) pairs
+    by_date.idx   sorted (uint32 YYYYMMDD, uint64 offset) pairs
+
+Both index files start with a header holding the number of data bytes they cover, so a crash
+between appending records and rewriting the indexes is repaired by indexing only the tail.
+Readers memory-map all three files: opening is O(1) whatever the archive size, lookups by id
+are a binary search, and date ranges are a binary search plus a sequential scan.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from storage import STATE_DIR, FileLock
+
+ARCHIVE_ENABLED = os.environ.get('ARCHIVE_ENABLED', 'true').lower() == 'true'
+ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR', os.path.join(STATE_DIR, 'archive'))
+
+DATA_FILE = 'updates.bin'
+ID_INDEX_FILE = 'by_id.idx'
+DATE_INDEX_FILE = 'by_date.idx'
+
+_LENGTH = struct.Struct('<I')
+_HEADER = struct.Struct('<8sQ')  # magic, data bytes covered
+_ID_ENTRY = struct.Struct('<QQ')
+_DATE_ENTRY = struct.Struct('<IQ')
+_ID_MAGIC = b'CRIDX1\0\0'
+_DATE_MAGIC = b'CRDTX1\0\0'
+
+
+def id_key(update_id):
+    return int.from_bytes(hashlib.blake2b(str(update_id).encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def date_key(date):
+    """'2025-10-05' -> 20251005 (0 for unparseable dates, which sort first)"""
+    digits = str(date or '')[:10].replace('-', '')
+    return int(digits) if len(digits) == 8 and digits.isdigit() else 0
+
+
+def _map(path):
+    """Read-only mmap of a file, or None when it is missing or empty"""
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return None
+
+
+class _Index:
+    """Sorted fixed-width (key, offset) entries behind a header, read through mmap"""
+
+    def __init__(self, path, entry, magic):
+        self.entry = entry
+        self.magic = magic
+        self.map = _map(path)
+        self.covered = 0
+        if self.map is not None and len(self.map) >= _HEADER.size:
+            found_magic, self.covered = _HEADER.unpack_from(self.map, 0)
+            if found_magic != magic:
+                raise ValueError(f"{path} is not a CompetitiveRadar archive index")
+        self.count = (len(self.map) - _HEADER.size) // entry.size if self.map is not None else 0
+
+    def entry_at(self, i):
+        return self.entry.unpack_from(self.map, _HEADER.size + i * self.entry.size)
+
+    def key_at(self, i):
+        return self.entry_at(i)[0]
+
+    def lower_bound(self, key):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def upper_bound(self, key):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key_at(mid) <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+
+
+class UpdateArchive:
+    """Read-only, memory-mapped view of the archive as of when it was opened"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or ARCHIVE_DIR
+        # Indexes first: appends write the data before replacing the indexes, so every indexed
+        # offset is inside the data mapped afterwards even if an append runs in between
+        self.by_id = _Index(os.path.join(self.directory, ID_INDEX_FILE), _ID_ENTRY, _ID_MAGIC)
+        self.by_date = _Index(os.path.join(self.directory, DATE_INDEX_FILE), _DATE_ENTRY, _DATE_MAGIC)
+        self.data = _map(os.path.join(self.directory, DATA_FILE))
+        self.size = len(self.data) if self.data is not None else 0
+
+    def __len__(self):
+        return self.by_id.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for m in (self.data, self.by_id, self.by_date):
+            if m is not None:
+                m.close()
+
+    def record_at(self, offset):
+        (length,) = _LENGTH.unpack_from(self.data, offset)
+        start = offset + _LENGTH.size
+        return json.loads(self.data[start:start + length])
+
+    def get(self, update_id):
+        """Archived update by id, or None"""
+        key = id_key(update_id)
+        i = self.by_id.lower_bound(key)
+        while i < self.by_id.count:
+            found_key, offset = self.by_id.entry_at(i)
+            if found_key != key:
+                break
+            i += 1
+            if offset >= self.size:
+                continue  # data truncated after the index was written
+            record = self.record_at(offset)
+            if str(record.get('id')) == str(update_id):
+                return record
+            # else a hash collision
+        return None
+
+    def __contains__(self, update_id):
+        return self.get(update_id) is not None
+
+    def range(self, start=None, end=None, competitor=None, limit=None):
+        """Updates dated start..end inclusive (YYYY-MM-DD, either may be omitted), oldest first"""
+        i = self.by_date.lower_bound(date_key(start) if start else 0)
+        last = date_key(end) if end else None
+        found = 0
+        while i < self.by_date.count and (limit is None or found < limit):
+            key, offset = self.by_date.entry_at(i)
+            if last is not None and key > last:
+                break
+            i += 1
+            if offset >= self.size:
+                continue
+            record = self.record_at(offset)
+            if competitor is None or record.get('competitor') == competitor:
+                found += 1
+                yield record
+
+    def record_end(self, offset):
+        return offset + _LENGTH.size + _LENGTH.unpack_from(self.data, offset)[0]
+
+    def scan(self, start_offset=0):
+        """(offset, record) for every record from start_offset in append order"""
+        offset = start_offset
+        while offset + _LENGTH.size <= self.size:
+            (length,) = _LENGTH.unpack_from(self.data, offset)
+            if offset + _LENGTH.size + length > self.size:
+                break  # torn final record
+            yield offset, self.record_at(offset)
+            offset += _LENGTH.size + length
+
+
+def _write_index(path, index, new_entries, covered):
+    """
+    Rewrite an index with new entries merged in. Existing entries are copied as raw byte ranges
+    between insertion points, so the cost is a memcpy of the index plus a binary search per new entry.
+    New records always have larger offsets, so they go after existing entries with the same key.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(index.magic, covered))
+        previous = 0
+        for entry in sorted(new_entries):
+            position = index.upper_bound(entry[0])
+            if position > previous:
+                f.write(index.map[_HEADER.size + previous * index.entry.size:_HEADER.size + position * index.entry.size])
+            f.write(index.entry.pack(*entry))
+            previous = position
+        if index.count > previous:
+            f.write(index.map[_HEADER.size + previous * index.entry.size:_HEADER.size + index.count * index.entry.size])
+    os.replace(tmp_path, path)
+
+
+def append_updates(competitor_updates, directory=None):
+    """Append updates whose id is not archived yet and update both indexes; returns how many were added"""
+    directory = directory or ARCHIVE_DIR
+    os.makedirs(directory, exist_ok=True)
+    # Appends come from every gunicorn worker and the scheduler, so the lock is a file lock
+    lock = FileLock('archive')
+    lock.acquire(blocking=True)
+    try:
+        archive = UpdateArchive(directory)
+        try:
+            consistent = archive.by_id.covered == archive.by_date.covered
+            covered = archive.by_id.covered if consistent else 0
+            # Records the indexes don't cover yet (after a crash), or all of them if the indexes disagree
+            tail = list(archive.scan(covered))
+            end = archive.record_end(tail[-1][0]) if tail else covered
+            seen = {str(record.get('id')) for _, record in tail}
+
+            fresh = []
+            for update in competitor_updates:
+                key = str(update.get('id'))
+                if key in seen or (consistent and archive.get(key) is not None):
+                    continue
+                seen.add(key)
+                fresh.append(update)
+            if not fresh and not tail:
+                return 0
+
+            new_entries = [(offset, record) for offset, record in tail]
+            with open(os.path.join(directory, DATA_FILE), 'ab') as f:
+                f.truncate(end)  # drop a torn trailing record, if any
+                offset = end
+                for update in fresh:
+                    payload = json.dumps(update, separators=(',', ':')).encode('utf-8')
+                    f.write(_LENGTH.pack(len(payload)) + payload)
+                    new_entries.append((offset, update))
+                    offset += _LENGTH.size + len(payload)
+                f.flush()
+                os.fsync(f.fileno())
+
+            if not consistent:
+                # Indexes disagree: rebuild both from the data file (tail holds every record)
+                archive.by_id.count = archive.by_date.count = 0
+            _write_index(os.path.join(directory, ID_INDEX_FILE), archive.by_id,
+                         [(id_key(u.get('id')), o) for o, u in new_entries], offset)
+            _write_index(os.path.join(directory, DATE_INDEX_FILE), archive.by_date,
+                         [(date_key(u.get('date')), o) for o, u in new_entries], offset)
+        finally:
+            archive.close()
+    finally:
+        lock.release()
+    return len(fresh)
+
+
+_reader = None
+_reader_key = None
+_reader_lock = threading.Lock()
+
+
+def _archive_version():
+    """(mtime, size) of the data file and both indexes; indexes are replaced after the data is appended"""
+    version = []
+    for name in (DATA_FILE, ID_INDEX_FILE, DATE_INDEX_FILE):
+        try:
+            stat = os.stat(os.path.join(ARCHIVE_DIR, name))
+            version.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            version.append(None)
+    return tuple(version)
+
+
+def open_archive():
+    """Shared reader, reopened whenever the data file or either index has changed since it was mapped"""
+    global _reader, _reader_key
+    key = _archive_version()
+    with _reader_lock:
+        if _reader is None or _reader_key != key:
+            # The previous mapping is left for the garbage collector; requests may still be reading it
+            _reader = UpdateArchive()
+            _reader_key = key
+        return _reader
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point for CompetitiveRadar.
+
+    pip install -e '.[asgi]'
+    uvicorn asgi:application --port 5000      (or: python asgi.py)
+
+POST /api/chat, /api/competitors/discover and /api/generate-personalized-digest are served by
+coroutines that await Gemini through the SDK's async client (client.aio), so a slow model round
+trip holds no thread and one process can keep hundreds of them in flight. Payloads come from
+api_handlers.py, the Flask session cookie is read and written through Flask's own session
+interface, and responses are built with Flask's JSON provider, so clients see the same bytes
+as from app.py. Every other request is passed to the Flask app via asgiref's WsgiToAsgi, on a
+pool of ASGI_WSGI_THREADS threads.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.exceptions import BadRequest, UnsupportedMediaType
+from werkzeug.wrappers import Request
+from app import app, get_gemini_client
+from api_handlers import (
+    CHAT_ERROR, chat_fallback, chat_local_reply, chat_model_reply, chat_model_request,
+    discovery_model_request, generate_demo_competitors, parse_discovery, parse_json_body,
+    personalized_digest_reply,
+)
+from lifecycle import inflight_count, wait_for_inflight
+from scheduler import SCHEDULER_ENABLED, start_background_scheduler, stop_background_scheduler
+from singleflight import AsyncSingleFlight, fingerprint
+
+try:
+    from asgiref.sync import sync_to_async
+    from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+except ImportError:  # asgiref is optional; without it only the async endpoints are served
+    WsgiToAsgi = None
+
+PORT = int(os.environ.get('PORT', 5000))
+ASGI_MAX_BODY = int(os.environ.get('ASGI_MAX_BODY', 1024 * 1024))
+# Threads running pass-through Flask requests, and personalized-digest watchlist runs
+ASGI_WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', 8))
+ASGI_ANALYSIS_THREADS = int(os.environ.get('ASGI_ANALYSIS_THREADS', 16))
+# How long shutdown waits for in-flight analyses, as in serve.py
+WEB_GRACEFUL_TIMEOUT = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 120))
+
+if WsgiToAsgi:
+    _wsgi_pool = ThreadPoolExecutor(max_workers=ASGI_WSGI_THREADS, thread_name_prefix="flask")
+
+    class _PooledWsgiInstance(WsgiToAsgiInstance):
+        # asgiref runs WSGI apps thread-sensitive: every request on one shared thread, and under
+        # concurrent requests its executor bookkeeping breaks ("CurrentThreadExecutor already quit
+        # or is broken", found by benchmarks/soak.py). Flask is thread-safe, so use a pool instead.
+        async def run_wsgi_app(self, body):
+            await sync_to_async(self.run_wsgi_app_sync, thread_sensitive=False, executor=_wsgi_pool)(body)
+
+        def run_wsgi_app_sync(self, body):
+            """Run the Flask app on a pool thread, sending the response as it is produced"""
+            try:
+                environ = self.build_environ(self.scope, body)
+            except ValueError:
+                # Too many duplicate headers (duplicate_header_limit)
+                self.sync_send({"type": "http.response.start", "status": 400, "headers": [(b"content-type", b"text/plain")]})
+                self.sync_send({"type": "http.response.body", "body": b"Bad Request: Too many duplicate headers"})
+                return
+            output = self.wsgi_application(environ, self.start_response)
+            try:
+                bytes_sent = 0
+                for chunk in output:
+                    if not self.response_started:
+                        self.response_started = True
+                        self.sync_send(self.response_start)
+                    if self.response_content_length is not None:
+                        # Never send more than the Content-Length the app declared
+                        chunk = chunk[:self.response_content_length - bytes_sent]
+                    self.sync_send({"type": "http.response.body", "body": chunk, "more_body": True})
+                    bytes_sent += len(chunk)
+                    if bytes_sent == self.response_content_length:
+                        break
+            finally:
+                if hasattr(output, 'close'):
+                    output.close()
+            if not self.response_started:
+                self.response_started = True
+                self.sync_send(self.response_start)
+            self.sync_send({"type": "http.response.body"})
+
+    class _PooledWsgiToAsgi(WsgiToAsgi):
+        async def __call__(self, scope, receive, send):
+            await _PooledWsgiInstance(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+flask_asgi = _PooledWsgiToAsgi(app) if WsgiToAsgi else None
+discovery_flight = AsyncSingleFlight("Competitor discovery")
+_analysis_pool = ThreadPoolExecutor(max_workers=ASGI_ANALYSIS_THREADS, thread_name_prefix="watchlist")
+
+
+class _SessionProxy:
+    """Marks the session accessed when a handler uses it, as flask.session does (drives Vary: Cookie)"""
+
+    def __init__(self, session):
+        self._session = session
+
+    def __getattr__(self, name):
+        self._session.accessed = True
+        return getattr(self._session, name)
+
+    def __setitem__(self, key, value):
+        self._session.accessed = True
+        self._session[key] = value
+
+
+def _load_json(content_type, body):
+    """parse_json_body with the same errors (and messages) as Flask's request.get_json()"""
+    try:
+        return parse_json_body(content_type, body)
+    except UnicodeDecodeError as e:
+        raise BadRequest(f"Failed to decode JSON object: {e}")
+    except ValueError as e:
+        if str(e).startswith("Unsupported Media Type"):
+            raise UnsupportedMediaType("Did not attempt to load JSON data because the request Content-Type was not 'application/json'.")
+        raise BadRequest(f"Failed to decode JSON object: {e}")
+
+
+async def chat(content_type, body, session):
+    """AI Chatbot endpoint - answers questions about CompetitiveRadar"""
+    try:
+        reply, user_message = chat_local_reply(_load_json(content_type, body))
+        if reply:
+            return reply
+
+        # Novel questions go to Gemini without holding a thread
+        try:
+            client = get_gemini_client()
+            if client:
+                response = await client.aio.models.generate_content(**chat_model_request(user_message))
+                payload = chat_model_reply(user_message, response)
+                if payload:
+                    return payload, 200
+        except Exception as ai_error:
+            print(f"AI chat error: {ai_error}")
+
+        return chat_fallback(user_message), 200
+
+    except Exception as e:
+        print(f"Chat error: {e}")
+        return CHAT_ERROR, 500
+
+
+async def _discover_ai(startup_type, description):
+    client = get_gemini_client()
+    if not client:
+        return None
+    return parse_discovery(await client.aio.models.generate_content(**discovery_model_request(startup_type, description)))
+
+
+async def discover(content_type, body, session):
+    """API endpoint for AI-powered competitor discovery"""
+    try:
+        data = _load_json(content_type, body)
+        startup_type = data.get('startup_type', session.get('startup_type', ''))
+        description = data.get('description', session.get('startup_description', ''))
+
+        if not description:
+            return {"error": "Description required"}, 400
+
+        # Duplicate in-flight payloads share one call
+        try:
+            competitors = await discovery_flight.do(fingerprint(startup_type, description.strip()),
+                                                    _discover_ai, startup_type, description)
+            if competitors is not None:
+                session['discovered_competitors'] = competitors
+                return {"competitors": competitors}, 200
+        except Exception as ai_error:
+            print(f"AI discovery error: {ai_error}")
+
+        # Fallback demo competitors based on type
+        demo_competitors = generate_demo_competitors(startup_type, description)
+        session['discovered_competitors'] = demo_competitors
+        return {"competitors": demo_competitors}, 200
+
+    except Exception as e:
+        return {"error": str(e)}, 500
+
+
+async def personalized_digest(content_type, body, session):
+    """Generate personalized digest for selected competitors"""
+    try:
+        # The watchlist run reads the feed and waits on the agents; keep it off the event loop, on a
+        # pool sized for model waits rather than asyncio's default (CPUs + 4 threads)
+        return await asyncio.get_running_loop().run_in_executor(_analysis_pool, personalized_digest_reply, session)
+    except Exception as e:
+        return {"error": str(e)}, 500
+
+
+ROUTES = {
+    '/api/chat': chat,
+    '/api/competitors/discover': discover,
+    '/api/generate-personalized-digest': personalized_digest,
+}
+
+
+async def _read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        body += message.get('body', b"")
+        if len(body) > ASGI_MAX_BODY:
+            raise BadRequest("Request body too large")
+        if not message.get('more_body'):
+            return body
+
+
+async def _send(send, response):
+    await send({
+        'type': 'http.response.start',
+        'status': response.status_code,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response.headers.items()],
+    })
+    await send({'type': 'http.response.body', 'body': response.get_data()})
+
+
+async def handle_api(scope, receive, send, handler):
+    headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+    # Flask's session interface only needs the cookie header from the request
+    session = app.session_interface.open_session(app, Request({'HTTP_COOKIE': headers.get('cookie', '')}))
+    try:
+        body = await _read_body(receive)
+    except BadRequest as e:
+        await _send(send, e.get_response())
+        return
+    if body is None:
+        return
+    payload, status = await handler(headers.get('content-type', ''), body, _SessionProxy(session))
+    response = app.json.response(payload)
+    response.status_code = status
+    with app.app_context():  # the cookie serializer sorts keys like Flask's only inside an app context
+        app.session_interface.save_session(app, session, response)
+    await _send(send, response)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            if SCHEDULER_ENABLED:
+                start_background_scheduler()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            # Same drain as serve.py: no new scheduled runs, then wait for tracked analyses and polish threads
+            stop_background_scheduler()
+            pending = inflight_count()
+            if pending:
+                print(f"Shutting down: waiting for {pending} in-flight analyses...")
+                if not await asyncio.get_running_loop().run_in_executor(None, wait_for_inflight, WEB_GRACEFUL_TIMEOUT):
+                    print("Graceful timeout reached with analyses still running")
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    handler = ROUTES.get(scope.get('path')) if scope['type'] == 'http' and scope.get('method') == 'POST' else None
+    if handler:
+        await handle_api(scope, receive, send, handler)
+    elif flask_asgi is not None:
+        await flask_asgi(scope, receive, send)
+    elif scope['type'] == 'http':
+        await _send(send, app.response_class("Install asgiref to serve the rest of the app from asgi.py", status=404))
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run("asgi:application", host='0.0.0.0', port=PORT, workers=int(os.environ.get('WEB_CONCURRENCY', 1)))
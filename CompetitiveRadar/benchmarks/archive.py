@@ -0,0 +1,82 @@
+"""
+Update archive: open / lookup / range-scan cost against loading a JSON array.
+
+    python -m benchmarks.archive --updates 1000000
+
+Builds an archive of synthetic updates in a temp directory (in batches, like hourly ingests),
+writes the same updates as one JSON array, then times opening each, 1,000 random id lookups,
+a one-week date range and an appended batch.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+import archive
+
+COMPETITORS = ['Notion', 'ClickUp', 'Asana', 'Monday.com', 'Linear', 'Airtable', 'Coda', 'Jira']
+
+
+def synthetic_update(i):
+    day = i // 500  # ~500 updates per day
+    year, day_of_year = 2020 + day // 365, day % 365
+    return {
+        "id": i,
+        "competitor": COMPETITORS[i % len(COMPETITORS)],
+        "update": f"Update {i}: launched feature set {i % 97} with revised pricing tiers and AI automation.",
+        "date": f"{year}-{day_of_year // 31 % 12 + 1:02d}-{day_of_year % 28 + 1:02d}",
+        "source": "Synthetic",
+        "impact_score": i % 10 + 1,
+    }
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<40} {(time.perf_counter() - start) * 1000:>10.2f} ms")
+    return result
+
+
+def time_json_array(json_path, count, ids):
+    with open(json_path, 'w') as f:
+        json.dump([synthetic_update(i) for i in range(count)], f)
+
+    def load_json():
+        with open(json_path) as f:
+            return json.load(f)
+
+    updates = timed("JSON array: load", load_json)
+    by_id = timed("JSON array: build id dict", lambda: {u['id']: u for u in updates})
+    timed("JSON array: 1,000 lookups (dict)", lambda: [by_id[i] for i in ids])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive vs JSON array benchmark")
+    parser.add_argument('--updates', type=int, default=1000000)
+    parser.add_argument('--batch', type=int, default=100000, help="updates per append while building")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        for first in range(0, args.updates, args.batch):
+            archive.append_updates([synthetic_update(i) for i in range(first, min(first + args.batch, args.updates))], directory)
+        print(f"built archive of {args.updates:,} updates in {time.perf_counter() - start:.1f}s "
+              f"({os.path.getsize(os.path.join(directory, archive.DATA_FILE)) / 1e6:.0f} MB data)")
+        ids = random.sample(range(args.updates), 1000)
+        # The parsed array is freed when this returns, before the archive is measured
+        time_json_array(os.path.join(directory, 'updates.json'), args.updates, ids)
+
+        reader = timed("archive: open (mmap)", lambda: archive.UpdateArchive(directory))
+        found = timed("archive: 1,000 lookups by id", lambda: [reader.get(i) for i in ids])
+        assert all(u is not None and u['id'] == i for u, i in zip(found, ids))
+        week = timed("archive: one week range scan", lambda: list(reader.range('2021-03-01', '2021-03-07')))
+        print(f"{'':<40} {len(week):>10,} updates in range")
+        reader.close()
+        timed("archive: append 5,000 updates", lambda: archive.append_updates(
+            [synthetic_update(i) for i in range(args.updates, args.updates + 5000)], directory))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Concurrency check for the async endpoints in asgi.py.
+
+    python -m benchmarks.async_api --requests 300 --model-delay 2 --threads 8
+
+Sends N distinct chat questions at once (so none are answered locally or coalesced) against a
+stand-in Gemini client whose calls take --model-delay seconds:
+  1. asgi.application on one event loop (client.aio, awaited)
+  2. the Flask app with --threads request threads, like one gunicorn gthread worker
+The async path should finish in about one model delay; the threaded one in N / threads delays.
+Also checks that both paths return the same response bodies (modulo the question text).
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class _AsyncModels:
+    def __init__(self, delay):
+        self.delay = delay
+
+    async def generate_content(self, model, contents, config):
+        await asyncio.sleep(self.delay)
+        return _Response(f"Answer to: {contents[0].parts[0].text}")
+
+
+class SlowClient:
+    """Stand-in for genai.Client with a sync and an async (client.aio) surface"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.models = self
+        self.aio = type('Aio', (), {})()
+        self.aio.models = _AsyncModels(delay)
+
+    def generate_content(self, model, contents, config):
+        time.sleep(self.delay)
+        return _Response(f"Answer to: {contents[0].parts[0].text}")
+
+
+def question(run, i):
+    # Tokens unique per question, so the chat index never answers one from an earlier reply
+    return f"{run}{i}q {run}{i}z"
+
+
+async def run_async(application, count):
+    import httpx
+    transport = httpx.ASGITransport(app=application)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(client.post('/api/chat', json={"message": question("a", i)}) for i in range(count)))
+        return [r.content for r in responses], [r.status_code for r in responses], time.perf_counter() - start
+
+
+def run_threaded(flask_app, count, threads):
+    def post(i):
+        response = flask_app.test_client().post('/api/chat', json={"message": question("t", i)})
+        return response.data, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(post, range(count)))
+    return [body for body, _ in results], [status for _, status in results], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent slow LLM requests: async vs threaded")
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--model-delay', type=float, default=2.0)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="cr-async-")
+    for name in ('data', 'templates', 'static'):
+        shutil.copytree(os.path.join(ROOT, name), os.path.join(workdir, name))
+    os.chdir(workdir)
+    os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+    os.environ['SCHEDULER_ENABLED'] = 'false'
+    sys.path.insert(0, ROOT)
+    import app as app_module
+    import asgi
+
+    app_module._gemini_client = SlowClient(args.model_delay)
+    try:
+        async_bodies, async_statuses, async_seconds = asyncio.run(run_async(asgi.application, args.requests))
+        print(f"asgi (async client):   {args.requests} requests, {async_statuses.count(200)} x 200 in {async_seconds:.2f}s")
+        threaded_bodies, threaded_statuses, threaded_seconds = run_threaded(app_module.app, args.requests, args.threads)
+        print(f"flask ({args.threads} threads):     {args.requests} requests, {threaded_statuses.count(200)} x 200 in {threaded_seconds:.2f}s")
+        same = [a.replace(b'"a', b'"t').replace(b' a', b' t') for a in async_bodies] == threaded_bodies
+        print(f"same bodies: {same}")
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
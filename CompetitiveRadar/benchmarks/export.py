@@ -0,0 +1,86 @@
+"""
+Bulk export throughput and memory.
+
+    python -m benchmarks.export --updates 300000
+
+Writes a synthetic scored set of N analysed updates to a temp file, then streams it through
+export.export_stream in each format (all rows, then a filtered subset). Prints the time, output
+size and tracemalloc peak per export, against json.load of the same file for reference.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import export
+
+COMPETITORS = ['Notion', 'ClickUp', 'Asana', 'Monday.com', 'Linear', 'Airtable', 'Coda', 'Jira']
+CATEGORIES = ['Product', 'Pricing', 'Marketing']
+
+
+def synthetic_scored_update(i):
+    score = 10 - i * 10 // 300000 % 10
+    return {
+        "id": i,
+        "competitor": COMPETITORS[i % len(COMPETITORS)],
+        "competitor_category": "Direct Competitor",
+        "original_update": f"Update {i}: launched feature set {i % 97} with revised pricing tiers and AI automation.",
+        "update": f"Update {i}: launched feature set {i % 97} with revised pricing tiers and AI automation.",
+        "date": f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+        "source": "Synthetic",
+        "source_type": "Press Release",
+        "analysis": {"main_point": f"Feature set {i % 97}", "metrics": "N/A", "target": "Teams", "impact": "Product"},
+        "category": CATEGORIES[i % 3],
+        "category_confidence": 0.9,
+        "priority_score": score,
+        "impact_areas": ["roadmap", "positioning"],
+        "urgency_level": "high" if score >= 8 else "medium",
+        "strategic_implication": "High-impact update from Direct Competitor",
+    }
+
+
+def measure(label, func):
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    size = f"{result / 1e6:>8.1f} MB" if result is not None else " " * 11
+    print(f"{label:<32} {seconds:>8.2f} s {size} {peak / 1e6:>8.1f} MB peak")
+
+
+def drain(file_format, args, path):
+    def run():
+        filters, fields = export.parse_filters(args)
+        return sum(len(chunk) for chunk in export.export_stream(file_format, filters, fields, path))
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming export benchmark")
+    parser.add_argument('--updates', type=int, default=300000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="cr-export-") as workdir:
+        path = os.path.join(workdir, 'scored_updates.json')
+        with open(path, 'w') as f:
+            json.dump([synthetic_scored_update(i) for i in range(args.updates)], f, separators=(',', ':'))
+        print(f"{args.updates} scored updates, {os.path.getsize(path) / 1e6:.1f} MB of JSON\n")
+
+        def load():
+            with open(path) as f:
+                json.load(f)
+        measure("json.load (reference)", load)
+        formats = [name for name in export.FORMATS if export.pa is not None or name not in export.ARROW_FORMATS]
+        for file_format in formats:
+            measure(f"{file_format}: all rows", drain(file_format, {}, path))
+        for file_format in formats:
+            measure(f"{file_format}: Notion, score >= 8", drain(file_format, {'competitor': 'Notion', 'min_score': '8'}, path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Stand-in Gemini API server for load and soak tests.
+
+    python -m benchmarks.fake_gemini --port 8765 --delay 0.8 --jitter 0.4 --error-rate 0.01
+
+    GOOGLE_GEMINI_BASE_URL=http://127.0.0.1:8765 GEMINI_API_KEY=fake DEMO_MODE=false python serve.py
+
+Speaks the REST generateContent API the google-genai SDK calls (sync and client.aio), so the app
+runs its real live-mode code paths with no code changes and no quota. Each call is recognised
+by its system instruction / prompt and answered with a plausible body:
+  - research / categorize / prioritize / summarize: a recorded response from
+    fixtures/recorded_responses.json (chosen by the update text, so it is stable per update)
+  - competitor discovery: a JSON list of competitors that appear in the demo feed
+  - chat: a short text answer
+Calls sleep --delay ± --jitter seconds (a thread per call, like the real API's concurrency) and
+--error-rate of them fail with a 503. GET /stats returns call counts and mean delay per kind.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.pipeline import AGENT_MARKERS, RECORDED_FILE
+
+CHAT_MARKER = "helpful assistant for CompetitiveRadar"
+DISCOVERY_MARKER = "identify 10-12 real competitors"
+
+# Competitors in data/competitor_updates_realtime.json, so personalized digests have updates
+DISCOVERED_COMPETITORS = [
+    {"name": "Notion", "category": "Market Leader", "description": "All-in-one workspace for docs and wikis", "differentiator": "Flexible blocks"},
+    {"name": "ClickUp", "category": "Direct Competitor", "description": "Project management for every team", "differentiator": "Feature breadth"},
+    {"name": "Linear", "category": "Emerging Threat", "description": "Issue tracking for software teams", "differentiator": "Speed and polish"},
+    {"name": "Asana", "category": "Market Leader", "description": "Work management platform", "differentiator": "Goals and portfolios"},
+    {"name": "Monday.com", "category": "Direct Competitor", "description": "Work OS for teams", "differentiator": "Visual boards"},
+    {"name": "Airtable", "category": "Adjacent Player", "description": "Low-code database apps", "differentiator": "Spreadsheet-database hybrid"},
+    {"name": "Coda", "category": "Adjacent Player", "description": "Docs that work like apps", "differentiator": "Formulas and packs"},
+    {"name": "Jira", "category": "Market Leader", "description": "Agile project tracking", "differentiator": "Enterprise workflows"},
+    {"name": "Height", "category": "Emerging Threat", "description": "Autonomous project management", "differentiator": "AI-run backlog"},
+    {"name": "Motion", "category": "Emerging Threat", "description": "AI calendar and task planner", "differentiator": "Auto-scheduling"},
+]
+
+_UPDATE_LINE_RE = re.compile(r"^\s*Update: (.*)$", re.MULTILINE)
+_MODEL_PATH_RE = re.compile(r"/models/([^/:]+):generateContent$")
+
+
+class FakeGemini:
+    """Answers for each kind of call, plus per-kind counters"""
+
+    def __init__(self, delay=0.5, jitter=0.0, error_rate=0.0, seed=None):
+        self.delay = delay
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        with open(RECORDED_FILE, 'r') as f:
+            recorded = json.load(f)
+        self.recorded = {agent: [responses[key] for key in sorted(responses)] for agent, responses in recorded.items()}
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def classify(self, body):
+        instruction = " ".join(part.get('text', '') for part in (body.get('systemInstruction') or {}).get('parts', []))
+        prompt = "\n".join(part.get('text', '') for content in body.get('contents', []) for part in content.get('parts', []))
+        if CHAT_MARKER in instruction:
+            return 'chat', prompt
+        if DISCOVERY_MARKER in prompt:
+            return 'discovery', prompt
+        agent = next((name for marker, name in AGENT_MARKERS if marker in instruction), None)
+        return agent or 'unknown', prompt
+
+    def answer(self, kind, prompt):
+        if kind == 'chat':
+            return f"CompetitiveRadar tracks your competitors and sends a weekly digest. (You asked: {prompt[:60]})"
+        if kind == 'discovery':
+            return json.dumps(DISCOVERED_COMPETITORS)
+        if kind in self.recorded:
+            match = _UPDATE_LINE_RE.search(prompt)
+            seed = (match.group(1) if match else prompt).encode('utf-8')
+            responses = self.recorded[kind]
+            return responses[int(hashlib.sha1(seed).hexdigest(), 16) % len(responses)]
+        return None
+
+    def call(self, body):
+        """(status, payload) for one generateContent request; sleeps for the simulated latency"""
+        kind, prompt = self.classify(body)
+        delay = max(0.0, self.delay + self.random.uniform(-self.jitter, self.jitter))
+        failed = self.random.random() < self.error_rate
+        time.sleep(delay)
+        text = None if failed else self.answer(kind, prompt)
+        with self._lock:
+            entry = self.stats.setdefault(kind, {"calls": 0, "errors": 0, "delay_s": 0.0})
+            entry["calls"] += 1
+            entry["delay_s"] += delay
+            entry["errors"] += text is None
+        if failed:
+            return 503, {"error": {"code": 503, "message": "The model is overloaded (simulated)", "status": "UNAVAILABLE"}}
+        if text is None:
+            return 400, {"error": {"code": 400, "message": "fake_gemini: unrecognised call", "status": "INVALID_ARGUMENT"}}
+        prompt_tokens = len(prompt) // 4 + 1
+        output_tokens = len(text) // 4 + 1
+        return 200, {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP", "index": 0}],
+            "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": output_tokens,
+                              "totalTokenCount": prompt_tokens + output_tokens},
+        }
+
+    def snapshot(self):
+        with self._lock:
+            return {kind: {**entry, "mean_delay_s": round(entry["delay_s"] / entry["calls"], 3) if entry["calls"] else 0.0}
+                    for kind, entry in self.stats.items()}
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _reply(self, status, payload):
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.split('?')[0] == '/stats':
+                self._reply(200, fake.snapshot())
+            else:
+                self._reply(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            if not _MODEL_PATH_RE.search(self.path.split('?')[0]):
+                # e.g. cachedContents: the app falls back to inline prompts
+                self._reply(404, {"error": {"code": 404, "message": f"fake_gemini: {self.path} not supported", "status": "NOT_FOUND"}})
+                return
+            status, payload = fake.call(json.loads(body or b'{}'))
+            self._reply(status, payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(port=8765, host='127.0.0.1', **options):
+    """Start the fake API on a daemon thread; returns (server, FakeGemini)"""
+    fake = FakeGemini(**options)
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-gemini", daemon=True).start()
+    return server, fake
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in Gemini API for load tests")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.5, help="Seconds per model call")
+    parser.add_argument('--jitter', type=float, default=0.0, help="± seconds added to each delay")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of calls answered with a 503")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    server, _ = serve(args.port, args.host, delay=args.delay, jitter=args.jitter,
+                      error_rate=args.error_rate, seed=args.seed)
+    print(f"Fake Gemini API on http://{args.host}:{server.server_address[1]} "
+          f"(delay {args.delay}s ± {args.jitter}s, error rate {args.error_rate:.1%})")
+    print(f"   GOOGLE_GEMINI_BASE_URL=http://{args.host}:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Load test for CompetitiveRadar pages: measures requests/sec and latency percentiles.
+
+Against a running server:
+    python -m benchmarks.loadtest --url http://localhost:5000 --concurrency 16 --duration 10
+
+In-process before/after comparison of pre-rendered static pages (no server needed):
+    python -m benchmarks.loadtest --in-process --compare
+"""
+import argparse
+import os
+import threading
+import time
+import urllib.request
+
+DEFAULT_PATHS = ['/', '/features', '/pricing', '/credible', '/get-started']
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def http_fetcher(base_url, accept_encoding):
+    def fetch(path):
+        req = urllib.request.Request(base_url.rstrip('/') + path, headers={'Accept-Encoding': accept_encoding})
+        with urllib.request.urlopen(req, timeout=30) as response:
+            response.read()
+            return response.status
+    return fetch
+
+
+def in_process_fetcher(flask_app, accept_encoding):
+    local = threading.local()
+
+    def fetch(path):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = flask_app.test_client()
+        return client.get(path, headers={'Accept-Encoding': accept_encoding}).status_code
+    return fetch
+
+
+def run_load(fetch, paths, concurrency, duration):
+    """Hammer paths round-robin from `concurrency` threads for `duration` seconds"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(offset):
+        local_latencies, local_errors, i = [], 0, offset
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                if fetch(path) >= 400:
+                    local_errors += 1
+            except Exception:
+                local_errors += 1
+            local_latencies.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def print_result(label, result):
+    print(f"{label:<22} {result['rps']:>9.1f} req/s  p50 {result['p50_ms']:.2f}ms  "
+          f"p95 {result['p95_ms']:.2f}ms  p99 {result['p99_ms']:.2f}ms  "
+          f"({result['requests']} requests, {result['errors']} errors)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CompetitiveRadar load test")
+    parser.add_argument('--url', help="Base URL of a running server")
+    parser.add_argument('--in-process', action='store_true', help="Drive the Flask app directly via its test client")
+    parser.add_argument('--compare', action='store_true', help="In-process: run with pre-rendering off, then on")
+    parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--accept-encoding', default='gzip, br')
+    args = parser.parse_args()
+
+    if args.url:
+        result = run_load(http_fetcher(args.url, args.accept_encoding), args.paths, args.concurrency, args.duration)
+        print_result(args.url, result)
+        return
+
+    if not args.in_process:
+        parser.error("pass --url or --in-process")
+
+    os.environ.setdefault('GEMINI_API_KEY', 'loadtest')
+    import app as app_module
+    import static_pages
+
+    fetch = in_process_fetcher(app_module.app, args.accept_encoding)
+    if args.compare:
+        static_pages.PRERENDERED.clear()
+        print_result("render_template", run_load(fetch, args.paths, args.concurrency, args.duration))
+        static_pages.prerender_static_pages(app_module.app)
+    print_result("pre-rendered", run_load(fetch, args.paths, args.concurrency, args.duration))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Scaling of the local demo stages across processes.
+
+    python -m benchmarks.local_stages --updates 1000000 --workers 1 2 4 8
+
+Builds a synthetic feed by cycling data/competitor_updates_realtime.json with fresh ids and
+varied impact scores, then times local_stages.run_local_stages (research dicts, keyword
+categorization, chunk sort + merge) at each worker count. The pooled output is checked
+against the single-process output.
+"""
+import argparse
+import json
+import os
+import time
+
+import local_stages
+
+
+def synthetic_feed(count, path='data/competitor_updates_realtime.json'):
+    with open(path, 'r') as f:
+        base = json.load(f)
+    return [dict(base[i % len(base)], id=i + 1, impact_score=(i * 7) % 10 + 1) for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process-pool scaling for the local pipeline stages")
+    parser.add_argument('--updates', type=int, default=1000000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument('--chunk-size', type=int, default=local_stages.LOCAL_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    feed = synthetic_feed(args.updates)
+    print(f"{len(feed):,} updates, chunk size {args.chunk_size:,}, {os.cpu_count()} CPUs")
+
+    baseline = None
+    reference = None
+    for workers in sorted(set(args.workers)):
+        start = time.perf_counter()
+        result = local_stages.run_local_stages(feed, workers=workers, chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            reference = [u['id'] for u in result]
+            baseline = elapsed
+        elif [u['id'] for u in result] != reference:
+            raise SystemExit(f"{workers} workers: output order differs from the single-process run")
+        print(f"{workers:>3} workers  {elapsed:>7.2f}s  {len(feed) / elapsed:>12,.0f} updates/s  speedup {baseline / elapsed:.2f}x")
+        del result
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,370 @@
+"""
+Golden-output regression and per-stage performance check for the pipeline.
+
+    python -m benchmarks.pipeline                     # replay, compare, exit 1 on any failure
+    python -m benchmarks.pipeline --golden-only       # outputs only (tests/test_pipeline_golden.py)
+    python -m benchmarks.pipeline --update-golden     # accept the current outputs as golden
+    python -m benchmarks.pipeline --update-baseline   # store the current timings / allocations
+    GEMINI_API_KEY=... python -m benchmarks.pipeline --record   # re-record the model responses
+
+Recorded model responses (fixtures/recorded_responses.json, seeded from demo_data.py's reference
+outputs) are replayed through each agent and through run_analysis() (live path with a sync
+digest, then demo mode) for the feed in fixtures/pipeline_feed.json. Outputs are compared with
+fixtures/pipeline_golden.json and with DEMO_PROCESSED_UPDATES / DEMO_CATEGORIZED_UPDATES /
+DEMO_TOP_UPDATES / DEMO_DIGEST. Each stage is then timed on the feed replicated --scale times
+(median of --rounds runs) and traced once with tracemalloc; a stage slower than
+fixtures/pipeline_baseline.json by more than --time-tolerance, or with a peak allocation more
+than --memory-tolerance above it, fails. Baselines are machine-specific: refresh them with
+--update-baseline on the machine that runs the check.
+
+Runs in a temp working directory with MODEL_ROUTING=false and SCORE_HISTORY=false, so each agent
+call maps to one recorded response and repeated rounds produce identical outputs. The
+run_ingest_defaults stage turns both back on (the production defaults) and ingests twice from an
+empty score history: the cold run routes across model tiers and records scores, the warm run
+reuses them. A re-routed call replays the same recorded response as its first tier.
+"""
+import argparse
+import contextlib
+import difflib
+import io
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+FEED_FILE = os.path.join(FIXTURES, 'pipeline_feed.json')
+RECORDED_FILE = os.path.join(FIXTURES, 'recorded_responses.json')
+GOLDEN_FILE = os.path.join(FIXTURES, 'pipeline_golden.json')
+BASELINE_FILE = os.path.join(FIXTURES, 'pipeline_baseline.json')
+
+# Below these absolute differences timing and allocation noise is ignored
+TIME_FLOOR = 0.005
+MEMORY_FLOOR_KB = 64
+
+# Which agent a call comes from, by its system instruction
+AGENT_MARKERS = (
+    ("business intelligence analyst", "research"),
+    ("categorizing competitive intelligence", "categorize"),
+    ("evaluating competitive threats", "prioritize"),
+    ("executive briefings", "summarize"),
+)
+
+_DATE_RE = re.compile(r"\*\*Date:\*\* [^\n]*")
+_UPDATE_LINE_RE = re.compile(r"^\s*Update: (.*)$", re.MULTILINE)
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class ReplayClient:
+    """
+    Stand-in for genai.Client that answers from recorded responses, keyed by agent and update id
+    (or 'digest'), so prompt wording can change without re-recording. Replicated updates
+    ('<id>.<n>', see scale_feed) replay their original's response. With a live client, calls go
+    through to it and are recorded instead.
+    """
+
+    def __init__(self, recorded, feed, live=None):
+        self.recorded = recorded
+        self.live = live
+        self.models = self
+        self.use_feed(feed)
+
+    def use_feed(self, feed):
+        self.ids = {u['update']: str(u['id']).split('.')[0] for u in feed}
+
+    def _key(self, contents, config):
+        instruction = getattr(config, 'system_instruction', None) or ''
+        agent = next((name for marker, name in AGENT_MARKERS if marker in instruction), None)
+        if agent is None:
+            raise KeyError(f"unrecognised agent call: {instruction[:60]!r}")
+        if agent == 'summarize':
+            return agent, 'digest'
+        match = _UPDATE_LINE_RE.search("\n".join(part.text for part in contents[0].parts))
+        key = self.ids.get(match.group(1).strip()) if match else None
+        if key is None:
+            raise KeyError(f"{agent} call for an update that is not in the feed")
+        return agent, key
+
+    def generate_content(self, model, contents, config):
+        agent, key = self._key(contents, config)
+        if self.live is not None:
+            response = self.live.models.generate_content(model=model, contents=contents, config=config)
+            self.recorded.setdefault(agent, {})[key] = response.text
+            return response
+        try:
+            return _Response(self.recorded[agent][key])
+        except KeyError:
+            raise KeyError(f"no recorded {agent} response for {key}; re-record with --record")
+
+
+def scale_feed(feed, scale):
+    """The feed repeated `scale` times, copies with distinct ids and text"""
+    scaled = list(feed)
+    for n in range(1, scale):
+        scaled += [{**u, "id": f"{u['id']}.{n}", "update": f"{u['update']} [{n}]"} for u in feed]
+    return scaled
+
+
+def normalize(value):
+    """JSON round trip, with the digest date masked"""
+    if isinstance(value, str):
+        return _DATE_RE.sub("**Date:** <date>", value)
+    return json.loads(json.dumps(value, sort_keys=True))
+
+
+def build_stages(feed):
+    """(name, func) pairs; each stage's input is the golden-pass output of the one before"""
+    import pipeline
+    from agents.categorize_agent import categorize_agent
+    from agents.prioritize_agent import score_updates, select_top
+    from agents.research_agent import research_agent
+    from agents.summarize_agent import summarize_agent
+
+    def run_analysis_demo():
+        pipeline.DEMO_MODE = True
+        try:
+            return pipeline.run_analysis()
+        finally:
+            pipeline.DEMO_MODE = False
+
+    def run_ingest_defaults():
+        import agents.prioritize_agent
+        import agents.routing
+        from agents.score_history import SCORE_HISTORY_FILE
+        from storage import state_path
+        if os.path.exists(state_path(SCORE_HISTORY_FILE)):
+            os.remove(state_path(SCORE_HISTORY_FILE))
+        agents.routing.MODEL_ROUTING = agents.prioritize_agent.SCORE_HISTORY_ENABLED = True
+        try:
+            cold = pipeline.run_ingest()
+            warm = pipeline.run_ingest()
+            return {"cold": cold, "warm": warm, "digest": pipeline.build_digest(warm)}
+        finally:
+            agents.routing.MODEL_ROUTING = agents.prioritize_agent.SCORE_HISTORY_ENABLED = False
+
+    inputs = {}
+    stages = [
+        ("research", lambda: research_agent(feed)),
+        ("categorize", lambda: categorize_agent(inputs["research"])),
+        ("prioritize", lambda: score_updates(inputs["categorize"])),
+        ("top3", lambda: select_top(inputs["prioritize"])),
+        ("summarize", lambda: summarize_agent(inputs["top3"], founder_persona="Tech Startup Founder")),
+        ("run_analysis", pipeline.run_analysis),
+        ("run_analysis_demo", run_analysis_demo),
+        ("run_ingest_defaults", run_ingest_defaults),
+    ]
+    return stages, inputs
+
+
+def run_once(stages, inputs):
+    outputs = {}
+    for name, func in stages:
+        with contextlib.redirect_stdout(io.StringIO()):
+            outputs[name] = inputs[name] = func()
+    return outputs
+
+
+def reference_mismatches(outputs):
+    """Differences from demo_data.py's hand-checked reference outputs"""
+    from demo_data import DEMO_CATEGORIZED_UPDATES, DEMO_DIGEST, DEMO_PROCESSED_UPDATES, DEMO_TOP_UPDATES
+
+    problems = []
+
+    def compare_records(stage, expected, actual, ordered=False):
+        by_id = {str(update['id']): update for update in actual}
+        if ordered and [str(u['id']) for u in expected] != [str(u['id']) for u in actual]:
+            problems.append(f"{stage}: order {[u['id'] for u in actual]}, expected {[u['id'] for u in expected]}")
+        for reference in expected:
+            record = by_id.get(str(reference['id']))
+            if record is None:
+                problems.append(f"{stage}: update {reference['id']} missing")
+                continue
+            for field, value in reference.items():
+                if normalize(record.get(field)) != normalize(value):
+                    problems.append(f"{stage}: update {reference['id']} {field} = {record.get(field)!r}, expected {value!r}")
+
+    compare_records("research", DEMO_PROCESSED_UPDATES, outputs["research"])
+    compare_records("categorize", DEMO_CATEGORIZED_UPDATES, outputs["categorize"])
+    compare_records("top3", DEMO_TOP_UPDATES, outputs["top3"], ordered=True)
+    for stage in ("summarize", "run_analysis"):
+        if normalize(outputs[stage]) != normalize(DEMO_DIGEST):
+            problems.append(f"{stage}: digest differs from DEMO_DIGEST")
+    return problems
+
+
+def golden_mismatches(outputs, golden):
+    problems = []
+    for stage, value in outputs.items():
+        if stage not in golden:
+            problems.append(f"{stage}: no golden output (run with --update-golden)")
+            continue
+        actual, expected = normalize(value), golden[stage]
+        if actual == expected:
+            continue
+        as_lines = lambda v: (v if isinstance(v, str) else json.dumps(v, indent=1, sort_keys=True)).splitlines()
+        diff = list(difflib.unified_diff(as_lines(expected), as_lines(actual), "golden", "current", lineterm="", n=1))
+        problems.append(f"{stage}: output differs from golden\n      " + "\n      ".join(diff[:20]))
+    return problems
+
+
+def measure(stages, inputs, rounds):
+    """Median seconds over `rounds` runs and tracemalloc peak KB of one traced run, per stage"""
+    results = {}
+    for name, func in stages:
+        timings = []
+        for _ in range(rounds):
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - start)
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        results[name] = {"seconds": round(statistics.median(timings), 6), "peak_kb": round(peak / 1024, 1)}
+    return results
+
+
+def performance_regressions(results, baseline, time_tolerance, memory_tolerance):
+    problems = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        time_limit = max(base["seconds"] * (1 + time_tolerance), base["seconds"] + TIME_FLOOR)
+        if result["seconds"] > time_limit:
+            problems.append(f"{name}: {result['seconds'] * 1000:.1f}ms vs baseline {base['seconds'] * 1000:.1f}ms")
+        memory_limit = max(base["peak_kb"] * (1 + memory_tolerance), base["peak_kb"] + MEMORY_FLOOR_KB)
+        if result["peak_kb"] > memory_limit:
+            problems.append(f"{name}: peak {result['peak_kb']:.0f}KB vs baseline {base['peak_kb']:.0f}KB")
+    return problems
+
+
+def _write_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False, sort_keys=True)
+        f.write("\n")
+
+
+def _read_json(path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def _report(failures):
+    if failures:
+        print("\nFAILED:")
+        for problem in failures:
+            print(f"  - {problem}")
+        sys.exit(1)
+    print("\nOK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline golden-output and performance regression check")
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--scale', type=int, default=50, help="feed copies for the timing runs")
+    parser.add_argument('--time-tolerance', type=float, default=0.5, help="allowed slowdown vs baseline (0.5 = +50%%)")
+    parser.add_argument('--memory-tolerance', type=float, default=0.25, help="allowed peak allocation growth vs baseline")
+    parser.add_argument('--golden-only', action='store_true', help="compare outputs only, skip the timing runs")
+    parser.add_argument('--update-golden', action='store_true')
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--record', action='store_true', help="call Gemini and re-record the responses")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="cr-pipeline-")
+    for name in ('data', 'templates'):
+        shutil.copytree(os.path.join(ROOT, name), os.path.join(workdir, name))
+    os.chdir(workdir)
+    os.environ.update({
+        'DEMO_MODE': 'false', 'DIGEST_POLISH_MODE': 'sync', 'MODEL_ROUTING': 'false',
+        'SCORE_HISTORY': 'false', 'SCHEDULER_ENABLED': 'false', 'SOURCES': "json:feed.json",
+    })
+    os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+    sys.path.insert(0, ROOT)
+
+    try:
+        import agents.categorize_agent
+        import agents.prioritize_agent
+        import agents.research_agent
+        import agents.summarize_agent
+
+        feed = _read_json(FEED_FILE, [])
+        _write_json('feed.json', feed)
+        recorded = {} if args.record else _read_json(RECORDED_FILE, {})
+        live = None
+        if args.record:
+            from google import genai
+            live = genai.Client(api_key=os.environ.get("GEMINI_FREE_API_KEY") or os.environ.get("GEMINI_API_KEY"))
+        client = ReplayClient(recorded, feed, live)
+        for module in (agents.research_agent, agents.categorize_agent, agents.prioritize_agent, agents.summarize_agent):
+            module.client = client
+
+        stages, inputs = build_stages(feed)
+        outputs = run_once(stages, inputs)
+        if args.record:
+            _write_json(RECORDED_FILE, recorded)
+            print(f"Recorded {sum(len(v) for v in recorded.values())} responses to {RECORDED_FILE}; "
+                  f"review them, then run with --update-golden")
+            return
+
+        failures = reference_mismatches(outputs)
+        if args.update_golden:
+            _write_json(GOLDEN_FILE, {stage: normalize(value) for stage, value in outputs.items()})
+            print(f"Golden outputs written to {GOLDEN_FILE}")
+        else:
+            failures += golden_mismatches(outputs, _read_json(GOLDEN_FILE, {}))
+        print(f"Golden outputs: {len(stages)} stages checked, {len(failures)} mismatches")
+        if args.golden_only:
+            _report(failures)
+            return
+
+        # Timing runs use a larger feed; run_analysis reads it from the same source file
+        scaled = scale_feed(feed, args.scale)
+        _write_json('feed.json', scaled)
+        client.use_feed(scaled)
+        stages, inputs = build_stages(scaled)
+        run_once(stages, inputs)
+        print(f"Timing {len(scaled)} updates per stage, median of {args.rounds} rounds")
+        results = measure(stages, inputs, args.rounds)
+        stored = _read_json(BASELINE_FILE, {})
+        baseline = stored.get("stages", {}) if stored.get("updates") == len(scaled) else {}
+        print(f"\n{'stage':<20}{'median':>10}{'baseline':>10}{'peak':>10}{'baseline':>10}")
+        for name, result in results.items():
+            base = baseline.get(name, {})
+            base_time = f"{base['seconds'] * 1000:.1f}ms" if base else "-"
+            base_peak = f"{base['peak_kb']:.0f}KB" if base else "-"
+            print(f"{name:<20}{result['seconds'] * 1000:>8.1f}ms{base_time:>10}{result['peak_kb']:>8.0f}KB{base_peak:>10}")
+        if args.update_baseline:
+            _write_json(BASELINE_FILE, {"python": platform.python_version(), "machine": platform.machine(),
+                                        "rounds": args.rounds, "updates": len(scaled), "stages": results})
+            print(f"Baseline written to {BASELINE_FILE}")
+        elif not baseline:
+            print(f"No baseline for {len(scaled)} updates yet (run with --update-baseline)")
+        else:
+            failures += performance_regressions(results, baseline, args.time_tolerance, args.memory_tolerance)
+        _report(failures)
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
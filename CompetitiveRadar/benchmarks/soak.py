@@ -0,0 +1,422 @@
+"""
+Scenario load and soak test: concurrent founders walking through the app.
+
+    python -m benchmarks.soak --launch demo --users 20 --duration 60
+    python -m benchmarks.soak --launch fake-live --model-delay 0.8 --users 50 --duration 3600 --report-every 300
+    python -m benchmarks.soak --url http://127.0.0.1:5000 --pid 4242 --users 20 --duration 600
+
+Each virtual user is an asyncio task with its own cookie jar (so its own Flask session). It picks
+a scenario by --mix weight, runs its steps with --think seconds (± half) between them, and repeats
+until --duration is up:
+  - landing     /, /features, /pricing, /credible, /get-started, /demo
+  - digest      /api/digest, /demo/run
+  - onboarding  signup → startup type → description → discovery → /api/competitors/discover →
+                select-top → complete → generating → /api/generate-personalized-digest → view
+  - chat        one FAQ question, then one novel question (goes to the model)
+
+--launch starts the app itself in a temp copy of its working files (serve.py, or asgi.py with
+--server asgi) in demo mode, or in live mode against benchmarks/fake_gemini.py with --model-delay
+per model call; --url drives a server you started. Every --report-every seconds it prints the
+interval's throughput, latency percentiles, error rate and the server's RSS (the process and its
+children: --pid, or the launched server); at the end, per-step totals and the RSS trend over the
+run after --warmup. Exits 1 when the error rate exceeds --max-error-rate or RSS grows faster than
+--max-rss-growth MB/hour.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import httpx
+
+from benchmarks.loadtest import percentile
+
+try:
+    import psutil
+except ImportError:  # optional; /proc is read directly on Linux
+    psutil = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MIX = "landing=5,digest=2,onboarding=1,chat=2"
+LANDING_PATHS = ['/', '/features', '/pricing', '/credible', '/get-started', '/demo']
+STARTUP_TYPES = [
+    ('productivity', 'Productivity / Workflow', "AI project management for remote product teams"),
+    ('saas', 'SaaS / Software', "CRM for early-stage B2B founders with automatic pipeline updates"),
+    ('devtools', 'Developer Tools', "Issue tracker that writes its own tickets from pull requests"),
+    ('ai_ml', 'AI / Machine Learning', "Meeting assistant that turns calls into tasks"),
+]
+FAQ_QUESTIONS = ["How much does it cost?", "How does CompetitiveRadar work?", "Can I try a demo?", "What features do you have?"]
+
+
+class StepFailed(Exception):
+    pass
+
+
+class Stats:
+    """Latencies and errors per step, for the whole run and for the current report interval"""
+
+    def __init__(self):
+        self.steps = {}
+        self.interval = []
+        self.interval_errors = 0
+        self.error_samples = {}
+
+    def record(self, step, seconds, error=None):
+        entry = self.steps.setdefault(step, {"latencies": [], "errors": 0})
+        entry["latencies"].append(seconds)
+        self.interval.append(seconds)
+        if error:
+            entry["errors"] += 1
+            self.interval_errors += 1
+            self.error_samples.setdefault(step, error)
+
+    def take_interval(self):
+        latencies, errors = self.interval, self.interval_errors
+        self.interval, self.interval_errors = [], 0
+        return sorted(latencies), errors
+
+
+class User:
+    def __init__(self, client, stats, think):
+        self.client = client
+        self.stats = stats
+        self.think = think
+        self.iteration = 0
+
+    async def pause(self):
+        if self.think:
+            await asyncio.sleep(random.uniform(self.think / 2, self.think * 1.5))
+
+    async def request(self, step, method, path, expect=(200,), **kwargs):
+        start = time.perf_counter()
+        error = None
+        try:
+            response = await self.client.request(method, path, **kwargs)
+            await response.aread()
+            if response.status_code not in expect:
+                error = f"HTTP {response.status_code}"
+        except httpx.HTTPError as e:
+            response, error = None, f"{type(e).__name__}: {e}"
+        self.stats.record(step, time.perf_counter() - start, error)
+        if error:
+            raise StepFailed(error)
+        return response
+
+
+async def landing(user):
+    for path in LANDING_PATHS:
+        await user.request(f"GET {path}", 'GET', path)
+        await user.pause()
+
+
+async def digest(user):
+    # 503 is the documented "digest is being prepared" reply while the scheduler catches up
+    await user.request("GET /api/digest", 'GET', '/api/digest', expect=(200, 503))
+    await user.pause()
+    await user.request("GET /demo/run", 'GET', '/demo/run', expect=(200, 503))
+
+
+async def onboarding(user):
+    startup_type, type_name, description = random.choice(STARTUP_TYPES)
+    await user.request("POST /signup", 'POST', '/signup', expect=(302,),
+                       data={"email": f"founder{id(user)}@example.com", "name": "Founder", "plan": "growth"})
+    await user.request("GET /onboarding/startup-type", 'GET', '/onboarding/startup-type')
+    await user.pause()
+    await user.request("POST /onboarding/description", 'POST', '/onboarding/description', expect=(302,),
+                       data={"startup_type": startup_type, "startup_type_name": type_name})
+    await user.request("GET /onboarding/description", 'GET', '/onboarding/description')
+    await user.pause()
+    await user.request("POST /onboarding/discovery", 'POST', '/onboarding/discovery', data={"description": description})
+    response = await user.request("POST /api/competitors/discover", 'POST', '/api/competitors/discover',
+                                  json={"startup_type": startup_type, "description": description})
+    competitors = response.json().get('competitors') or []
+    await user.request("GET /onboarding/select-top", 'GET', '/onboarding/select-top')
+    await user.pause()
+    selected = sorted(random.sample(range(len(competitors)), min(3, len(competitors))))
+    await user.request("POST /onboarding/complete", 'POST', '/onboarding/complete', json={"selected": selected})
+    await user.request("GET /onboarding/generating", 'GET', '/onboarding/generating')
+    await user.request("POST /api/generate-personalized-digest", 'POST', '/api/generate-personalized-digest')
+    await user.request("GET /onboarding/personalized-digest", 'GET', '/onboarding/personalized-digest')
+
+
+async def chat(user):
+    await user.request("POST /api/chat (faq)", 'POST', '/api/chat', json={"message": random.choice(FAQ_QUESTIONS)})
+    await user.pause()
+    # Tokens unique per user and iteration, so the question is neither an FAQ nor a cached answer
+    novel = f"compare u{id(user) % 100000}x{user.iteration} against zq{random.randrange(10 ** 6)}"
+    await user.request("POST /api/chat (novel)", 'POST', '/api/chat', json={"message": novel})
+
+
+SCENARIOS = {'landing': landing, 'digest': digest, 'onboarding': onboarding, 'chat': chat}
+
+
+def parse_mix(spec):
+    mix = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, weight = item.partition('=')
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}' (available: {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def run_user(base_url, stats, mix, think, deadline, timeout):
+    names, weights = list(mix), list(mix.values())
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, follow_redirects=False) as client:
+        user = User(client, stats, think)
+        await asyncio.sleep(random.uniform(0, think or 0.1))
+        while time.monotonic() < deadline:
+            scenario = random.choices(names, weights)[0]
+            user.iteration += 1
+            try:
+                await SCENARIOS[scenario](user)
+            except StepFailed:
+                pass
+            except Exception as e:
+                stats.record(f"{scenario} (client error)", 0.0, f"{type(e).__name__}: {e}")
+            await user.pause()
+
+
+def process_tree_rss(pid):
+    """Resident memory in bytes of a process and its descendants, or None if it can't be read"""
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            return sum(p.memory_info().rss for p in [process] + process.children(recursive=True))
+        except psutil.Error:
+            return None
+    if not os.path.isdir('/proc'):
+        return None
+    parents = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    parents[int(entry)] = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+    tree, frontier = set(), [pid]
+    while frontier:
+        current = frontier.pop()
+        tree.add(current)
+        frontier.extend(child for child, parent in parents.items() if parent == current and child not in tree)
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    for member in tree:
+        try:
+            with open(f'/proc/{member}/statm') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            if member == pid:
+                return None
+    return total
+
+
+def rss_slope(samples):
+    """Least-squares RSS growth in MB/hour over (elapsed seconds, bytes) samples"""
+    if len(samples) < 3:
+        return None
+    xs = [t for t, _ in samples]
+    ys = [rss / 1e6 for _, rss in samples]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    if not spread:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread * 3600
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def launch(mode, server, model_delay, workdir, log):
+    """Start the app (and the fake Gemini API for fake-live) in workdir; returns (base URL, fake API URL, processes)"""
+    for name in ('data', 'templates', 'static'):
+        shutil.copytree(os.path.join(ROOT, name), os.path.join(workdir, name))
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), GEMINI_API_KEY=os.environ.get('GEMINI_API_KEY') or 'soak',
+               PYTHONPATH=ROOT, PYTHONUNBUFFERED='1', DEMO_MODE='true' if mode == 'demo' else 'false')
+    env.pop('GEMINI_FREE_API_KEY', None)
+    processes = []
+    fake_url = None
+    if mode == 'fake-live':
+        fake_port = free_port()
+        processes.append(subprocess.Popen(
+            [sys.executable, '-m', 'benchmarks.fake_gemini', '--port', str(fake_port), '--delay', str(model_delay),
+             '--jitter', str(model_delay / 2)], cwd=ROOT, stdout=log, stderr=subprocess.STDOUT))
+        fake_url = env['GOOGLE_GEMINI_BASE_URL'] = f"http://127.0.0.1:{fake_port}"
+    script = 'serve.py' if server == 'serve' else 'asgi.py'
+    processes.append(subprocess.Popen([sys.executable, os.path.join(ROOT, script)], cwd=workdir, env=env,
+                                      stdout=log, stderr=subprocess.STDOUT))
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        try:
+            urllib.request.urlopen(base_url + '/', timeout=2).read()
+            return base_url, fake_url, processes
+        except OSError:
+            if processes[-1].poll() is not None:
+                break
+            time.sleep(0.1)
+    stop(processes)
+    raise SystemExit(f"{script} did not start; see {log.name}")
+
+
+def stop(processes):
+    for process in reversed(processes):
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def print_interval(elapsed, seconds, latencies, errors, rss):
+    total = len(latencies)
+    memory = f"  rss {rss / 1e6:7.1f} MB" if rss is not None else ""
+    print(f"[{elapsed:7.0f}s] {total / seconds:7.1f} req/s  p50 {percentile(latencies, 50) * 1000:7.1f}ms  "
+          f"p95 {percentile(latencies, 95) * 1000:7.1f}ms  p99 {percentile(latencies, 99) * 1000:7.1f}ms  "
+          f"errors {errors / total if total else 0.0:6.2%}{memory}", flush=True)
+
+
+def summarize(stats, seconds):
+    rows = {}
+    for step, entry in sorted(stats.steps.items()):
+        latencies = sorted(entry["latencies"])
+        rows[step] = {
+            "requests": len(latencies),
+            "rps": len(latencies) / seconds,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+            "errors": entry["errors"],
+        }
+    return rows
+
+
+async def soak(base_url, pid, args, mix):
+    stats = Stats()
+    start = time.monotonic()
+    deadline = start + args.duration
+    users = [asyncio.create_task(run_user(base_url, stats, mix, args.think, deadline, args.timeout))
+             for _ in range(args.users)]
+    rss_samples = []
+    last_report = start
+    while not all(user.done() for user in users):
+        await asyncio.sleep(min(args.sample_every, args.report_every))
+        now = time.monotonic()
+        rss = process_tree_rss(pid) if pid else None
+        if rss is not None:
+            rss_samples.append((now - start, rss))
+        if now - last_report >= args.report_every or all(user.done() for user in users):
+            latencies, errors = stats.take_interval()
+            print_interval(now - start, now - last_report, latencies, errors, rss)
+            last_report = now
+    await asyncio.gather(*users)
+    return stats, time.monotonic() - start, rss_samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CompetitiveRadar scenario load / soak test")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--url', help="Base URL of a running server")
+    target.add_argument('--launch', choices=['demo', 'fake-live'], help="Start the app in a temp copy")
+    parser.add_argument('--server', choices=['serve', 'asgi'], default='serve', help="With --launch: serve.py or asgi.py")
+    parser.add_argument('--pid', type=int, help="With --url: server process to sample RSS from")
+    parser.add_argument('--model-delay', type=float, default=0.8, help="fake-live: seconds per model call")
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=60.0, help="Seconds (3600 for an hour-long soak)")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"Scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument('--think', type=float, default=0.5, help="Mean seconds between a user's steps")
+    parser.add_argument('--timeout', type=float, default=120.0, help="Per-request timeout")
+    parser.add_argument('--report-every', type=float, default=10.0)
+    parser.add_argument('--sample-every', type=float, default=5.0, help="RSS sampling interval")
+    parser.add_argument('--warmup', type=float, default=None, help="Seconds left out of the RSS trend (default 20%%)")
+    parser.add_argument('--max-error-rate', type=float, default=None)
+    parser.add_argument('--max-rss-growth', type=float, default=None, help="MB/hour")
+    parser.add_argument('--json', help="Write the results to this file")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    random.seed(args.seed)
+
+    workdir = log = fake_url = None
+    processes = []
+    if args.launch:
+        workdir = tempfile.mkdtemp(prefix="cr-soak-")
+        log = open(os.path.join(workdir, 'server.log'), 'w')
+        base_url, fake_url, processes = launch(args.launch, args.server, args.model_delay, workdir, log)
+        pid = processes[-1].pid
+        label = f"{args.launch} ({args.server}.py)"
+    else:
+        base_url, pid, label = args.url.rstrip('/'), args.pid, args.url
+    print(f"{label}: {args.users} users for {args.duration:.0f}s, mix {args.mix}, think {args.think}s\n", flush=True)
+
+    try:
+        stats, seconds, rss_samples = asyncio.run(soak(base_url, pid, args, mix))
+        fake_stats = None
+        if fake_url:
+            with urllib.request.urlopen(f"{fake_url}/stats", timeout=5) as response:
+                fake_stats = json.load(response)
+    finally:
+        stop(processes)
+        if log:
+            log.close()
+
+    rows = summarize(stats, seconds)
+    print(f"\n{'step':<40} {'req':>7} {'req/s':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'errors':>7}")
+    for step, row in rows.items():
+        print(f"{step:<40} {row['requests']:>7} {row['rps']:>7.2f} {row['p50_ms']:>7.1f}ms {row['p95_ms']:>7.1f}ms "
+              f"{row['p99_ms']:>7.1f}ms {row['max_ms']:>7.1f}ms {row['errors'] / row['requests']:>7.1%}")
+    requests = sum(row['requests'] for row in rows.values())
+    errors = sum(row['errors'] for row in rows.values())
+    error_rate = errors / requests if requests else 0.0
+    print(f"\n{requests} requests in {seconds:.0f}s ({requests / seconds:.1f} req/s), {errors} errors ({error_rate:.2%})")
+    for step, sample in stats.error_samples.items():
+        print(f"   first error on {step}: {sample[:120]}")
+
+    warmup = args.warmup if args.warmup is not None else seconds * 0.2
+    steady = [sample for sample in rss_samples if sample[0] >= warmup]
+    slope = rss_slope(steady)
+    if rss_samples:
+        print(f"Server RSS: {rss_samples[0][1] / 1e6:.1f} MB at start, {rss_samples[-1][1] / 1e6:.1f} MB at end, "
+              f"peak {max(rss for _, rss in rss_samples) / 1e6:.1f} MB"
+              + (f"; {slope:+.1f} MB/hour after {warmup:.0f}s warm-up" if slope is not None else ""))
+    if fake_stats:
+        print("Model calls: " + ", ".join(f"{kind} {entry['calls']}" for kind, entry in sorted(fake_stats.items())))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"target": label, "users": args.users, "duration_s": seconds, "mix": mix, "steps": rows,
+                       "requests": requests, "errors": errors, "error_rate": error_rate,
+                       "rss_samples": rss_samples, "rss_growth_mb_per_hour": slope, "model_calls": fake_stats}, f, indent=2)
+    if workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    failed = []
+    if args.max_error_rate is not None and error_rate > args.max_error_rate:
+        failed.append(f"error rate {error_rate:.2%} > {args.max_error_rate:.2%}")
+    if args.max_rss_growth is not None and slope is not None and slope > args.max_rss_growth:
+        failed.append(f"RSS growth {slope:+.1f} MB/hour > {args.max_rss_growth} MB/hour")
+    if failed:
+        print("FAILED: " + "; ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Thundering-herd check for request coalescing.
+
+    python -m benchmarks.thundering_herd --requests 50
+
+Runs in a temp copy of the app's working files. N threads release at once against:
+  1. /api/digest with no weekly_digest.md on disk (pipeline slowed by --pipeline-delay seconds)
+  2. /api/competitors/discover with identical payloads (a stand-in Gemini client that sleeps
+     --model-delay seconds and counts calls)
+and reports how many pipeline runs / model calls they caused. With single flight both should be 1.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class CountingClient:
+    """Stand-in for genai.Client that answers discovery prompts after a delay"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.models = self
+
+    def generate_content(self, model, contents, config):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return _Response(json.dumps([{"name": "Notion", "category": "Direct Competitor",
+                                      "description": "Docs and wikis", "differentiator": "Blocks"}]))
+
+
+def herd(count, func):
+    """Run func from `count` threads released together; returns (results, seconds)"""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(i):
+        barrier.wait()
+        results[i] = func()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent duplicate request coalescing check")
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--pipeline-delay', type=float, default=1.0)
+    parser.add_argument('--model-delay', type=float, default=0.5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="cr-herd-")
+    for name in ('data', 'templates', 'static'):
+        shutil.copytree(os.path.join(ROOT, name), os.path.join(workdir, name))
+    os.chdir(workdir)
+    os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+    os.environ['SCHEDULER_ENABLED'] = 'false'
+    sys.path.insert(0, ROOT)
+    import app as app_module
+
+    runs = {"count": 0}
+    run_analysis = app_module.run_analysis
+
+    def slow_analysis():
+        runs["count"] += 1
+        time.sleep(args.pipeline_delay)
+        return run_analysis()
+
+    app_module.run_analysis = slow_analysis
+    client = CountingClient(args.model_delay)
+    app_module._gemini_client = client
+    flask_app = app_module.app
+
+    def get_digest():
+        return flask_app.test_client().get('/api/digest').status_code
+
+    def discover():
+        response = flask_app.test_client().post('/api/competitors/discover', json={
+            "startup_type": "b2b-saas", "description": "AI workspace for product teams"})
+        return response.status_code
+
+    try:
+        statuses, seconds = herd(args.requests, get_digest)
+        print(f"/api/digest:                {args.requests} concurrent requests -> {runs['count']} pipeline run(s), "
+              f"{statuses.count(200)} x 200 in {seconds:.2f}s")
+        statuses, seconds = herd(args.requests, discover)
+        print(f"/api/competitors/discover:  {args.requests} identical requests  -> {client.calls} model call(s), "
+              f"{statuses.count(200)} x 200 in {seconds:.2f}s")
+        print(f"single-flight stats: analysis {app_module.analysis_flight.stats()}, "
+              f"discovery {app_module.discovery_flight.stats()}")
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
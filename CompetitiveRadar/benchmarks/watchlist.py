@@ -0,0 +1,55 @@
+"""
+Pipeline cost against watchlist size.
+
+    python -m benchmarks.watchlist --updates 200000 --competitors 200 --sizes 1 5 20 200
+
+Builds a synthetic feed spread evenly over N competitor names (with "AI" / ".com" spelling
+variants, as real feeds have), then for each watchlist size times the watchlist filter and the
+local stages on what is left. Without a watchlist the stages see the whole feed.
+"""
+import argparse
+import time
+
+import local_stages
+from benchmarks.local_stages import synthetic_feed
+from watchlist import Watchlist
+
+SPELLINGS = ['{}', '{} AI', '{}.com', '{} Inc']
+
+
+def competitor_names(count):
+    return [f"Competitor{i:04d}" for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline cost vs watchlist size")
+    parser.add_argument('--updates', type=int, default=200000)
+    parser.add_argument('--competitors', type=int, default=200)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 5, 20, 200])
+    args = parser.parse_args()
+
+    names = competitor_names(args.competitors)
+    feed = synthetic_feed(args.updates)
+    for i, update in enumerate(feed):
+        update['competitor'] = SPELLINGS[i // len(names) % len(SPELLINGS)].format(names[i % len(names)])
+    print(f"{len(feed):,} updates over {len(names)} competitors\n")
+
+    start = time.perf_counter()
+    local_stages.run_local_stages(feed, workers=1)
+    full = time.perf_counter() - start
+    print(f"{'no watchlist':<16} {len(feed):>9,} updates  filter    0.0 ms  stages {full * 1000:>8.1f} ms")
+
+    for size in sorted(set(args.sizes)):
+        watchlist = Watchlist({name: [] for name in names[:size]})
+        start = time.perf_counter()
+        tracked = watchlist.filter(feed)
+        filtered = time.perf_counter() - start
+        start = time.perf_counter()
+        local_stages.run_local_stages(tracked, workers=1)
+        stages = time.perf_counter() - start
+        print(f"{size:>4} tracked      {len(tracked):>9,} updates  filter {filtered * 1000:>6.1f} ms  "
+              f"stages {stages * 1000:>8.1f} ms  ({(filtered + stages) / full:.1%} of full)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+"""
+Local retrieval layer for the CompetitiveRadar chatbot.
+A BM25-scored FAQ index answers high-confidence questions instantly and a
+normalized-question cache replays earlier answers; only novel questions reach Gemini.
+"""
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+CHAT_CACHE_SIZE = int(os.environ.get('CHAT_CACHE_SIZE', 1024))
+CHAT_CACHE_TTL = int(os.environ.get('CHAT_CACHE_TTL', 24 * 3600))
+# Minimum BM25 score, and lead over the runner-up, for answering without the model
+CHAT_LOCAL_MIN_SCORE = float(os.environ.get('CHAT_LOCAL_MIN_SCORE', 2.0))
+CHAT_LOCAL_MIN_MARGIN = float(os.environ.get('CHAT_LOCAL_MIN_MARGIN', 1.5))
+
+CHAT_SYSTEM_INSTRUCTION = """You are a helpful assistant for CompetitiveRadar, an AI-powered competitor intelligence platform for startup founders.
+
+KEY INFORMATION:
+- CompetitiveRadar transforms 3-5 hours of competitor tracking into 30-second actionable insights
+- Uses 4 specialized AI agents: Research, Categorization, Prioritization, and Summarization
+- Pricing: Starter ($49/mo), Growth ($149/mo), Enterprise (custom)
+- Free trial available with no credit card required
+- Powered by Google Gemini AI (free tier available)
+- Key features: Multi-agent analysis, automated digest generation, actionable insights
+
+Answer questions concisely and professionally. If asked about getting started, guide them to the sign-up page. Keep responses under 100 words."""
+
+DEFAULT_RESPONSE = "I can help you with: how CompetitiveRadar works, pricing plans, getting started, features, or trying the demo. What would you like to know?"
+
+FAQ_ENTRIES = [
+    {
+        "id": "pricing",
+        "questions": ["How much does it cost?", "What are your pricing plans?", "What is the price of each plan?",
+                      "How much is the Growth plan?", "Is there an enterprise plan?", "pricing cost plan price"],
+        "answer": "CompetitiveRadar offers 3 plans: Starter ($49/mo) for solo founders, Growth ($149/mo) for growing teams, and Enterprise (custom pricing) for large organizations. All plans include a 14-day free trial with no credit card required!",
+    },
+    {
+        "id": "how_it_works",
+        "questions": ["How does CompetitiveRadar work?", "How does it work?", "What is the process?",
+                      "What happens to competitor updates?", "how work process"],
+        "answer": "CompetitiveRadar uses 4 AI agents: 1) Research Agent extracts key details from competitor updates, 2) Categorization Agent tags updates (Product/Pricing/Marketing), 3) Prioritization Agent scores impact 1-10, 4) Summarization Agent creates actionable weekly digests. It transforms hours of manual work into 30-second insights!",
+    },
+    {
+        "id": "get_started",
+        "questions": ["How do I get started?", "How do I sign up?", "Is there a free trial?", "How do I begin my trial?",
+                      "Do I need a credit card for the trial?", "start begin signup sign up trial"],
+        "answer": "Getting started is easy! Click 'Get Started' in the navigation to begin your 14-day free trial. No credit card required. You'll be analyzing competitor updates in minutes!",
+    },
+    {
+        "id": "features",
+        "questions": ["What features do you have?", "What can CompetitiveRadar do?", "What are the key capabilities?",
+                      "feature capability can do"],
+        "answer": "Key features include: Multi-agent AI analysis, automated competitor tracking, priority scoring, category classification, beautiful Markdown digests, and actionable founder takeaways. All powered by Google Gemini AI!",
+    },
+    {
+        "id": "agents",
+        "questions": ["What AI agents do you use?", "Which agents are there?", "What does each agent do?",
+                      "What AI model powers it?", "Do you use Gemini?", "agent ai"],
+        "answer": "We use 4 specialized AI agents powered by Google Gemini: Research Agent (extracts insights), Categorization Agent (tags updates), Prioritization Agent (scores impact), and Summarization Agent (creates digests). They work together to give you actionable intelligence!",
+    },
+    {
+        "id": "demo",
+        "questions": ["Can I try a demo?", "Where is the demo?", "How do I test it?", "Can I see it in action?",
+                      "demo try test"],
+        "answer": "Try our live demo! Click 'Demo' in the navigation to see all 4 AI agents in action. Watch how we transform scattered competitor updates into a concise, actionable digest in under 30 seconds!",
+    },
+    {
+        "id": "time_saved",
+        "questions": ["How much time does it save?", "How long does tracking take?", "Why should I use it?",
+                      "time saved hours week"],
+        "answer": "Founders typically spend 3-5 hours a week tracking competitors by hand. CompetitiveRadar turns that into a 30-second digest with the top 3 prioritized updates and a clear Founder Takeaway.",
+    },
+]
+
+STOPWORDS = {
+    'a', 'an', 'the', 'is', 'are', 'do', 'does', 'i', 'you', 'your', 'we', 'it', 'to', 'of', 'for',
+    'and', 'or', 'in', 'on', 'me', 'my', 'can', 'there', 'what', 'which', 'where', 'how', 'much',
+    'this', 'that', 'with', 'be', 'about', 'tell', 'please', 'any', 'each', 'need',
+}
+# Question words carry intent ("how" much / "how" does it work), so they are kept in cache keys
+CACHE_KEY_STOPWORDS = STOPWORDS - {'how', 'what', 'where', 'much', 'can'}
+
+_TOKEN_RE = re.compile(r"[a-z0-9$]+")
+
+
+def _stem(token):
+    for suffix in ('ing', 'es', 's'):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text, stopwords=STOPWORDS):
+    """Lowercase word tokens with stopwords removed and a light suffix stem"""
+    return [_stem(t) for t in _TOKEN_RE.findall(text.lower()) if t not in stopwords]
+
+
+def normalize_question(text):
+    """Cache key: order-insensitive bag of stemmed content words"""
+    return " ".join(sorted(set(tokenize(text, CACHE_KEY_STOPWORDS))))
+
+
+class BM25Index:
+    """Okapi BM25 over FAQ entries; each entry's question variants form one document"""
+
+    def __init__(self, entries, k1=1.5, b=0.75):
+        self.entries = entries
+        self.k1 = k1
+        self.b = b
+        self.doc_terms = [Counter(tokenize(" ".join(e['questions']))) for e in entries]
+        self.doc_lengths = [sum(terms.values()) for terms in self.doc_terms]
+        self.avg_length = sum(self.doc_lengths) / len(self.doc_lengths) if entries else 0.0
+        doc_freq = Counter(term for terms in self.doc_terms for term in terms)
+        n = len(entries)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    def search(self, query):
+        """Return [(score, entry)] sorted best first"""
+        terms = tokenize(query)
+        results = []
+        for entry, doc, length in zip(self.entries, self.doc_terms, self.doc_lengths):
+            score = 0.0
+            for term in terms:
+                tf = doc.get(term)
+                if tf:
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / self.avg_length)
+                    score += self.idf[term] * tf * (self.k1 + 1) / norm
+            results.append((score, entry))
+        results.sort(key=lambda r: r[0], reverse=True)
+        return results
+
+
+class ResponseCache:
+    """Thread-safe LRU of normalized question -> answer with a TTL"""
+
+    def __init__(self, max_size=CHAT_CACHE_SIZE, ttl=CHAT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            stored_at, value = item
+            if time.monotonic() - stored_at > self.ttl:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = (time.monotonic(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+
+INDEX = BM25Index(FAQ_ENTRIES)
+CACHE = ResponseCache()
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(source):
+    with _stats_lock:
+        _stats['total'] += 1
+        _stats[source] += 1
+
+
+def answer_locally(message):
+    """
+    Answer from the cache or a high-confidence FAQ match.
+    Returns (response, source) or (None, None) when the question should go to the model.
+    """
+    key = normalize_question(message)
+    cached = CACHE.get(key) if key else None
+    if cached is not None:
+        _count('cache')
+        return cached, 'cache'
+
+    results = INDEX.search(message)
+    best_score, best_entry = results[0]
+    runner_up = results[1][0] if len(results) > 1 else 0.0
+    if best_score >= CHAT_LOCAL_MIN_SCORE and best_score >= runner_up * CHAT_LOCAL_MIN_MARGIN:
+        CACHE.set(key, best_entry['answer'])
+        _count('faq')
+        return best_entry['answer'], 'faq'
+    return None, None
+
+
+def remember(message, response):
+    """Cache a model answer so the same question is answered locally next time"""
+    key = normalize_question(message)
+    if key:
+        CACHE.set(key, response)
+    _count('model')
+
+
+def fallback_answer(message):
+    """Best FAQ match at any positive score when the model is unavailable"""
+    _count('fallback')
+    best_score, best_entry = INDEX.search(message)[0]
+    return best_entry['answer'] if best_score > 0 else DEFAULT_RESPONSE
+
+
+def chat_stats():
+    """Hit-rate metrics for the chat endpoint"""
+    with _stats_lock:
+        stats = dict(_stats)
+    total = stats.get('total', 0)
+    local = stats.get('cache', 0) + stats.get('faq', 0)
+    return {
+        "total": total,
+        "cache_hits": stats.get('cache', 0),
+        "faq_answers": stats.get('faq', 0),
+        "model_calls": stats.get('model', 0),
+        "fallbacks": stats.get('fallback', 0),
+        "local_hit_rate": round(local / total, 3) if total else 0.0,
+        "cache_size": len(CACHE),
+    }
@@ -0,0 +1,152 @@
+"""
+Resumable pipeline checkpoints for CompetitiveRadar.
+Each agent stage appends its per-update results to a compact JSONL file as they complete,
+so a failed live run can be resumed without repeating finished Gemini calls.
+
+Layout: <CHECKPOINT_DIR>/<run_id>/input.jsonl, meta.json, research.jsonl, categorize.jsonl, prioritize.jsonl
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from storage import FileLock
+
+CHECKPOINT_DIR = os.environ.get('CHECKPOINT_DIR', '.checkpoints')
+# Unfinished runs untouched for longer than this are deleted; only the newest CHECKPOINT_KEEP are kept
+CHECKPOINT_MAX_AGE_DAYS = float(os.environ.get('CHECKPOINT_MAX_AGE_DAYS', '7'))
+CHECKPOINT_KEEP = int(os.environ.get('CHECKPOINT_KEEP', '5'))
+
+STAGES = ['research', 'categorize', 'prioritize']
+
+
+def is_fatal_api_error(error):
+    """Quota / rate-limit errors will fail every remaining call, so the stage should stop and be resumed later"""
+    text = str(error)
+    return '429' in text or 'RESOURCE_EXHAUSTED' in text or 'quota' in text.lower()
+
+
+class PipelineCheckpoint:
+    """Append-only per-stage JSONL checkpoint for one pipeline run"""
+
+    def __init__(self, run_id=None, directory=CHECKPOINT_DIR):
+        self.run_id = run_id or datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        self.path = os.path.join(directory, self.run_id)
+        self._lock = threading.Lock()
+        self._claim = None
+        os.makedirs(self.path, exist_ok=True)
+
+    def _stage_file(self, stage):
+        return os.path.join(self.path, f"{stage}.jsonl")
+
+    def save_input(self, competitor_updates):
+        """Snapshot the input feed so a resume sees exactly the same updates"""
+        if not os.path.exists(self._stage_file('input')):
+            with open(self._stage_file('input'), 'w') as f:
+                for update in competitor_updates:
+                    f.write(json.dumps(update, separators=(',', ':')) + "\n")
+
+    def load_input(self):
+        return list(self.completed('input').values())
+
+    def save_meta(self, **meta):
+        """How the run was started (incremental or full, source marks to commit), for a resume"""
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(meta, f, separators=(',', ':'))
+
+    def load_meta(self):
+        try:
+            with open(os.path.join(self.path, 'meta.json'), 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def matches_input(self, competitor_updates):
+        """True if the saved input is exactly this feed, so the run can be resumed instead of restarted"""
+        saved = self.load_input()
+        if len(saved) != len(competitor_updates):
+            return False
+        canonical = lambda updates: sorted(json.dumps(u, sort_keys=True, default=str) for u in updates)
+        return canonical(saved) == canonical(competitor_updates)
+
+    def claim(self):
+        """Lock the run for this process; False if another process is already running or resuming it"""
+        if self._claim is None:
+            lock = FileLock('claim', self.path)
+            try:
+                if not lock.acquire():
+                    return False
+            except FileNotFoundError:
+                return False  # finished (deleted) meanwhile
+            self._claim = lock
+        return True
+
+    def release(self):
+        """Give up the claim without finishing (the run failed and stays resumable)"""
+        if self._claim is not None:
+            self._claim.release()
+            self._claim = None
+
+    def last_modified(self):
+        try:
+            return max(os.path.getmtime(os.path.join(self.path, name)) for name in os.listdir(self.path))
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def record(self, stage, record):
+        """Append one finished update; flushed immediately so a crash loses at most this line"""
+        line = json.dumps(record, separators=(',', ':')) + "\n"
+        with self._lock:
+            with open(self._stage_file(stage), 'a') as f:
+                f.write(line)
+                f.flush()
+
+    def completed(self, stage):
+        """Finished records for a stage keyed by str(update id); ignores a torn trailing line"""
+        records = {}
+        try:
+            with open(self._stage_file(stage), 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    records[str(record['id'])] = record
+        except FileNotFoundError:
+            pass
+        return records
+
+    def progress(self):
+        """Completed update count per stage"""
+        return {stage: len(self.completed(stage)) for stage in ['input'] + STAGES}
+
+    def finish(self):
+        """Run completed successfully; checkpoints are no longer needed"""
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.release()
+
+    @classmethod
+    def latest(cls, directory=CHECKPOINT_DIR):
+        """Most recent unfinished run, or None"""
+        if not os.path.isdir(directory):
+            return None
+        runs = sorted(d for d in os.listdir(directory) if os.path.isdir(os.path.join(directory, d)))
+        return cls(runs[-1], directory) if runs else None
+
+    @classmethod
+    def prune(cls, directory=CHECKPOINT_DIR, max_age_days=CHECKPOINT_MAX_AGE_DAYS, keep=CHECKPOINT_KEEP):
+        """Delete stale unfinished runs: older than max_age_days, or beyond the newest keep. Claimed runs are skipped"""
+        if not os.path.isdir(directory):
+            return 0
+        runs = sorted(d for d in os.listdir(directory) if os.path.isdir(os.path.join(directory, d)))
+        cutoff = time.time() - max_age_days * 86400
+        pruned = 0
+        for index, run_id in enumerate(reversed(runs)):
+            checkpoint = cls(run_id, directory)
+            if index < keep and checkpoint.last_modified() >= cutoff:
+                continue
+            if checkpoint.claim():
+                checkpoint.finish()
+                pruned += 1
+        return pruned
@@ -0,0 +1,77 @@
+"""
+Digest diff for CompetitiveRadar.
+Each digest leaves a sidecar next to it (weekly_digest.json) with the id, content hash and
+priority score of every update in the scored set it was built from, and of every update a digest
+has reported (as it was when reported). With the diff on, the next digest only considers updates
+that have not been reported yet, or whose content changed or that were re-scored since they were,
+so an unchanged high-impact item does not take a top slot week after week, an item that just
+missed the top 3 stays in the running, and the summarizer gets a smaller prompt.
+"""
+import hashlib
+import os
+from datetime import datetime
+from storage import read_json, write_json_atomic
+
+# On-demand digests (run_analysis, /api/digest); the scheduled digest uses SCHEDULE_DIGEST_DIFF
+DIGEST_DIFF = os.environ.get('DIGEST_DIFF', 'false').lower() == 'true'
+
+# Feed fields that make up an update's content; derived fields (insights, categories) are not
+# stable across live runs and would make every update look changed
+CONTENT_FIELDS = ['competitor', 'update', 'date', 'source', 'url']
+
+
+def index_path(digest_path):
+    return f"{os.path.splitext(digest_path)[0]}.json"
+
+
+def content_hash(update):
+    """Hash of an update's feed content (the text before the research agent rewrote it)"""
+    parts = [str(update.get('original_update') or update.get(field) or '') if field == 'update'
+             else str(update.get(field) or '') for field in CONTENT_FIELDS]
+    return hashlib.sha1("\x1f".join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def load_index(digest_path):
+    """The previous digest's sidecar, or None if no digest has recorded one yet"""
+    return read_json(index_path(digest_path), None)
+
+
+def reported_updates(index):
+    """{id: [content hash, score]} of every update reported by the digests up to `index`"""
+    return (index or {}).get('reported', {})
+
+
+def save_index(digest_path, scored_updates, top_updates):
+    """Record the scored set and add this digest's top updates to those reported so far"""
+    current = {str(u['id']): [content_hash(u), u.get('priority_score')] for u in scored_updates}
+    # Updates that dropped out of the scored set are forgotten, which keeps the sidecar bounded
+    reported = {key: state for key, state in reported_updates(load_index(digest_path)).items() if key in current}
+    reported.update((str(u['id']), current[str(u['id'])]) for u in top_updates)
+    write_json_atomic(index_path(digest_path), {
+        "generated_at": datetime.now().isoformat(timespec='seconds'),
+        "updates": current,
+        "reported": reported,
+    })
+
+
+def diff_updates(scored_updates, index):
+    """
+    Updates not reported yet, or changed or re-scored since they were, in their scored order,
+    each copied with a `digest_change` note. Everything is new when there is no index.
+    """
+    previous = (index or {}).get('updates', {})
+    reported = reported_updates(index)
+    changed = []
+    for update in scored_updates:
+        key = str(update['id'])
+        seen = reported.get(key)
+        if seen is None:
+            note = "Not reported yet" if key in previous else "New"
+        elif seen[0] != content_hash(update):
+            note = "Updated"
+        elif seen[1] != update.get('priority_score'):
+            note = f"Re-scored {seen[1]} → {update.get('priority_score')}"
+        else:
+            continue
+        changed.append({**update, "digest_change": note})
+    return changed
@@ -0,0 +1,116 @@
+"""
+Digest rendering engine for CompetitiveRadar.
+Turns scored updates into markdown/HTML from precompiled Jinja templates in one pass,
+with an optional background "LLM polish" that swaps in the Gemini-written analysis.
+"""
+import os
+import re
+import threading
+from datetime import datetime
+import markdown
+from jinja2 import Environment, FileSystemLoader, StrictUndefined
+from lifecycle import tracked
+
+# 'async' renders instantly and polishes in the background, 'sync' blocks on the LLM, 'off' skips it
+DIGEST_POLISH_MODE = os.environ.get('DIGEST_POLISH_MODE', 'async').lower()
+
+_env = Environment(
+    loader=FileSystemLoader(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'digest')),
+    trim_blocks=True,
+    lstrip_blocks=True,
+    keep_trailing_newline=True,
+    undefined=StrictUndefined,
+)
+
+# Compiled once at import; rendering is a plain function call afterwards
+WEEKLY_TEMPLATE = _env.get_template('weekly.md.j2')
+PERSONALIZED_TEMPLATE = _env.get_template('personalized.md.j2')
+
+MARKDOWN_EXTENSIONS = ['extra', 'nl2br']
+_markdown_local = threading.local()
+
+
+_SECTION_MARKER_RE = re.compile(r"\n*<!-- /?section:\w+ -->\n*")
+
+
+def _section_pattern(name):
+    return re.compile(rf"(<!-- section:{name} -->\n).*?(\n<!-- /section:{name} -->)", re.DOTALL)
+
+
+def strip_section_markers(digest_markdown):
+    """Digest as stored and served: the section markers only matter to the polish step"""
+    return _SECTION_MARKER_RE.sub("\n\n", digest_markdown)
+
+
+def render_weekly_digest(top_updates, founder_persona="Tech Startup Founder", since=None):
+    """Render the weekly digest markdown from prioritized updates (since: date of the digest they were diffed against)"""
+    return WEEKLY_TEMPLATE.render(
+        updates=top_updates,
+        founder_persona=founder_persona,
+        current_date=datetime.now().strftime("%B %d, %Y"),
+        since=since,
+    )
+
+
+def render_personalized_digest(selected_competitors, startup_description, updates=()):
+    """Render the onboarding digest for the founder's selected competitors and their latest scored updates"""
+    return PERSONALIZED_TEMPLATE.render(
+        competitors=selected_competitors[:3],
+        updates=updates,
+        startup_description=startup_description,
+        current_date=datetime.now().strftime("%B %d, %Y"),
+    )
+
+
+def render_html(digest_markdown):
+    """Convert digest markdown to HTML, reusing one Markdown instance per thread"""
+    converter = getattr(_markdown_local, 'converter', None)
+    if converter is None:
+        converter = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+        _markdown_local.converter = converter
+    return converter.reset().convert(digest_markdown)
+
+
+def replace_section(digest_markdown, name, content):
+    """Replace the body of a marked template section, keeping the markers for later passes"""
+    return _section_pattern(name).sub(lambda m: m.group(1) + "\n" + content.strip() + "\n" + m.group(2), digest_markdown, count=1)
+
+
+def _write_if_unchanged(path, expected, new_content):
+    """Swap in the polished digest unless a newer run has already replaced the file"""
+    try:
+        with open(path, 'r') as f:
+            if f.read() != expected:
+                return False
+    except FileNotFoundError:
+        return False
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(new_content)
+    os.replace(tmp_path, path)
+    return True
+
+
+def polish_digest(digest_markdown, top_updates):
+    """Blocking LLM polish: replaces the templated analysis with the summarization model's write-up"""
+    from agents.summarize_agent import generate_digest_content
+    return replace_section(digest_markdown, 'analysis', generate_digest_content(top_updates))
+
+
+def start_digest_polish(digest_markdown, top_updates, output_path):
+    """
+    Polish the digest (with its section markers) on a background thread and rewrite output_path,
+    which holds the unmarked digest, when the LLM is done
+    """
+    @tracked
+    def run():
+        try:
+            polished = polish_digest(digest_markdown, top_updates)
+            if _write_if_unchanged(output_path, strip_section_markers(digest_markdown), strip_section_markers(polished)):
+                print("Summarization Agent: LLM polish applied to digest")
+        except Exception as e:
+            print(f"Digest polish skipped: {str(e)[:100]}")
+
+    thread = threading.Thread(target=run, name="digest-polish", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Bulk export of the analysed update set (research → categorize → prioritize output).
+
+    python export.py --format csv --min-score 7 -o updates.csv
+    GET /api/export?format=parquet&competitor=Notion&since=2025-10-01
+
+Rows are read one at a time from .state/scored_updates.json and written in batches of
+EXPORT_BATCH_ROWS, so an export holds one batch in memory whatever the size of the set:
+  - jsonl    one JSON object per line, nested fields kept as they are
+  - csv      header + rows; lists and objects are JSON-encoded
+  - parquet  one row group per batch (needs pyarrow)
+  - arrow    Arrow IPC stream, one record batch per batch (needs pyarrow)
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from storage import SCORED_UPDATES_FILE, iter_json_array, state_path
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; only the parquet and arrow formats need it
+    pa = pq = None
+
+EXPORT_BATCH_ROWS = int(os.environ.get('EXPORT_BATCH_ROWS', 5000))
+
+EXPORT_FIELDS = [
+    'id', 'date', 'competitor', 'competitor_category', 'category', 'category_confidence',
+    'priority_score', 'impact_score', 'urgency_level', 'impact_areas', 'strategic_implication',
+    'source', 'source_type', 'url', 'update', 'original_update', 'analysis',
+]
+NUMERIC_FIELDS = {'category_confidence', 'priority_score', 'impact_score'}
+LIST_FIELDS = {'impact_areas'}
+
+FORMATS = {
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+ARROW_FORMATS = {'parquet', 'arrow'}
+
+
+def scored_updates_path():
+    return state_path(SCORED_UPDATES_FILE)
+
+
+def parse_filters(args):
+    """Export filters from request args / CLI options; raises ValueError on bad values"""
+    def number(name):
+        value = args.get(name)
+        try:
+            return float(value) if value not in (None, '') else None
+        except ValueError:
+            raise ValueError(f"{name} must be a number")
+
+    def names(name):
+        value = args.get(name)
+        return {part.strip().lower() for part in value.split(',') if part.strip()} if value else None
+
+    filters = {
+        'competitor': names('competitor'),
+        'category': names('category'),
+        'urgency': names('urgency'),
+        'min_score': number('min_score'),
+        'max_score': number('max_score'),
+        'since': args.get('since') or None,
+        'until': args.get('until') or None,
+        'limit': number('limit'),
+    }
+    fields = [field.strip() for field in (args.get('fields') or '').split(',') if field.strip()]
+    unknown = [field for field in fields if field not in EXPORT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} (available: {', '.join(EXPORT_FIELDS)})")
+    return filters, fields or list(EXPORT_FIELDS)
+
+
+def _matches(update, filters):
+    # Same coercion as the Arrow columns; a missing or non-numeric score fails any score bound
+    score = _arrow_value('priority_score', update.get('priority_score'))
+    date = str(update.get('date', ''))[:10]
+    for key, field in (('competitor', 'competitor'), ('category', 'category'), ('urgency', 'urgency_level')):
+        if filters[key] is not None and str(update.get(field, '')).lower() not in filters[key]:
+            return False
+    return not (
+        (filters['min_score'] is not None and (score is None or score < filters['min_score']))
+        or (filters['max_score'] is not None and (score is None or score > filters['max_score']))
+        or (filters['since'] and date < filters['since'])
+        or (filters['until'] and date > filters['until'])
+    )
+
+
+def iter_rows(filters, fields, path=None):
+    """Matching updates from the scored set, in its priority order, reduced to `fields`"""
+    path = path or scored_updates_path()
+    if not os.path.exists(path):
+        return
+    found = 0
+    for update in iter_json_array(path):
+        if filters['limit'] is not None and found >= filters['limit']:
+            return
+        if _matches(update, filters):
+            found += 1
+            yield {field: update.get(field) for field in fields}
+
+
+def _batches(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= EXPORT_BATCH_ROWS:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _jsonl(batches, fields):
+    for batch in batches:
+        yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in batch).encode('utf-8')
+
+
+def _csv_value(value):
+    return json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict)) else value
+
+
+def _csv(batches, fields):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(fields)
+    for batch in batches:
+        writer.writerows([_csv_value(row[field]) for field in fields] for row in batch)
+        yield out.getvalue().encode('utf-8')
+        out.seek(0)
+        out.truncate()
+    if out.tell():
+        yield out.getvalue().encode('utf-8')
+
+
+def arrow_schema(fields):
+    def arrow_type(field):
+        if field in NUMERIC_FIELDS:
+            return pa.float64()
+        if field in LIST_FIELDS:
+            return pa.list_(pa.string())
+        return pa.string()
+    return pa.schema([(field, arrow_type(field)) for field in fields])
+
+
+def _arrow_value(field, value):
+    if value is None:
+        return None
+    if field in NUMERIC_FIELDS:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    if field in LIST_FIELDS:
+        return [str(item) for item in value] if isinstance(value, list) else [str(value)]
+    return json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict)) else str(value)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last take()"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self):
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def _arrow(batches, fields, file_format):
+    schema = arrow_schema(fields)
+    sink = _ChunkSink()
+    if file_format == 'parquet':
+        writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_stream(pa.PythonFile(sink, mode='w'), schema)
+    for batch in batches:
+        columns = [pa.array([_arrow_value(field, row[field]) for row in batch], type=schema.field(field).type)
+                   for field in fields]
+        writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+        yield sink.take()
+    writer.close()
+    yield sink.take()
+
+
+def export_stream(file_format, filters, fields, path=None):
+    """Bytes of the export in chunks of about one batch; raises ValueError for formats that can't be served"""
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown format '{file_format}' (available: {', '.join(FORMATS)})")
+    if file_format in ARROW_FORMATS and pa is None:
+        raise ValueError(f"The {file_format} format needs pyarrow (pip install pyarrow)")
+    batches = _batches(iter_rows(filters, fields, path))
+    if file_format == 'jsonl':
+        return _jsonl(batches, fields)
+    if file_format == 'csv':
+        return _csv(batches, fields)
+    return _arrow(batches, fields, file_format)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the analysed competitor updates")
+    parser.add_argument('--format', choices=list(FORMATS), default='jsonl')
+    parser.add_argument('-o', '--output', help="Output file (default: stdout)")
+    parser.add_argument('--input', help=f"Scored set to export (default: {scored_updates_path()})")
+    parser.add_argument('--competitor', help="Comma-separated competitor names")
+    parser.add_argument('--category', help="Comma-separated categories (Product, Pricing, Marketing)")
+    parser.add_argument('--urgency', help="Comma-separated urgency levels")
+    parser.add_argument('--min-score', dest='min_score')
+    parser.add_argument('--max-score', dest='max_score')
+    parser.add_argument('--since', help="YYYY-MM-DD")
+    parser.add_argument('--until', help="YYYY-MM-DD")
+    parser.add_argument('--limit')
+    parser.add_argument('--fields', help="Comma-separated columns (default: all)")
+    args = parser.parse_args()
+
+    try:
+        filters, fields = parse_filters(vars(args))
+        chunks = export_stream(args.format, filters, fields, args.input)
+    except ValueError as e:
+        parser.error(str(e))
+    out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
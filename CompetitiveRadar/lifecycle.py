@@ -0,0 +1,51 @@
+"""
+Process lifecycle helpers for CompetitiveRadar.
+Tracks in-flight analyses and background digest work so servers can drain them on shutdown.
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+_inflight = threading.Condition()
+_inflight_count = 0
+
+
+@contextmanager
+def track_inflight():
+    """Mark a unit of work (pipeline run, digest polish) as in flight for its duration"""
+    global _inflight_count
+    with _inflight:
+        _inflight_count += 1
+    try:
+        yield
+    finally:
+        with _inflight:
+            _inflight_count -= 1
+            _inflight.notify_all()
+
+
+def tracked(fn):
+    """Decorator form of track_inflight()"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with track_inflight():
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def inflight_count():
+    with _inflight:
+        return _inflight_count
+
+
+def wait_for_inflight(timeout):
+    """Block until all tracked work finishes or timeout seconds pass; returns True if drained"""
+    deadline = time.monotonic() + timeout
+    with _inflight:
+        while _inflight_count > 0:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            _inflight.wait(remaining)
+    return True
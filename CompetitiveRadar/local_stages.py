@@ -0,0 +1,174 @@
+"""
+Local (no-LLM) research → categorization → scoring stages used in demo mode.
+Large feeds are split into chunks that are classified on a process pool. With the fork start
+method the workers inherit the feed copy-on-write and receive only (start, end) index pairs, so
+the input is never pickled. Results come back compact (one category byte per update plus the
+chunk's sorted index array) rather than as pickled dicts, which cost more to unpickle than to
+build; the parent merges the sorted chunks, which matches one stable sort, and builds the records.
+Forking is only safe from a single-threaded process (main.py, the benchmarks). Inside the web
+servers and the scheduler other threads may hold locks at fork time, so chunks are pickled to
+workers started from a clean forkserver (spawn where there is none) instead.
+"""
+import gc
+import heapq
+import multiprocessing
+import os
+import threading
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+LOCAL_WORKERS = int(os.environ.get('LOCAL_WORKERS', os.cpu_count() or 1))
+LOCAL_CHUNK_SIZE = int(os.environ.get('LOCAL_CHUNK_SIZE', 50000))
+# Below this many updates the pool startup costs more than it saves
+LOCAL_PARALLEL_MIN = int(os.environ.get('LOCAL_PARALLEL_MIN', 20000))
+
+PRODUCT_KEYWORDS = ("product", "feature", "launch")
+PRICING_KEYWORDS = ("pricing", "price")
+MARKETING_KEYWORDS = ("campaign", "marketing", "brand", "partner", "case study", "webinar", "conference", "press", "sponsor", "community")
+
+# Feed shared with forked workers (set only for the duration of a pooled run)
+_shared_updates = None
+
+
+def categorize_text(text):
+    lowered = text.lower()
+    if any(keyword in lowered for keyword in PRODUCT_KEYWORDS):
+        return "Product"
+    if any(keyword in lowered for keyword in PRICING_KEYWORDS) or "$" in text:
+        return "Pricing"
+    return "Marketing"
+
+
+def categorize_with_confidence(text):
+    """categorize_text plus a rough confidence: high only when one category's keywords match alone"""
+    lowered = text.lower()
+    matched = [category for category, hit in (
+        ("Product", any(keyword in lowered for keyword in PRODUCT_KEYWORDS)),
+        ("Pricing", any(keyword in lowered for keyword in PRICING_KEYWORDS) or "$" in text),
+        ("Marketing", any(keyword in lowered for keyword in MARKETING_KEYWORDS)),
+    ) if hit]
+    category = categorize_text(text)
+    if matched == [category]:
+        return category, 0.9
+    # No keyword at all (Marketing by default) or several categories competing
+    return category, 0.3 if not matched else 0.5
+
+
+CATEGORIES = ("Product", "Pricing", "Marketing")
+_CATEGORY_CODES = {name: code for code, name in enumerate(CATEGORIES)}
+
+
+def _sort_key(update):
+    return update.get('impact_score', 0)
+
+
+def classify_chunk(competitor_updates, offset=0):
+    """
+    The text work for a chunk, returned in a compact form: category codes (one byte per update)
+    and the chunk's indices (offset-based) sorted by impact, highest first
+    """
+    codes = bytes(_CATEGORY_CODES[categorize_text(update.get('update', ''))] for update in competitor_updates)
+    order = sorted(range(len(competitor_updates)), key=lambda i: _sort_key(competitor_updates[i]), reverse=True)
+    return codes, array('I', (offset + i for i in order))
+
+
+def build_scored_update(update, category):
+    """Full research + categorization + scoring record for one raw update"""
+    text = update.get('update', '')
+    impact_score = update.get('impact_score', 5)
+    priority_score = impact_score
+    return {
+        "id": update['id'],
+        "competitor": update['competitor'],
+        "competitor_category": update.get('competitor_category', 'Unknown'),
+        "original_update": text,
+        "update": text,
+        "date": update['date'],
+        "source": update['source'],
+        "source_type": update.get('source_type', 'Unknown'),
+        "impact_score": impact_score,
+        "analysis": {
+            "main_point": text[:100],
+            "metrics": "N/A",
+            "target": "Startup founders",
+            "impact": "Strategic decision-making"
+        },
+        "category": category,
+        "category_reasoning": "Based on update content",
+        "category_confidence": 0.9,
+        "priority_score": priority_score,
+        "impact_areas": ['roadmap', 'positioning'],
+        "urgency_level": 'high' if priority_score >= 8 else 'medium',
+        "strategic_implication": f"High-impact update from {update.get('competitor_category', 'competitor')}",
+    }
+
+
+@contextmanager
+def _gc_paused(count):
+    """
+    Building hundreds of thousands of dicts triggers repeated full GC passes over all of them;
+    none of them are garbage, so collection is paused for large batches.
+    """
+    if count < LOCAL_PARALLEL_MIN or not gc.isenabled():
+        yield
+        return
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
+
+
+def _assemble(competitor_updates, codes, order):
+    # Built in feed order (sequential memory access), then permuted
+    with _gc_paused(len(competitor_updates)):
+        built = [build_scored_update(update, CATEGORIES[code]) for update, code in zip(competitor_updates, codes)]
+    return [built[i] for i in order]
+
+
+def process_chunk(competitor_updates):
+    """Research, categorize and score a list of raw updates; returns them sorted by impact, highest first"""
+    with _gc_paused(len(competitor_updates)):
+        scored_updates = [build_scored_update(update, categorize_text(update.get('update', ''))) for update in competitor_updates]
+    scored_updates.sort(key=_sort_key, reverse=True)
+    return scored_updates
+
+
+def _classify_range(start, end):
+    return classify_chunk(_shared_updates[start:end], start)
+
+
+def _classify_slice(chunk, start):
+    return classify_chunk(chunk, start)
+
+
+def run_local_stages(competitor_updates, workers=None, chunk_size=None):
+    """Process the feed inline, or classify it in chunks across `workers` processes for large feeds"""
+    global _shared_updates
+    workers = workers or LOCAL_WORKERS
+    chunk_size = chunk_size or LOCAL_CHUNK_SIZE
+    if workers <= 1 or len(competitor_updates) < max(LOCAL_PARALLEL_MIN, 2):
+        return process_chunk(competitor_updates)
+
+    starts = list(range(0, len(competitor_updates), chunk_size))
+    ends = [min(start + chunk_size, len(competitor_updates)) for start in starts]
+    start_methods = multiprocessing.get_all_start_methods()
+    if 'fork' in start_methods and threading.active_count() == 1:
+        _shared_updates = competitor_updates
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
+                results = list(pool.map(_classify_range, starts, ends))
+        finally:
+            _shared_updates = None
+    else:
+        # Threaded process, or no fork (Windows): each chunk is pickled to its worker
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in start_methods else 'spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            results = list(pool.map(_classify_slice, (competitor_updates[s:e] for s, e in zip(starts, ends)), starts))
+
+    codes = b"".join(chunk_codes for chunk_codes, _ in results)
+    # Chunks are in feed order, so ties keep feed order just like a single stable sort
+    order = heapq.merge(*(chunk_order for _, chunk_order in results),
+                        key=lambda i: _sort_key(competitor_updates[i]), reverse=True)
+    return _assemble(competitor_updates, codes, order)
@@ -1,12 +1,11 @@
 #!/usr/bin/env python3
+import argparse
 import json
 import os
 import random
-from datetime import datetime
-from agents.research_agent import research_agent
-from agents.categorize_agent import categorize_agent
-from agents.prioritize_agent import prioritize_agent
-from agents.summarize_agent import summarize_agent
+from pipeline import DIGEST_PATH, build_digest, load_checkpoint, run_ingest
+import profiling
+from profiling import profile_run
 
 DEMO_MODE = os.environ.get('DEMO_MODE', 'true').lower() == 'true'
 
@@ -19,7 +18,22 @@ def simulate_engagement_metrics():
         "action_taken_rate": round(random.uniform(15, 25), 1)
     }
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="CompetitiveRadar CLI")
+    parser.add_argument('--resume', nargs='?', const='latest', metavar='RUN_ID',
+                        help="Resume a failed live run from its checkpoints (default: most recent run)")
+    parser.add_argument('--profile', nargs='?', const='sample', choices=['sample', 'cprofile'],
+                        help="Profile each agent stage; writes profiles/<run>/ with a flamegraph (default: sample)")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    if args.profile:
+        profiling.enable(args.profile)
+    with profile_run('main'):
+        run(args)
+
+def run(args):
     print("=" * 60)
     print("🚀 COMPETITIVERADAR - Agentic AI System")
     print("   Transforming competitor tracking into actionable insights")
@@ -30,14 +44,15 @@ def main():
     
     print()
     
-    # Load competitor updates
-    print("📂 Loading competitor data...")
-    with open('data/competitor_updates.json', 'r') as f:
-        competitor_updates = json.load(f)
-    print(f"   Loaded {len(competitor_updates)} competitor updates")
-    print()
-    
     if DEMO_MODE:
+        if args.resume:
+            print("   --resume ignored in DEMO MODE")
+        print("📂 Loading competitor data...")
+        with open('data/competitor_updates.json', 'r') as f:
+            competitor_updates = json.load(f)
+        print(f"   Loaded {len(competitor_updates)} competitor updates")
+        print()
+        
         from demo_data import DEMO_PROCESSED_UPDATES, DEMO_CATEGORIZED_UPDATES, DEMO_TOP_UPDATES, DEMO_DIGEST
         
         # Agent 1: Research (Demo)
@@ -73,35 +88,29 @@ def main():
         digest = DEMO_DIGEST
         print("✅ Summarization Agent: Digest generated successfully")
         print()
+        # Save digest to file
+        with open(DIGEST_PATH, 'w') as f:
+            f.write(digest)
     else:
-        # Agent 1: Research
-        print(" AGENT 1: RESEARCH")
-        print("-" * 60)
-        processed_updates = research_agent(competitor_updates)
-        print()
-        
-        # Agent 2: Categorization
-        print("🤖 AGENT 2: CATEGORIZATION")
-        print("-" * 60)
-        categorized_updates = categorize_agent(processed_updates)
-        print()
-        
-        # Agent 3: Prioritization
-        print("🤖 AGENT 3: PRIORITIZATION")
-        print("-" * 60)
-        top_updates = prioritize_agent(categorized_updates)
-        print()
+        # Same ingest as the web app and scheduler: configured sources, archive, trends, stored scored set.
+        # Each agent checkpoints per update, so a failure can be resumed with --resume
+        checkpoint = load_checkpoint(args.resume) if args.resume else None
+        try:
+            print("🤖 AGENTS 1-3: RESEARCH → CATEGORIZATION → PRIORITIZATION")
+            print("-" * 60)
+            scored_updates = run_ingest(resume=checkpoint)
+            print()
+        except Exception as e:
+            print(f"❌ Pipeline stopped: {str(e)[:100]}")
+            raise SystemExit(1)
         
-        # Agent 4: Summarization
+        # Agent 4: Summarization (synchronous: nothing keeps this process alive for a background polish)
         print("🤖 AGENT 4: SUMMARIZATION")
         print("-" * 60)
-        digest = summarize_agent(top_updates, founder_persona="Tech Startup Founder")
+        digest = build_digest(scored_updates, polish='sync')
         print()
     
-    # Save digest to file
-    with open('weekly_digest.md', 'w') as f:
-        f.write(digest)
-    print("💾 Digest saved to: weekly_digest.md")
+    print(f"💾 Digest saved to: {DIGEST_PATH}")
     print()
     
     # Display engagement metrics
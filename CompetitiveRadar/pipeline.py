@@ -0,0 +1,293 @@
+"""
+Analysis pipeline for CompetitiveRadar.
+Ingest (load the feed, research → categorize → prioritize, store the scored set) and digest
+(top 3 → markdown) are separate steps so the scheduler can run them on their own cadence;
+run_analysis() does both for on-demand runs. Live runs checkpoint every update so a failed
+run can be resumed from the last completed update instead of starting over.
+"""
+import os
+import threading
+from collections import OrderedDict
+from agents.research_agent import research_agent
+from agents.categorize_agent import categorize_agent
+from agents.prioritize_agent import score_updates, select_top
+from agents.summarize_agent import summarize_agent
+from archive import ARCHIVE_ENABLED, append_updates
+from checkpoints import CHECKPOINT_DIR, PipelineCheckpoint
+from digest_diff import DIGEST_DIFF, diff_updates, load_index, save_index
+from digest_renderer import DIGEST_POLISH_MODE, render_weekly_digest, start_digest_polish, strip_section_markers
+from lifecycle import tracked
+from local_stages import run_local_stages
+from profiling import profile_run, profiled_stage
+from singleflight import fingerprint
+from sources import commit_marks, read_sources
+from trends import TRENDS_ENABLED, record_scored_updates
+from storage import SCORED_UPDATES_FILE, read_json, state_path, write_json_atomic
+from watchlist import configured_watchlist
+
+DEMO_MODE = os.environ.get('DEMO_MODE', 'true').lower() == 'true'
+
+DIGEST_PATH = 'weekly_digest.md'
+
+# Scored results of recent personalized-digest watchlist runs (see analyze_watchlist)
+WATCHLIST_CACHE_SIZE = int(os.environ.get('WATCHLIST_CACHE_SIZE', 64))
+_watchlist_cache = OrderedDict()
+_watchlist_cache_lock = threading.Lock()
+
+
+
+def load_competitor_updates(incremental=False, watchlist=None):
+    """
+    Read the configured sources (see sources.py) as (updates, new source marks); incremental reads
+    return only unseen entries, and the marks to commit once they are stored.
+    A watchlist (watchlist.py) drops untracked competitors while the sources are read.
+    """
+    return read_sources(incremental=incremental, watchlist=watchlist)
+
+
+def run_demo_stages(competitor_updates):
+    """Demo mode: research, categorize and score the feed locally without AI API calls"""
+    print("Research Agent: Extracting insights from competitor updates...")
+    print("Categorization Agent: Applying categories...")
+    print("Prioritization Agent: Scoring updates by impact...")
+    # Large feeds are chunked across LOCAL_WORKERS processes (see local_stages.py)
+    scored_updates = run_local_stages(competitor_updates)
+    print(f"Local stages: Processed, classified and scored {len(scored_updates)} updates")
+    return scored_updates
+
+
+def run_agent_stages(competitor_updates, checkpoint=None, record_history=True):
+    """
+    Run the three per-update agents; returns every scored update, highest priority first.
+    record_history=False is a side run: .state/score_history.json, prompts.jsonl and routing.jsonl
+    are left untouched (see score_updates).
+    """
+    if checkpoint:
+        checkpoint.save_input(competitor_updates)
+    with profiled_stage('research'):
+        processed_updates = research_agent(competitor_updates, checkpoint=checkpoint, log_stats=record_history)
+    with profiled_stage('categorize'):
+        categorized_updates = categorize_agent(processed_updates, checkpoint=checkpoint, log_stats=record_history)
+    with profiled_stage('prioritize'):
+        return score_updates(categorized_updates, checkpoint=checkpoint, record_history=record_history,
+                             log_stats=record_history)
+
+
+def load_checkpoint(run_id='latest'):
+    """Open an unfinished run's checkpoint ('latest' picks the most recent); raises if none exists"""
+    if run_id == 'latest':
+        checkpoint = PipelineCheckpoint.latest()
+    elif os.path.isdir(os.path.join(CHECKPOINT_DIR, run_id)):
+        checkpoint = PipelineCheckpoint(run_id)
+    else:
+        checkpoint = None
+    if checkpoint is None:
+        raise FileNotFoundError(f"No pipeline checkpoint found for '{run_id}' in {CHECKPOINT_DIR}/")
+    return checkpoint
+
+
+def resume_hint(checkpoint):
+    progress = ", ".join(f"{stage} {count}" for stage, count in checkpoint.progress().items())
+    return f"Checkpoint {checkpoint.run_id} ({progress}); resume with: python main.py --resume {checkpoint.run_id}"
+
+
+def save_scored_updates(scored_updates):
+    write_json_atomic(state_path(SCORED_UPDATES_FILE), scored_updates)
+
+
+def load_scored_updates():
+    """Scored set from the last ingest, or None if nothing has been ingested yet"""
+    return read_json(state_path(SCORED_UPDATES_FILE), None)
+
+
+def write_digest(digest):
+    with open(DIGEST_PATH, 'w') as f:
+        f.write(digest)
+
+
+def merge_scored_updates(previous, scored_updates):
+    """Add newly scored updates to an earlier scored set (same id replaces), highest priority first"""
+    merged = {str(update['id']): update for update in previous or []}
+    merged.update((str(update['id']), update) for update in scored_updates)
+    return sorted(merged.values(), key=lambda x: x.get('priority_score', 0), reverse=True)
+
+
+def open_checkpoint(competitor_updates, incremental, new_marks):
+    """
+    Checkpoint for a live run, claimed by this process. If the latest unfinished run was started
+    the same way on the same feed (a retry after a quota error), it is resumed instead of
+    repeating its finished Gemini calls. Stale unfinished runs are pruned first.
+    """
+    pruned = PipelineCheckpoint.prune()
+    if pruned:
+        print(f"   Pruned {pruned} stale checkpoints")
+    latest = PipelineCheckpoint.latest()
+    if latest is not None and latest.claim():
+        if latest.load_meta().get('incremental') == incremental and latest.matches_input(competitor_updates):
+            progress = ", ".join(f"{stage} {count}" for stage, count in latest.progress().items())
+            print(f"   Resuming run {latest.run_id} ({progress})")
+            return latest
+        latest.release()
+    checkpoint = PipelineCheckpoint()
+    checkpoint.claim()
+    checkpoint.save_meta(incremental=incremental, marks=new_marks)
+    return checkpoint
+
+
+def run_ingest(incremental=False, resume=None):
+    """
+    Load the feed, run research → categorization → prioritization and store the scored set.
+    Incremental runs (the scheduler's) only process entries past each source's high-water mark
+    and merge them into the stored set. The marks advance only after the set is saved, so a run
+    that fails (quota error, crash) is retried on the same entries.
+    resume: an unfinished live run's checkpoint (main.py --resume). Its saved input is finished
+    instead of reading the sources, merged into the stored set, and the marks it read up to are committed.
+    """
+    if resume is not None:
+        if not DEMO_MODE and not resume.claim():
+            raise RuntimeError(f"Checkpoint {resume.run_id} is already being run by another process")
+        competitor_updates = resume.load_input()
+        new_marks = resume.load_meta().get('marks', {})
+        incremental = True  # a resumed run only covers its own updates, so it is merged
+        print(f"Resuming run {resume.run_id}")
+    else:
+        # WATCHLIST limits the shared pipeline to the tracked competitors
+        watchlist = configured_watchlist()
+        with profiled_stage('load'):
+            competitor_updates, new_marks = load_competitor_updates(incremental, watchlist)
+        if watchlist:
+            print(f"Watchlist: {len(competitor_updates)} updates for {len(watchlist)} tracked competitors")
+    if incremental:
+        previous = load_scored_updates()
+        if not competitor_updates and previous is not None:
+            print("No new updates since the last scan")
+            commit_marks(new_marks)
+            return previous
+    print(f"Scanning {len(competitor_updates)} updates from 50+ sources...")
+    print("   Sources: Product Hunt, TechCrunch, LinkedIn, Twitter/X, TikTok, YouTube, App Stores, Press Releases...")
+    if ARCHIVE_ENABLED:
+        with profiled_stage('archive'):
+            print(f"   Archived {append_updates(competitor_updates)} new updates")
+
+    if DEMO_MODE:
+        with profiled_stage('local_stages'):
+            scored_updates = run_demo_stages(competitor_updates)
+    else:
+        # Per-update results are checkpointed so a failed run can be resumed with main.py --resume
+        checkpoint = resume or open_checkpoint(competitor_updates, incremental, new_marks)
+        try:
+            print("Using LIVE Google Gemini AI Agents")
+            scored_updates = run_agent_stages(competitor_updates, checkpoint)
+        except Exception:
+            print(f"   {resume_hint(checkpoint)}")
+            checkpoint.release()
+            raise
+        checkpoint.finish()
+
+    with profiled_stage('store'):
+        if TRENDS_ENABLED:
+            record_scored_updates(scored_updates)
+        if incremental:
+            scored_updates = merge_scored_updates(previous, scored_updates)
+        save_scored_updates(scored_updates)
+        commit_marks(new_marks)
+    return scored_updates
+
+
+def analyze_watchlist(watchlist):
+    """
+    Per-tenant run: read the feed with the watchlist pushed down and score only the tracked
+    competitors' updates, highest priority first. Nothing shared is written: not the scored set,
+    digest, archive, trends, source marks, score history (read only) or the prompt and routing logs.
+    Results are cached per watchlist and feed content, so repeat requests make no model calls
+    until the tracked competitors' updates change. A live run makes model calls, so callers run it
+    off the event loop and single-flighted per watchlist (api_handlers.tracked_updates).
+    """
+    competitor_updates, _ = load_competitor_updates(watchlist=watchlist)
+    print(f"Watchlist: {len(competitor_updates)} updates for {len(watchlist)} tracked competitors")
+    if not competitor_updates:
+        return []
+    key = fingerprint(watchlist.fingerprint(), [(u['id'], u['update']) for u in competitor_updates])
+    with _watchlist_cache_lock:
+        if key in _watchlist_cache:
+            _watchlist_cache.move_to_end(key)
+            return _watchlist_cache[key]
+    if DEMO_MODE:
+        scored_updates = run_demo_stages(competitor_updates)
+    else:
+        scored_updates = run_agent_stages(competitor_updates, record_history=False)
+    with _watchlist_cache_lock:
+        _watchlist_cache[key] = scored_updates
+        while len(_watchlist_cache) > WATCHLIST_CACHE_SIZE:
+            _watchlist_cache.popitem(last=False)
+    return scored_updates
+
+
+def build_digest(scored_updates=None, diff=None, polish=None):
+    """
+    Write weekly_digest.md from the top 3 of the scored set (the last ingest's by default).
+    polish overrides DIGEST_POLISH_MODE, e.g. 'sync' for processes that exit right after.
+    With diff (DIGEST_DIFF by default) only updates that no digest has reported yet, or that
+    changed or were re-scored since one did, are considered (see digest_diff.py).
+    """
+    if scored_updates is None:
+        scored_updates = load_scored_updates()
+        if scored_updates is None:
+            raise FileNotFoundError("No scored updates yet; run an ingest first")
+    candidates, since = scored_updates, None
+    if DIGEST_DIFF if diff is None else diff:
+        index = load_index(DIGEST_PATH)
+        candidates = diff_updates(scored_updates, index)
+        since = index and index['generated_at'][:10]
+        print(f"Digest diff: {len(candidates)} of {len(scored_updates)} updates unreported, changed or re-scored"
+              + (f" since {since}" if since else ""))
+    top_updates = select_top(candidates)
+
+    polish = polish or DIGEST_POLISH_MODE
+    polish_updates = None
+    print("Summarization Agent: Generating digest with competitor categories...")
+    with profiled_stage('digest'):
+        if top_updates and not DEMO_MODE and polish == 'sync':
+            digest = summarize_agent(top_updates, founder_persona="Tech Startup Founder")
+        else:
+            # Template digest is ready instantly; in live mode the slow model only enriches it afterwards
+            digest = render_weekly_digest(top_updates, since=since)
+            if top_updates and not DEMO_MODE and polish == 'async':
+                polish_updates = top_updates
+        # The polish needs the section markers; the stored and served digest doesn't
+        published = strip_section_markers(digest)
+        write_digest(published)
+        save_index(DIGEST_PATH, scored_updates, top_updates)
+    if polish_updates:
+        start_digest_polish(digest, polish_updates, DIGEST_PATH)
+    print("Summarization Agent: Digest generated with competitor categories and source attribution")
+    return published
+
+
+@tracked
+def run_analysis():
+    """Run the multi-agent analysis pipeline"""
+    # PROFILE=true writes a stage-by-stage profile of the run (see profiling.py)
+    with profile_run('analysis'):
+        print("=" * 60)
+        print("COMPETITIVERADAR - Agentic AI System")
+        print("=" * 60)
+
+        if DEMO_MODE:
+            print("Running in DEMO MODE")
+            digest = build_digest(run_ingest())
+        else:
+            # Real analysis with fallback to demo mode on quota error
+            try:
+                digest = build_digest(run_ingest())
+            except Exception as e:
+                print(f"Gemini API Error: {str(e)[:100]}")
+                print("Falling back to Demo Mode. To use live AI agents:")
+                print("   1. Get free Gemini API key at: https://aistudio.google.com/apikey")
+                print("   2. Add to Replit Secrets as GEMINI_FREE_API_KEY")
+                from demo_data import DEMO_DIGEST
+                digest = DEMO_DIGEST
+                write_digest(digest)
+
+    print("CompetitiveRadar Analysis Complete!")
+    return digest
@@ -0,0 +1,268 @@
+"""
+Opt-in profiling for CompetitiveRadar runs and requests.
+With PROFILE=true (or main.py --profile) each pipeline run is profiled stage by stage and written
+to PROFILE_DIR/<timestamp>-<run>/ next to the digest:
+  - sample mode (default): a wall-clock sampling profiler records the running thread's stack
+    every PROFILE_INTERVAL seconds, including time blocked on the network. Each stage gets a
+    <stage>.collapsed file, and flamegraph.collapsed holds the whole run (one
+    "frame;frame;... count" line per stack, for flamegraph.pl or speedscope)
+  - cprofile mode: cProfile per stage, as <stage>.prof plus a <stage>.txt top-functions table
+summary.txt lists wall time per stage and where it went (network, JSON, rendering, file I/O, ...).
+With PROFILE_REQUESTS=true, Flask requests are sampled into one in-memory profile per endpoint,
+which is flushed to PROFILE_DIR/requests.collapsed. /debug/profile (PROFILE_ENDPOINT=true) can
+sample the live process on demand.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILE_ENABLED = os.environ.get('PROFILE', 'false').lower() == 'true'
+PROFILE_MODE = os.environ.get('PROFILE_MODE', 'sample')  # sample | cprofile
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.005))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+PROFILE_REQUESTS = os.environ.get('PROFILE_REQUESTS', 'false').lower() == 'true'
+PROFILE_ENDPOINT = os.environ.get('PROFILE_ENDPOINT', 'false').lower() == 'true'
+PROFILE_FLUSH_SECONDS = 30
+MAX_STACK_DEPTH = 128
+
+# Where a sample's time went, by the innermost frame whose file matches (checked in order)
+TIME_BUCKETS = [
+    ("network", ("/ssl.py", "/socket.py", "/http/client.py", "/httpx/", "/httpcore/", "/urllib3/",
+                 "/requests/", "/google/genai/", "/google/auth/", "/websockets/")),
+    ("json", ("/json/", "orjson", "structured_output.py")),
+    ("rendering", ("/jinja2/", "/markdown/", "digest_renderer.py", "static_pages.py")),
+    ("file i/o", ("storage.py", "checkpoints.py", "archive.py", "sources.py", "/xml/")),
+    ("copying / local stages", ("local_stages.py", "/copy.py")),
+    ("waiting on worker threads", ("/threading.py", "/concurrent/futures/")),
+]
+
+_local = threading.local()
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ',')
+
+
+def _collapse(frame):
+    """Root-first frame labels for a thread's current stack"""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def _bucket(frame):
+    while frame is not None:
+        filename = frame.f_code.co_filename.replace('\\', '/')
+        for name, patterns in TIME_BUCKETS:
+            if any(pattern in filename for pattern in patterns):
+                return name
+        frame = frame.f_back
+    return "other python"
+
+
+class Sampler:
+    """
+    One background thread sampling the stacks of watched threads. Each watch adds its samples to
+    its own Counter of collapsed stacks, under a root label that can change (e.g. per stage).
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self._watches = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def watch(self, thread_id, stacks, label, buckets=None):
+        with self._lock:
+            self._watches[thread_id] = [stacks, label, buckets]
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+
+    def relabel(self, thread_id, label, buckets=None):
+        with self._lock:
+            if thread_id in self._watches:
+                self._watches[thread_id][1:] = [label, buckets]
+
+    def unwatch(self, thread_id):
+        with self._lock:
+            self._watches.pop(thread_id, None)
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            frames = sys._current_frames()
+            # Counters are only written under the lock, so owners can read them once unwatched/relabelled
+            with self._lock:
+                if not self._watches:
+                    self._thread = None
+                    return
+                for thread_id, (stacks, label, buckets) in self._watches.items():
+                    frame = frames.get(thread_id)
+                    if frame is None or thread_id == me:
+                        continue
+                    stacks[";".join([label] + _collapse(frame))] += 1
+                    if buckets is not None:
+                        buckets[_bucket(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+
+sampler = Sampler()
+
+
+def write_collapsed(path, stacks):
+    with open(path, 'w') as f:
+        for stack, count in sorted(stacks.items()):
+            f.write(f"{stack} {count}\n")
+
+
+class RunProfile:
+    """Stage-by-stage profile of one run on the current thread"""
+
+    def __init__(self, name, mode=None, directory=None):
+        self.name = name
+        self.mode = mode or PROFILE_MODE
+        base = os.path.join(directory or PROFILE_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{name}")
+        self.path, n = base, 1
+        while os.path.exists(self.path):
+            n += 1
+            self.path = f"{base}-{n}"
+        self.stacks = Counter()
+        self.stages = []  # (name, seconds, samples, buckets)
+        self._thread_id = threading.get_ident()
+        self._current = None
+        self._start = time.perf_counter()
+        os.makedirs(self.path, exist_ok=True)
+        if self.mode == 'sample':
+            sampler.watch(self._thread_id, self.stacks, name)
+
+    @contextmanager
+    def stage(self, name):
+        if self._current is not None:
+            # Nested stages are attributed to the outer one
+            yield
+            return
+        self._current = name
+        buckets = Counter()
+        profiler = None
+        if self.mode == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            sampler.relabel(self._thread_id, f"{self.name};{name}", buckets)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                self._write_cprofile(name, profiler)
+            else:
+                sampler.relabel(self._thread_id, self.name)
+            self.stages.append((name, seconds, sum(buckets.values()), buckets))
+            self._current = None
+
+    def _write_cprofile(self, stage, profiler):
+        profiler.dump_stats(os.path.join(self.path, f"{stage}.prof"))
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(40)
+        with open(os.path.join(self.path, f"{stage}.txt"), 'w') as f:
+            f.write(out.getvalue())
+
+    def finish(self):
+        """Stop sampling and write the profile files; returns the run's directory"""
+        total = time.perf_counter() - self._start
+        if self.mode == 'sample':
+            sampler.unwatch(self._thread_id)
+            write_collapsed(os.path.join(self.path, 'flamegraph.collapsed'), self.stacks)
+            for stage, _, _, _ in self.stages:
+                prefix = f"{self.name};{stage};"
+                write_collapsed(os.path.join(self.path, f"{stage}.collapsed"),
+                                {s: n for s, n in self.stacks.items() if s.startswith(prefix)})
+        lines = [f"{self.name}: {total:.3f}s total ({self.mode} mode)", ""]
+        for stage, seconds, samples, buckets in self.stages:
+            lines.append(f"{stage:<16}{seconds:>9.3f}s")
+            for bucket, count in buckets.most_common():
+                lines.append(f"    {bucket:<24}{count / samples:>6.0%}")
+        with open(os.path.join(self.path, 'summary.txt'), 'w') as f:
+            f.write("\n".join(lines) + "\n")
+        print(f"Profile written to {self.path}/")
+        return self.path
+
+
+@contextmanager
+def profile_run(name):
+    """Profile everything inside as one run when profiling is enabled (no-op otherwise or when nested)"""
+    if not PROFILE_ENABLED or getattr(_local, 'run', None) is not None:
+        yield
+        return
+    _local.run = RunProfile(name)
+    try:
+        yield
+    finally:
+        run, _local.run = _local.run, None
+        run.finish()
+
+
+@contextmanager
+def profiled_stage(name):
+    """Attribute the enclosed work to a stage of the current thread's run, if one is being profiled"""
+    run = getattr(_local, 'run', None)
+    if run is None:
+        yield
+        return
+    with run.stage(name):
+        yield
+
+
+def enable(mode=None):
+    """Turn profiling on for this process (main.py --profile)"""
+    global PROFILE_ENABLED, PROFILE_MODE
+    PROFILE_ENABLED = True
+    if mode:
+        PROFILE_MODE = mode
+
+
+# Flask requests: one aggregate profile per endpoint
+
+request_stacks = Counter()
+_last_flush = [time.monotonic()]
+
+
+def start_request(label):
+    sampler.watch(threading.get_ident(), request_stacks, label.replace(';', ','))
+
+
+def end_request():
+    sampler.unwatch(threading.get_ident())
+    if time.monotonic() - _last_flush[0] >= PROFILE_FLUSH_SECONDS:
+        _last_flush[0] = time.monotonic()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        write_collapsed(os.path.join(PROFILE_DIR, 'requests.collapsed'), dict(request_stacks))
+
+
+def sample_process(seconds):
+    """Collapsed stacks of every thread in the process, sampled for `seconds`"""
+    stacks = Counter()
+    me = threading.get_ident()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id != me and names.get(thread_id) != "profile-sampler":
+                stacks[";".join([names.get(thread_id, str(thread_id))] + _collapse(frame))] += 1
+        time.sleep(PROFILE_INTERVAL)
+    return stacks
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Background scanner for CompetitiveRadar.
+Runs ingest (feed → scored updates) and the weekly digest on fixed intervals so web requests
+only read precomputed results. Each job adds random jitter to its interval, skips a run while
+the previous one is still going, and holds a file lock so several app workers (or a standalone
+scheduler next to the web app) never run the same job at once.
+
+In-process:  SCHEDULER_ENABLED=true python app.py   (or serve.py)
+Standalone:  python scheduler.py                     (python scheduler.py --once ingest|digest)
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from lifecycle import track_inflight, wait_for_inflight
+from profiling import profile_run
+from storage import FileLock, read_json, state_path, write_json_atomic
+
+SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'false').lower() == 'true'
+SCHEDULE_INGEST_INTERVAL = int(os.environ.get('SCHEDULE_INGEST_INTERVAL', 3600))
+SCHEDULE_DIGEST_INTERVAL = int(os.environ.get('SCHEDULE_DIGEST_INTERVAL', 7 * 24 * 3600))
+# Each run is delayed by up to this fraction of its interval so workers don't fire in lockstep
+SCHEDULE_JITTER = float(os.environ.get('SCHEDULE_JITTER', 0.1))
+# A failed run is retried after this long instead of waiting a full interval
+SCHEDULE_RETRY_INTERVAL = int(os.environ.get('SCHEDULE_RETRY_INTERVAL', 300))
+# Scheduled digests only report updates not reported yet, or changed or re-scored since (digest_diff.py)
+SCHEDULE_DIGEST_DIFF = os.environ.get('SCHEDULE_DIGEST_DIFF', 'true').lower() == 'true'
+# --once waits up to this long for background work the job started (the digest's async polish)
+SCHEDULE_ONCE_WAIT = int(os.environ.get('SCHEDULE_ONCE_WAIT', 600))
+SCHEDULE_FILE = 'schedule.json'
+TICK_SECONDS = 30
+
+
+def _load_schedule():
+    return read_json(state_path(SCHEDULE_FILE), {})
+
+
+def _record_run(name, started, finished, status):
+    # Read-modify-write under the job's file lock; other jobs only touch their own key
+    schedule = _load_schedule()
+    schedule[name] = {
+        "last_started": started,
+        "last_finished": finished,
+        "last_status": status,
+    }
+    write_json_atomic(state_path(SCHEDULE_FILE), schedule)
+
+
+class Job:
+    """A named function run every `interval` seconds (plus jitter), never overlapping itself"""
+
+    def __init__(self, name, func, interval, jitter=SCHEDULE_JITTER):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self._running = threading.Lock()
+        self._next_run = None
+
+    def plan_next(self, now=None):
+        """Next run time from the last recorded start, so restarts keep the cadence"""
+        now = now or time.time()
+        last_run = _load_schedule().get(self.name, {})
+        interval = self.interval
+        if last_run.get('last_status', 'ok') != 'ok':
+            interval = min(interval, SCHEDULE_RETRY_INTERVAL)
+        self._next_run = max(now, last_run.get('last_started', 0) + interval) + random.uniform(0, interval * self.jitter)
+        return self._next_run
+
+    def postpone(self, now=None):
+        """Hold off the next run for a full interval; run() replans from the recorded start when it ends"""
+        self._next_run = (now or time.time()) + self.interval
+        return self._next_run
+
+    def due(self, now=None):
+        if self._next_run is None:
+            self.plan_next(now)
+        return (now or time.time()) >= self._next_run
+
+    def run(self):
+        """Run once unless a run is already in progress here or in another process; returns True if it ran"""
+        if not self._running.acquire(blocking=False):
+            print(f"⏭️  Scheduler: {self.name} still running, skipping")
+            return False
+        lock = FileLock(self.name)
+        try:
+            if not lock.acquire():
+                print(f"⏭️  Scheduler: {self.name} locked by another process, skipping")
+                return False
+            started = time.time()
+            print(f"⏰ Scheduler: running {self.name} ({datetime.now().isoformat(timespec='seconds')})")
+            status = "ok"
+            try:
+                with track_inflight(), profile_run(self.name):
+                    self.func()
+            except Exception as e:
+                status = f"error: {str(e)[:200]}"
+                print(f"❌ Scheduler: {self.name} failed: {e}")
+            _record_run(self.name, started, time.time(), status)
+            print(f"✅ Scheduler: {self.name} finished in {time.time() - started:.1f}s")
+            return True
+        finally:
+            lock.release()
+            self._running.release()
+            self.plan_next()
+
+
+def default_jobs():
+    from pipeline import build_digest, run_ingest, load_scored_updates
+    ingest = Job('ingest', lambda: run_ingest(incremental=True), SCHEDULE_INGEST_INTERVAL)
+
+    def digest_job():
+        # The first digest needs something to summarize; if another worker is mid-ingest,
+        # build_digest fails and the digest is retried after SCHEDULE_RETRY_INTERVAL
+        if load_scored_updates() is None:
+            ingest.run()
+        build_digest(diff=SCHEDULE_DIGEST_DIFF)
+
+    return [ingest, Job('digest', digest_job, SCHEDULE_DIGEST_INTERVAL)]
+
+
+class Scheduler:
+    """Checks jobs every TICK_SECONDS and runs the due ones on their own threads"""
+
+    def __init__(self, jobs=None):
+        self.jobs = jobs if jobs is not None else default_jobs()
+        self._stop = threading.Event()
+
+    def tick(self):
+        for job in self.jobs:
+            if job.due():
+                # Advance the next run now, so later ticks don't start threads that only skip a run in progress
+                job.postpone()
+                threading.Thread(target=job.run, name=f"scheduler-{job.name}", daemon=True).start()
+
+    def run_forever(self):
+        for job in self.jobs:
+            print(f"🗓️  Scheduler: {job.name} every {job.interval}s, next in {job.plan_next() - time.time():.0f}s")
+        while not self._stop.is_set():
+            self.tick()
+            self._stop.wait(TICK_SECONDS)
+
+    def stop(self):
+        self._stop.set()
+
+
+_background = None
+
+
+def start_background_scheduler():
+    """Start the scheduler on a daemon thread once per process"""
+    global _background
+    if _background is None:
+        _background = Scheduler()
+        threading.Thread(target=_background.run_forever, name="scheduler", daemon=True).start()
+    return _background
+
+
+def stop_background_scheduler():
+    """Stop this process's scheduler from starting runs; runs in progress finish (see lifecycle.py)"""
+    global _background
+    if _background is not None:
+        _background.stop()
+        _background = None
+
+
+def status():
+    """Last run per job, as recorded in STATE_DIR/schedule.json"""
+    return _load_schedule()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CompetitiveRadar background scanner")
+    parser.add_argument('--once', choices=['ingest', 'digest'],
+                        help="Run one job now (still honours the file lock) and exit")
+    args = parser.parse_args()
+
+    scheduler = Scheduler()
+    if args.once:
+        job = next(job for job in scheduler.jobs if job.name == args.once)
+        ran = job.run()
+        # Background threads die with the process, so let them finish before exiting
+        if not wait_for_inflight(SCHEDULE_ONCE_WAIT):
+            print(f"Background work still running after {SCHEDULE_ONCE_WAIT}s; exiting anyway")
+        raise SystemExit(0 if ran else 1)
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Production entry point for CompetitiveRadar.
+
+    python serve.py
+
+Runs the Flask app under gunicorn with gthread workers, preloading the app (pre-rendered
+pages, chat index, Gemini clients) in the master so workers fork with warm caches.
+In-flight analyses and digest polish threads are drained before a worker exits.
+With SCHEDULER_ENABLED=true each worker also runs the background scanner (see scheduler.py).
+Falls back to a threaded Werkzeug server when gunicorn is not installed (e.g. on Windows).
+"""
+import importlib.util
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+PORT = int(os.environ.get('PORT', 5000))
+WEB_WORKERS = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+WEB_THREADS = int(os.environ.get('WEB_THREADS', 8))
+# Live pipeline requests can legitimately take minutes
+WEB_TIMEOUT = int(os.environ.get('WEB_TIMEOUT', 300))
+# Total shutdown budget per worker: open requests, then tracked analyses (see note_shutdown)
+WEB_GRACEFUL_TIMEOUT = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 120))
+# Seconds kept back from the drain so the worker exits before the master's SIGKILL
+DRAIN_MARGIN = 2
+WEB_ACCESS_LOG = os.environ.get('WEB_ACCESS_LOG', 'false').lower() == 'true'
+
+
+def load_app():
+    # Importing app pre-renders pages and creates the shared clients (see app.warm_up)
+    from app import app
+    return app
+
+
+def note_shutdown(worker):
+    """
+    gunicorn post_worker_init hook: record when SIGTERM arrives. The master kills the worker
+    WEB_GRACEFUL_TIMEOUT after sending it, and open requests are finished first, so the drain
+    in worker_exit only gets what is left of that budget.
+    """
+    handle_exit = signal.getsignal(signal.SIGTERM)
+
+    def on_sigterm(signum, frame):
+        worker.shutdown_deadline = time.monotonic() + WEB_GRACEFUL_TIMEOUT - DRAIN_MARGIN
+        handle_exit(signum, frame)
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+    signal.siginterrupt(signal.SIGTERM, False)
+
+
+def drain_inflight(server, worker):
+    """gunicorn worker_exit hook: let background analyses finish before the worker goes away"""
+    from lifecycle import inflight_count, wait_for_inflight
+    pending = inflight_count()
+    if pending:
+        # Without a SIGTERM (e.g. max_requests restarts) the master isn't counting down
+        deadline = getattr(worker, 'shutdown_deadline', None)
+        timeout = WEB_GRACEFUL_TIMEOUT if deadline is None else max(0, deadline - time.monotonic())
+        print(f"Worker {worker.pid}: waiting up to {timeout:.0f}s for {pending} in-flight analyses")
+        if not wait_for_inflight(timeout):
+            print(f"Worker {worker.pid}: graceful timeout reached with analyses still running")
+
+
+def start_scheduler(server, worker):
+    """gunicorn post_fork hook: threads don't survive fork, so each worker starts its own scheduler (the job file locks keep runs single)"""
+    from scheduler import SCHEDULER_ENABLED, start_background_scheduler
+    if SCHEDULER_ENABLED:
+        start_background_scheduler()
+
+
+def run_gunicorn():
+    from gunicorn.app.base import BaseApplication
+
+    class CompetitiveRadarServer(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return load_app()
+
+    CompetitiveRadarServer({
+        'bind': f"0.0.0.0:{PORT}",
+        'workers': WEB_WORKERS,
+        'threads': WEB_THREADS,
+        'worker_class': 'gthread',
+        'preload_app': True,
+        'timeout': WEB_TIMEOUT,
+        'graceful_timeout': WEB_GRACEFUL_TIMEOUT,
+        'keepalive': 5,
+        'accesslog': '-' if WEB_ACCESS_LOG else None,
+        'post_fork': start_scheduler,
+        'post_worker_init': note_shutdown,
+        'worker_exit': drain_inflight,
+    }).run()
+
+
+def run_threaded_fallback():
+    from werkzeug.serving import run_simple
+    from lifecycle import wait_for_inflight
+
+    def shutdown(signum, frame):
+        print("Shutting down: waiting for in-flight analyses...")
+        wait_for_inflight(WEB_GRACEFUL_TIMEOUT)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    print("gunicorn not installed; serving with the threaded Werkzeug server")
+    app = load_app()
+    start_scheduler(None, None)
+    run_simple('0.0.0.0', PORT, app, threaded=True)
+
+
+if __name__ == '__main__':
+    if importlib.util.find_spec('gunicorn') is None:
+        run_threaded_fallback()
+    else:
+        print(f"Starting gunicorn: {WEB_WORKERS} workers x {WEB_THREADS} threads on port {PORT}")
+        run_gunicorn()
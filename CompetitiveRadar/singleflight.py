@@ -0,0 +1,101 @@
+"""
+Request coalescing ("single flight") for CompetitiveRadar.
+Concurrent callers asking for the same key share one in-flight computation: the first caller
+runs it, the rest wait and receive the same result (or exception). Nothing is cached once the
+call finishes, so the next request after completion starts a fresh computation.
+"""
+import asyncio
+import hashlib
+import json
+import threading
+
+
+def fingerprint(*parts):
+    """Stable key for a request payload"""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Group of keyed in-flight calls"""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, func, *args, **kwargs):
+        """Run func(*args, **kwargs) unless a call with this key is already running; then wait for it"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            if call.waiters:
+                print(f"{self.name}: {call.waiters} duplicate requests shared one computation")
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._calls)
+        return {"executed": self.executed, "coalesced": self.coalesced, "in_flight": in_flight}
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of SingleFlight for coroutine endpoints (one event loop)"""
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key, func, *args, **kwargs):
+        """Await func(*args, **kwargs) unless a call with this key is already running; then await that one"""
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+            # shield: a disconnecting duplicate must not cancel the shared call
+            return await asyncio.shield(task)
+        self.executed += 1
+        task = self._calls[key] = asyncio.ensure_future(func(*args, **kwargs))
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._calls.pop(key, None)
+            else:
+                task.add_done_callback(lambda _: self._calls.pop(key, None))
+
+    def stats(self):
+        return {"executed": self.executed, "coalesced": self.coalesced, "in_flight": len(self._calls)}
@@ -0,0 +1,325 @@
+"""
+Source adapters for CompetitiveRadar ingestion.
+Each adapter reads one input (a JSON / JSONL file, an RSS or Atom XML file, or a directory that
+files are dropped into) and normalizes its records into the update schema the agents expect:
+id, competitor, update, date, source, plus optional competitor_category, source_type, impact_score.
+
+Sources are read concurrently. Every adapter keeps a high-water mark in .state/sources.json so an
+incremental read only returns entries it has not seen: files are skipped when unchanged, JSONL is
+read from the last byte offset, and feed entries are filtered by date and id. Marks only advance
+(commit_marks) after the entries read past them have been scored and stored.
+
+SOURCES is a comma-separated list of kind:path specs, e.g.
+    SOURCES=json:data/competitor_updates_realtime.json,rss:feeds/notion.xml,dir:data/inbox
+Without it, the first existing file of DEFAULT_FEED_FILES is used.
+"""
+import hashlib
+import json
+import os
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from storage import read_json, state_path, write_json_atomic
+
+SOURCES = os.environ.get('SOURCES', '')
+SOURCE_WORKERS = int(os.environ.get('SOURCE_WORKERS', 8))
+SOURCES_STATE_FILE = 'sources.json'
+# Key in the marks file holding the fingerprint of the watchlist the marks were read with
+WATCHLIST_MARK = '_watchlist'
+
+# Tried in order (realtime first for a realistic scanning experience)
+DEFAULT_FEED_FILES = [
+    'data/competitor_updates_realtime.json',
+    'data/competitor_updates_extended.json',
+    'data/competitor_updates.json',
+]
+
+REQUIRED_FIELDS = ['competitor', 'update']
+OPTIONAL_FIELDS = ['competitor_category', 'source_type', 'impact_score', 'category', 'url']
+
+_ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+def _parse_date(value):
+    """Feed / record date as YYYY-MM-DD (RFC 822, ISO 8601 or already normalized)"""
+    if not value:
+        return datetime.now().strftime("%Y-%m-%d")
+    value = str(value).strip()
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).strftime("%Y-%m-%d")
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value).strftime("%Y-%m-%d")
+    except (TypeError, ValueError, AttributeError):
+        return value[:10]
+
+
+def _entry_text(title, body):
+    title, body = (title or '').strip(), (body or '').strip()
+    if title and body and title[-1] not in '.!?:':
+        title += '.'
+    return " ".join(filter(None, [title, body]))
+
+
+def _stable_id(*parts):
+    return hashlib.sha1("|".join(str(p) for p in parts).encode('utf-8')).hexdigest()[:12]
+
+
+def normalize_record(record, source_name, defaults=None):
+    """Map a raw record onto the update schema; None if it lacks a competitor or update text"""
+    record = {**(defaults or {}), **record}
+    if not all(record.get(field) for field in REQUIRED_FIELDS):
+        return None
+    update = {
+        "id": record.get('id') or _stable_id(source_name, record['competitor'], record['update']),
+        "competitor": str(record['competitor']).strip(),
+        "update": str(record['update']).strip(),
+        "date": _parse_date(record.get('date')),
+        "source": record.get('source') or source_name,
+    }
+    for field in OPTIONAL_FIELDS:
+        if record.get(field) is not None:
+            update[field] = record[field]
+    return update
+
+
+class Source:
+    """Base adapter: read() returns (updates, new_mark) given the previous high-water mark"""
+
+    kind = None
+
+    def __init__(self, path):
+        self.path = path
+        self.name = f"{self.kind}:{path}"
+
+    def read(self, mark=None):
+        raise NotImplementedError
+
+    def _file_unchanged(self, mark):
+        stat = os.stat(self.path)
+        return mark is not None and mark.get('mtime') == stat.st_mtime and mark.get('size') == stat.st_size
+
+    def _file_mark(self, **extra):
+        stat = os.stat(self.path)
+        return {"mtime": stat.st_mtime, "size": stat.st_size, **extra}
+
+
+def _after_mark(updates, mark):
+    """Entries newer than the mark's date, or on that date with an id not seen yet"""
+    if not mark or 'date' not in mark:
+        return updates
+    seen = set(mark.get('ids', []))
+    return [u for u in updates if u['date'] > mark['date'] or (u['date'] == mark['date'] and str(u['id']) not in seen)]
+
+
+def _date_mark(updates, mark):
+    """Advance a date/id high-water mark past updates"""
+    mark = dict(mark or {})
+    for update in updates:
+        if update['date'] > mark.get('date', ''):
+            mark['date'], mark['ids'] = update['date'], []
+        if update['date'] == mark['date']:
+            mark.setdefault('ids', []).append(str(update['id']))
+    return mark
+
+
+class JSONSource(Source):
+    """A JSON array of updates (the format of the files in data/)"""
+
+    kind = 'json'
+
+    def read(self, mark=None):
+        if self._file_unchanged(mark):
+            return [], mark
+        with open(self.path, 'r') as f:
+            records = json.load(f)
+        updates = [u for u in (normalize_record(r, self.name) for r in records) if u]
+        new = _after_mark(updates, mark)
+        return new, self._file_mark(**_date_mark(new, mark))
+
+
+class JSONLSource(Source):
+    """One update per line; appended files are read from the last byte offset"""
+
+    kind = 'jsonl'
+
+    def read(self, mark=None):
+        if self._file_unchanged(mark):
+            return [], mark
+        offset = (mark or {}).get('offset', 0)
+        if offset > os.path.getsize(self.path):
+            offset = 0  # truncated or replaced
+        updates = []
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partially written line; picked up next time
+                offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    update = normalize_record(json.loads(line), self.name)
+                except json.JSONDecodeError:
+                    print(f"⚠️  {self.name}: skipping malformed line at byte {offset - len(line)}")
+                    continue
+                if update:
+                    updates.append(update)
+        return updates, self._file_mark(offset=offset)
+
+
+class FeedSource(Source):
+    """RSS 2.0 or Atom XML file; the feed title is used as the competitor name"""
+
+    kind = 'rss'
+
+    def read(self, mark=None):
+        if self._file_unchanged(mark):
+            return [], mark
+        root = ET.parse(self.path).getroot()
+        if root.tag == f"{_ATOM}feed":
+            feed_title = root.findtext(f"{_ATOM}title", default=self.path)
+            records = [{
+                "id": entry.findtext(f"{_ATOM}id"),
+                "update": _entry_text(entry.findtext(f"{_ATOM}title"), entry.findtext(f"{_ATOM}summary") or entry.findtext(f"{_ATOM}content")),
+                "date": entry.findtext(f"{_ATOM}updated") or entry.findtext(f"{_ATOM}published"),
+                "url": (entry.find(f"{_ATOM}link").get('href') if entry.find(f"{_ATOM}link") is not None else None),
+            } for entry in root.iter(f"{_ATOM}entry")]
+        else:
+            channel = root.find('channel')
+            feed_title = channel.findtext('title', default=self.path) if channel is not None else self.path
+            records = [{
+                "id": item.findtext('guid') or item.findtext('link'),
+                "update": _entry_text(item.findtext('title'), item.findtext('description')),
+                "date": item.findtext('pubDate'),
+                "url": item.findtext('link'),
+            } for item in root.iter('item')]
+        defaults = {"competitor": feed_title.strip(), "source": feed_title.strip(), "source_type": "RSS Feed"}
+        updates = [u for u in (normalize_record(r, self.name, defaults) for r in records) if u]
+        new = _after_mark(updates, mark)
+        return new, self._file_mark(**_date_mark(new, mark))
+
+
+class DirectorySource(Source):
+    """A drop directory: every .json / .jsonl / .xml file in it, each read only when it is new or changed"""
+
+    kind = 'dir'
+    ADAPTERS = {'.json': JSONSource, '.jsonl': JSONLSource, '.xml': FeedSource, '.rss': FeedSource, '.atom': FeedSource}
+
+    def read(self, mark=None):
+        files = dict((mark or {}).get('files', {}))
+        updates = []
+        for filename in sorted(os.listdir(self.path)):
+            adapter = self.ADAPTERS.get(os.path.splitext(filename)[1].lower())
+            if adapter is None:
+                continue
+            source = adapter(os.path.join(self.path, filename))
+            try:
+                new, files[filename] = source.read(files.get(filename))
+            except (OSError, ValueError, ET.ParseError) as e:
+                print(f"⚠️  {source.name}: {e}")
+                continue
+            updates.extend(new)
+        return updates, {"files": files}
+
+
+ADAPTERS = {cls.kind: cls for cls in [JSONSource, JSONLSource, FeedSource, DirectorySource]}
+ADAPTERS['atom'] = FeedSource
+
+
+def parse_sources(spec=SOURCES):
+    """Build adapters from a SOURCES spec (kind inferred from the extension when omitted)"""
+    sources = []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        kind, _, path = item.partition(':') if ':' in item else ('', '', item)
+        if not kind:
+            kind = 'dir' if os.path.isdir(path) else os.path.splitext(path)[1].lstrip('.').lower()
+            kind = 'rss' if kind == 'xml' else kind
+        if kind not in ADAPTERS:
+            raise ValueError(f"Unknown source kind '{kind}' in SOURCES (expected one of {', '.join(sorted(ADAPTERS))})")
+        sources.append(ADAPTERS[kind](path))
+    return sources
+
+
+def configured_sources():
+    """Sources from SOURCES, or the first existing default feed file"""
+    if SOURCES:
+        return parse_sources(SOURCES)
+    for path in DEFAULT_FEED_FILES:
+        if os.path.exists(path):
+            return [JSONSource(path)]
+    raise FileNotFoundError(f"No competitor feed found (looked for {', '.join(DEFAULT_FEED_FILES)})")
+
+
+_marks_lock = threading.Lock()
+
+
+def _merge_results(sources, results):
+    """
+    Concatenate per-source updates, dropping exact duplicates (same id and text seen through two
+    sources) and namespacing ids that collide with a different update from another source.
+    """
+    seen = {}
+    merged = []
+    for source, updates in zip(sources, results):
+        for update in updates:
+            key = str(update['id'])
+            if key in seen:
+                if seen[key] == update['update']:
+                    continue
+                update['id'] = key = f"{source.kind}-{_stable_id(source.path)[:6]}-{key}"
+            seen[key] = update['update']
+            merged.append(update)
+    return merged
+
+
+def read_sources(sources=None, incremental=False, watchlist=None):
+    """
+    Read all sources concurrently and return (normalized updates in source order, new marks).
+    With incremental=True only entries past each source's high-water mark are returned, along
+    with the marks to advance to. Nothing is written: the caller commits the marks with
+    commit_marks() once the updates are safely stored, so a failed run re-reads the same entries.
+    A full read ignores the marks and returns none.
+    With a watchlist (watchlist.py), entries for untracked competitors are dropped as each
+    source is read. The marks record which watchlist they were read with; when it changes, the
+    next incremental read starts over so newly tracked competitors' past entries are picked up.
+    """
+    sources = sources if sources is not None else configured_sources()
+    marks = read_json(state_path(SOURCES_STATE_FILE), {}) if incremental else {}
+    watchlist_mark = json.loads(json.dumps(watchlist.fingerprint())) if watchlist else None
+    watchlist_changed = incremental and marks.get(WATCHLIST_MARK) != watchlist_mark
+    if watchlist_changed:
+        marks = {}
+
+    def read_one(source):
+        try:
+            updates, mark = source.read(marks.get(source.name))
+            return (watchlist.filter(updates) if watchlist else updates), mark
+        except (OSError, ValueError, ET.ParseError) as e:
+            print(f"⚠️  Source {source.name} failed: {e}")
+            return [], marks.get(source.name)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(SOURCE_WORKERS, len(sources)))) as pool:
+        results = list(pool.map(read_one, sources))
+
+    new_marks = {}
+    if incremental:
+        new_marks = {source.name: mark for source, (_, mark) in zip(sources, results)
+                     if mark is not None and mark != marks.get(source.name)}
+        if watchlist_changed:
+            new_marks[WATCHLIST_MARK] = watchlist_mark
+    return _merge_results(sources, [updates for updates, _ in results]), new_marks
+
+
+def commit_marks(new_marks):
+    """Advance the stored high-water marks to those returned by an incremental read_sources()"""
+    if not new_marks:
+        return
+    with _marks_lock:
+        # A new watchlist means the read started over, so marks from the old one are dropped
+        marks = {} if WATCHLIST_MARK in new_marks else read_json(state_path(SOURCES_STATE_FILE), {})
+        marks.update(new_marks)
+        write_json_atomic(state_path(SOURCES_STATE_FILE), marks)
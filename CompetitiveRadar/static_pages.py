@@ -0,0 +1,115 @@
+"""
+Pre-rendered marketing pages for CompetitiveRadar.
+Pages without per-request data are rendered once at startup into in-memory bytes with
+strong ETags and pre-compressed variants; static assets get long-lived, versioned URLs.
+"""
+import gzip
+import hashlib
+import os
+from flask import Response, render_template, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip covers every browser
+    brotli = None
+
+STATIC_PRERENDER = os.environ.get('STATIC_PRERENDER', 'true').lower() == 'true'
+
+# endpoint -> (path, template)
+STATIC_PAGES = {
+    'index': ('/', 'index.html'),
+    'features': ('/features', 'features.html'),
+    'pricing': ('/pricing', 'pricing.html'),
+    'credible': ('/credible', 'credible.html'),
+    'get_started': ('/get-started', 'get-started.html'),
+}
+
+# Static assets served from memory with a one-year cache; URLs carry a content hash (?v=...)
+STATIC_ASSETS = {
+    'css/style.css': 'text/css; charset=utf-8',
+}
+
+HTML_CACHE_CONTROL = 'public, max-age=300'
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Filled by prerender_static_pages(); keyed by endpoint or asset filename
+PRERENDERED = {}
+ASSETS = {}
+
+
+class PrecompressedBody:
+    """One response body with its identity, gzip and brotli encodings and a strong ETag"""
+
+    def __init__(self, body, mimetype, cache_control):
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.encodings = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.encodings['br'] = brotli.compress(body)
+
+    def response(self):
+        """Build a response for the current request, honouring If-None-Match and Accept-Encoding"""
+        if self.etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            encoding = 'identity'
+            for candidate in ('br', 'gzip'):
+                if candidate in self.encodings and request.accept_encodings[candidate]:
+                    encoding = candidate
+                    break
+            response = Response(self.encodings[encoding], mimetype=self.mimetype)
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(self.etag)
+        response.headers['Cache-Control'] = self.cache_control
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+def asset_version(filename):
+    """Content hash used to version static asset URLs"""
+    asset = ASSETS.get(filename)
+    return asset.etag[:12] if asset else None
+
+
+def prerender_static_pages(app):
+    """Render every static page once and load static assets into memory"""
+    for filename, mimetype in STATIC_ASSETS.items():
+        with open(os.path.join(app.static_folder, filename), 'rb') as f:
+            ASSETS[filename] = PrecompressedBody(f.read(), mimetype, ASSET_CACHE_CONTROL)
+
+    for endpoint, (path, template) in STATIC_PAGES.items():
+        # A real request context so base.html can highlight the active nav item
+        with app.test_request_context(path):
+            html = render_template(template)
+        PRERENDERED[endpoint] = PrecompressedBody(html.encode('utf-8'), 'text/html', HTML_CACHE_CONTROL)
+    print(f"Pre-rendered {len(PRERENDERED)} pages and {len(ASSETS)} static assets")
+
+
+def static_page_response(endpoint):
+    """Serve a pre-rendered page, or render it live when pre-rendering is disabled"""
+    page = PRERENDERED.get(endpoint)
+    if page is None:
+        return render_template(STATIC_PAGES[endpoint][1])
+    return page.response()
+
+
+def install_static_assets(app):
+    """Serve known assets from memory and version their URLs so they can be cached for a year"""
+    send_static = app.view_functions['static']
+
+    def static(filename):
+        asset = ASSETS.get(filename)
+        if asset is None:
+            return send_static(filename=filename)
+        return asset.response()
+
+    app.view_functions['static'] = static
+
+    @app.url_defaults
+    def add_asset_version(endpoint, values):
+        if endpoint == 'static' and 'v' not in values:
+            version = asset_version(values.get('filename'))
+            if version:
+                values['v'] = version
@@ -0,0 +1,98 @@
+"""
+Runtime state storage for CompetitiveRadar.
+Score history, rollups, source high-water marks and similar state live under STATE_DIR,
+kept apart from the checked-in sample feeds in data/.
+"""
+import json
+import os
+
+try:
+    import fcntl
+except ImportError:  # no advisory file locks on Windows; in-process locks still apply
+    fcntl = None
+
+STATE_DIR = os.environ.get('STATE_DIR', '.state')
+SCORED_UPDATES_FILE = 'scored_updates.json'
+
+
+def state_path(name):
+    """Path of a state file, creating STATE_DIR on first use"""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    return os.path.join(STATE_DIR, name)
+
+
+def read_json(path, default):
+    """Load a JSON state file, or return default if it does not exist yet"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def iter_json_array(path, chunk_size=1 << 20):
+    """
+    Yield the elements of a JSON array file one at a time, reading chunk_size characters at a
+    time, so memory stays flat however long the array is
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r') as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{path} does not hold a JSON array")
+        pos, eof = 1, False
+        while True:
+            # Skip whitespace and the separator before the next element
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+            try:
+                if pos >= len(buffer):
+                    raise ValueError("need more data")
+                item, end = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                if eof:
+                    raise ValueError(f"{path} ends in the middle of a JSON array")
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            yield item
+            pos = end
+
+
+def write_json_atomic(path, data):
+    """Write JSON via a temp file + rename so readers never see a half-written file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+class FileLock:
+    """Exclusive lock on a file under STATE_DIR (or directory), shared across processes (e.g. gunicorn workers)"""
+
+    def __init__(self, name, directory=None):
+        self.path = os.path.join(directory, f"{name}.lock") if directory else state_path(f"{name}.lock")
+        self._file = None
+
+    def acquire(self, blocking=False):
+        """Take the lock; without blocking, returns False if another process holds it"""
+        self._file = open(self.path, 'a')
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            return True
+        except OSError:
+            self._file.close()
+            self._file = None
+            return False
+
+    def release(self):
+        if self._file:
+            if fcntl is not None:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
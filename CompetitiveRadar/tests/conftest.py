@@ -0,0 +1,16 @@
+import os
+
+import pytest
+
+import storage
+
+# Agent modules build their Gemini client at import; tests never reach the API
+os.environ.setdefault('GEMINI_API_KEY', 'test')
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    """Keep .state files (locks, sidecars) inside the test's temp directory"""
+    directory = tmp_path / 'state'
+    monkeypatch.setattr(storage, 'STATE_DIR', str(directory))
+    return directory
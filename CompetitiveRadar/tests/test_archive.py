@@ -0,0 +1,58 @@
+import archive
+
+
+def update(update_id, date, competitor='Notion'):
+    return {"id": update_id, "date": date, "competitor": competitor, "update": f"Update {update_id}"}
+
+
+def test_append_get_and_range(tmp_path):
+    directory = str(tmp_path / 'archive')
+    assert archive.append_updates([update(1, '2025-10-03'), update(2, '2025-10-01', 'Linear')], directory) == 2
+    # Known ids are skipped; new ones are merged into both indexes
+    assert archive.append_updates([update(2, '2025-10-01'), update(3, '2025-10-02')], directory) == 1
+
+    with archive.UpdateArchive(directory) as reader:
+        assert len(reader) == 3
+        assert reader.get(3)['date'] == '2025-10-02'
+        assert reader.get('3') == reader.get(3)
+        assert reader.get(4) is None
+        assert 1 in reader
+        assert [u['id'] for u in reader.range()] == [2, 3, 1]
+        assert [u['id'] for u in reader.range('2025-10-02', '2025-10-03')] == [3, 1]
+        assert [u['id'] for u in reader.range(end='2025-10-02', limit=1)] == [2]
+        assert [u['id'] for u in reader.range(competitor='Linear')] == [2]
+
+
+def test_torn_record_is_dropped_on_next_append(tmp_path):
+    directory = str(tmp_path / 'archive')
+    archive.append_updates([update(1, '2025-10-01')], directory)
+    with open(tmp_path / 'archive' / archive.DATA_FILE, 'ab') as f:
+        f.write(b'\xff\x00\x00\x00{"id": 9')  # crash mid-write
+    assert archive.append_updates([update(2, '2025-10-02')], directory) == 1
+
+    with archive.UpdateArchive(directory) as reader:
+        assert [u['id'] for u in reader.range()] == [1, 2]
+        assert reader.get(9) is None
+
+
+def test_open_archive_reopens_after_append(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, 'ARCHIVE_DIR', str(tmp_path / 'archive'))
+    monkeypatch.setattr(archive, '_reader', None)
+    archive.append_updates([update(1, '2025-10-01')])
+    first = archive.open_archive()
+    assert archive.open_archive() is first
+    archive.append_updates([update(2, '2025-10-02')])
+    assert archive.open_archive().get(2) is not None
+
+
+def test_index_entries_past_the_mapped_data_are_skipped(tmp_path):
+    directory = str(tmp_path / 'archive')
+    archive.append_updates([update(1, '2025-10-01')], directory)
+    data_path = tmp_path / 'archive' / archive.DATA_FILE
+    data = data_path.read_bytes()
+    archive.append_updates([update(2, '2025-10-02')], directory)
+    data_path.write_bytes(data)  # indexes now cover a record the data file doesn't hold
+
+    with archive.UpdateArchive(directory) as reader:
+        assert reader.get(2) is None
+        assert [u['id'] for u in reader.range()] == [1]
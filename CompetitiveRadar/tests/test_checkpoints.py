@@ -0,0 +1,55 @@
+import os
+import time
+
+import pipeline
+from checkpoints import PipelineCheckpoint
+
+FEED = [{"id": 1, "competitor": "Notion", "update": "AI search"}, {"id": 2, "competitor": "Linear", "update": "Roadmaps"}]
+
+
+def test_claim_is_exclusive_until_released(tmp_path):
+    first = PipelineCheckpoint('run', str(tmp_path))
+    second = PipelineCheckpoint('run', str(tmp_path))
+    assert first.claim()
+    assert not second.claim()
+    first.release()
+    assert second.claim()
+
+
+def test_matches_input_ignores_order_but_not_content(tmp_path):
+    checkpoint = PipelineCheckpoint('run', str(tmp_path))
+    checkpoint.save_input(FEED)
+    assert checkpoint.matches_input(list(reversed(FEED)))
+    assert not checkpoint.matches_input(FEED[:1])
+    assert not checkpoint.matches_input([FEED[0], dict(FEED[1], update="Roadmaps v2")])
+
+
+def test_prune_drops_old_and_surplus_runs_but_not_claimed_ones(tmp_path):
+    directory = str(tmp_path)
+    for run_id in ['a', 'b', 'c', 'd']:
+        PipelineCheckpoint(run_id, directory).save_input(FEED)
+    stale = time.time() - 30 * 86400
+    os.utime(os.path.join(directory, 'b', 'input.jsonl'), (stale, stale))
+    claimed = PipelineCheckpoint('a', directory)
+    assert claimed.claim()
+
+    # 'b' is too old, 'a' is beyond the newest 2 but still running
+    assert PipelineCheckpoint.prune(directory, max_age_days=7, keep=2) == 1
+    assert sorted(os.listdir(directory)) == ['a', 'c', 'd']
+
+
+def test_open_checkpoint_resumes_the_matching_failed_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    failed = pipeline.open_checkpoint(FEED, False, {})
+    failed.save_input(FEED)
+    failed.record('research', dict(FEED[0]))
+    failed.release()
+
+    resumed = pipeline.open_checkpoint(FEED, False, {})
+    assert resumed.run_id == failed.run_id
+    assert list(resumed.completed('research')) == ['1']
+    resumed.release()
+
+    # A different feed, or an incremental run on the same feed, starts over
+    assert pipeline.open_checkpoint(FEED[:1], False, {}).run_id != failed.run_id
+    assert pipeline.open_checkpoint(FEED, True, {}).run_id != failed.run_id
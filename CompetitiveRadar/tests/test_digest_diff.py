@@ -0,0 +1,41 @@
+import digest_diff
+
+
+def scored(update_id, score, text=None):
+    return {"id": update_id, "competitor": "Notion", "update": text or f"Update {update_id}",
+            "date": "2025-10-01", "source": "Blog", "priority_score": score}
+
+
+def notes(changed):
+    return {u['id']: u['digest_change'] for u in changed}
+
+
+def test_everything_is_new_without_an_index():
+    assert notes(digest_diff.diff_updates([scored(1, 9), scored(2, 5)], None)) == {1: "New", 2: "New"}
+
+
+def test_reported_updates_are_dropped_until_they_change(tmp_path):
+    path = str(tmp_path / 'weekly_digest.md')
+    updates = [scored(i, 10 - i) for i in range(1, 6)]
+    digest_diff.save_index(path, updates, updates[:3])
+
+    changed = digest_diff.diff_updates(updates, digest_diff.load_index(path))
+    # Ranks 4 and 5 were not reported, so they stay in the running
+    assert notes(changed) == {4: "Not reported yet", 5: "Not reported yet"}
+
+    updates[0] = scored(1, 9, "Update 1, revised")
+    updates[1] = scored(2, 6)
+    updates.append(scored(6, 3))
+    changed = digest_diff.diff_updates(updates, digest_diff.load_index(path))
+    assert notes(changed) == {1: "Updated", 2: "Re-scored 8 → 6", 4: "Not reported yet",
+                              5: "Not reported yet", 6: "New"}
+
+
+def test_reported_ids_accumulate_across_digests(tmp_path):
+    path = str(tmp_path / 'weekly_digest.md')
+    updates = [scored(i, 10 - i) for i in range(1, 5)]
+    digest_diff.save_index(path, updates, updates[:3])
+    digest_diff.save_index(path, updates, updates[3:])
+
+    assert digest_diff.diff_updates(updates, digest_diff.load_index(path)) == []
+    assert set(digest_diff.load_index(path)['reported']) == {'1', '2', '3', '4'}
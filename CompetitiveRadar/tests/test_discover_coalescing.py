@@ -0,0 +1,123 @@
+import asyncio
+import json
+import threading
+import time
+
+import app as flask_app
+import asgi
+from singleflight import AsyncSingleFlight, SingleFlight
+
+REQUESTS = 8
+PAYLOAD = {"startup_type": "saas", "description": "CRM for plumbers"}
+COMPETITORS = [{"name": "Jobber", "category": "Direct Competitor", "description": "Field service CRM", "differentiator": "Scheduling"}]
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModels:
+    """generate_content() that blocks until released, counting calls; fails when `error` is set"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+        self.release = threading.Event()
+
+    def generate_content(self, **request):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return _Response(json.dumps(COMPETITORS))
+
+
+class FakeAsyncModels:
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+
+    async def generate_content(self, **request):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        if self.error:
+            raise self.error
+        return _Response(json.dumps(COMPETITORS))
+
+
+class FakeClient:
+    def __init__(self, models, aio_models=None):
+        self.models = models
+        self.aio = type('Aio', (), {'models': aio_models})()
+
+
+def discover_concurrently(monkeypatch, models):
+    """REQUESTS identical /api/competitors/discover posts to the Flask app, all in flight at once"""
+    flight = SingleFlight("Competitor discovery")
+    monkeypatch.setattr(flask_app, 'discovery_flight', flight)
+    monkeypatch.setattr(flask_app, 'get_gemini_client', lambda: FakeClient(models))
+    responses = []
+
+    def post():
+        responses.append(flask_app.app.test_client().post('/api/competitors/discover', json=PAYLOAD).get_json())
+
+    threads = [threading.Thread(target=post) for _ in range(REQUESTS)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while flight.stats()["coalesced"] < REQUESTS - 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    models.release.set()
+    for thread in threads:
+        thread.join()
+    return responses, flight
+
+
+def test_flask_identical_discovery_makes_one_model_call(monkeypatch):
+    models = FakeModels()
+    responses, flight = discover_concurrently(monkeypatch, models)
+
+    assert models.calls == 1
+    assert flight.stats() == {"executed": 1, "coalesced": REQUESTS - 1, "in_flight": 0}
+    assert responses == [{"competitors": COMPETITORS}] * REQUESTS
+
+
+def test_flask_discovery_error_reaches_every_waiter(monkeypatch, capsys):
+    models = FakeModels(RuntimeError("429 RESOURCE_EXHAUSTED"))
+    responses, _ = discover_concurrently(monkeypatch, models)
+
+    assert models.calls == 1
+    # Every request saw the shared call's error and fell back to the demo competitors
+    assert capsys.readouterr().out.count("AI discovery error: 429 RESOURCE_EXHAUSTED") == REQUESTS
+    fallback = flask_app.generate_demo_competitors(PAYLOAD["startup_type"], PAYLOAD["description"])
+    assert responses == [{"competitors": fallback}] * REQUESTS
+
+
+def discover_async(monkeypatch, models):
+    monkeypatch.setattr(asgi, 'discovery_flight', AsyncSingleFlight("Competitor discovery"))
+    monkeypatch.setattr(asgi, 'get_gemini_client', lambda: FakeClient(None, models))
+    body = json.dumps(PAYLOAD).encode('utf-8')
+
+    async def main():
+        return await asyncio.gather(*(asgi.discover('application/json', body, {}) for _ in range(REQUESTS)))
+
+    return asyncio.run(main())
+
+
+def test_asgi_identical_discovery_makes_one_model_call(monkeypatch):
+    models = FakeAsyncModels()
+    replies = discover_async(monkeypatch, models)
+
+    assert models.calls == 1
+    assert replies == [({"competitors": COMPETITORS}, 200)] * REQUESTS
+
+
+def test_asgi_discovery_error_reaches_every_waiter(monkeypatch, capsys):
+    models = FakeAsyncModels(RuntimeError("429 RESOURCE_EXHAUSTED"))
+    replies = discover_async(monkeypatch, models)
+
+    assert models.calls == 1
+    assert capsys.readouterr().out.count("AI discovery error: 429 RESOURCE_EXHAUSTED") == REQUESTS
+    fallback = asgi.generate_demo_competitors(PAYLOAD["startup_type"], PAYLOAD["description"])
+    assert replies == [({"competitors": fallback}, 200)] * REQUESTS
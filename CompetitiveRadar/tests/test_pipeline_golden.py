@@ -0,0 +1,13 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_replayed_pipeline_matches_golden_outputs():
+    # A subprocess: the check sets env vars that modules read at import, and changes directory
+    env = dict(os.environ, GEMINI_API_KEY='test')
+    result = subprocess.run([sys.executable, '-m', 'benchmarks.pipeline', '--golden-only'],
+                            cwd=ROOT, env=env, capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout[-4000:] + result.stderr[-4000:]
@@ -0,0 +1,34 @@
+import json
+import os
+from types import SimpleNamespace
+
+import storage
+from agents.prompts import PromptTemplate, PromptUsage
+
+
+class FakeModels:
+    def generate_content(self, model, contents, config):
+        return SimpleNamespace(text="{}", usage_metadata=None)
+
+
+def test_each_run_keeps_its_own_prompt_stats():
+    template = PromptTemplate('test', "System.", "Instructions.", "Data: {data}")
+    client = SimpleNamespace(models=FakeModels())
+    first, second = PromptUsage(template), PromptUsage(template)
+    template.generate(client, 'gemini-2.5-flash', usage=first, data="a")
+    template.generate(client, 'gemini-2.5-flash', usage=second, data="b")
+    template.generate(client, 'gemini-2.5-flash', usage=second, data="c")
+
+    assert first.finish()["calls"] == 1
+    assert second.finish()["calls"] == 2
+    with open(storage.state_path('prompts.jsonl')) as f:
+        assert [json.loads(line)["calls"] for line in f] == [1, 2]
+
+
+def test_side_runs_are_not_logged():
+    template = PromptTemplate('test', "System.", "Instructions.", "Data: {data}")
+    usage = PromptUsage(template)
+    template.generate(SimpleNamespace(models=FakeModels()), 'gemini-2.5-flash', usage=usage, data="a")
+
+    assert usage.finish(log=False)["calls"] == 1
+    assert not os.path.exists(storage.state_path('prompts.jsonl'))
@@ -0,0 +1,48 @@
+from agents import score_history
+from agents.score_history import ScoreHistory
+
+
+def scored(i, score=None):
+    return {"id": i, "competitor": ["Notion", "Linear", "Asana"][i % 3], "category": "Product",
+            "update": f"Launched feature {i}", "impact_score": i % 10 + 1, "priority_score": score or i % 10 + 1}
+
+
+def test_fitted_weights_are_reused_until_the_history_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(score_history, 'SCORE_MODEL_MIN_SAMPLES', 5)
+    fits = []
+    solve = score_history._solve
+    monkeypatch.setattr(score_history, '_solve', lambda a, b: fits.append(1) or solve(a, b))
+    path = str(tmp_path / 'history.json')
+    history = ScoreHistory(path)
+    for i in range(10):
+        history.record(scored(i))
+    weights = history.train().weights
+    history.save()
+
+    reloaded = ScoreHistory(path)
+    assert reloaded.train().weights == weights
+    reloaded.record(scored(3))  # same content and score: no refit
+    reloaded.train()
+    assert len(fits) == 1
+
+    reloaded.record(scored(3, score=9))
+    reloaded.train()
+    assert len(fits) == 2
+
+
+def test_old_and_surplus_entries_are_dropped_on_save(tmp_path, monkeypatch):
+    monkeypatch.setattr(score_history, 'SCORE_HISTORY_MAX_ENTRIES', 3)
+    path = str(tmp_path / 'history.json')
+    history = ScoreHistory(path)
+    for i in range(5):
+        history.record(scored(i))
+    for i, entry in enumerate(history.entries.values()):
+        entry['scored_at'] = f"2099-01-0{i + 1}T00:00:00"
+    stale = next(iter(history.entries.values()))
+    stale['scored_at'] = "2000-01-01T00:00:00"
+    history.save()
+
+    kept = ScoreHistory(path)
+    assert sorted(e['scored_at'][:10] for e in kept.entries.values()) == ['2099-01-03', '2099-01-04', '2099-01-05']
+    # Group stats only count the entries that were kept
+    assert sum(count for count, _ in kept._groups.values()) == 3
@@ -0,0 +1,24 @@
+import json
+
+import pytest
+
+from agents.structured_output import repair_json
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1}', {"a": 1}),
+    ('```json\n{"a": 1}\n```', {"a": 1}),
+    ('Here is the result: {"a": [1, 2]} Hope that helps!', {"a": [1, 2]}),
+    ('{"a": 1, "b": [1, 2,]}', {"a": 1, "b": [1, 2]}),
+    ('{"a": "unterminated', {"a": "unterminated"}),
+    ('[{"a": 1}, {"b": 2', [{"a": 1}, {"b": 2}]),
+    ('{"a": 1, "b": {"c": tr', {"a": 1}),
+    ('{"text": "brace } and \\" quote", "n": 2}', {"text": 'brace } and " quote', "n": 2}),
+])
+def test_repair_json(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+def test_repair_json_returns_best_effort_when_unrepairable():
+    with pytest.raises(ValueError):
+        json.loads(repair_json('{"a": }'))
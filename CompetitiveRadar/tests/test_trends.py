@@ -0,0 +1,50 @@
+import json
+import os
+
+import storage
+import trends
+
+
+def scored(update_id, score, date='2025-10-01', competitor='Notion'):
+    return {"id": update_id, "competitor": competitor, "category": "Product", "date": date,
+            "priority_score": score, "urgency_level": 'high' if score >= 8 else 'low'}
+
+
+def cell(week='2025-W40', competitor='Notion'):
+    return trends._load()["cells"].get(trends._cell_key(competitor, 'Product', week))
+
+
+def log_lines():
+    with open(storage.state_path(trends.CONTRIBUTIONS_FILE)) as f:
+        return f.read().splitlines()
+
+
+def test_rescored_updates_replace_their_contribution():
+    trends.record_scored_updates([scored(1, 9), scored(2, 4)])
+    trends.record_scored_updates([scored(1, 5), scored(2, 4)])
+    assert cell() == {"count": 2, "priority_sum": 9.0, "high": 0}
+    # The unchanged update was not appended again
+    assert len(log_lines()) == 3
+
+    # Moving to another week takes the contribution out of the old cell
+    trends.record_scored_updates([scored(2, 4, date='2025-10-08')])
+    assert cell() == {"count": 1, "priority_sum": 5.0, "high": 0}
+    assert cell('2025-W41')["count"] == 1
+
+
+def test_lines_appended_by_another_process_are_picked_up():
+    trends.record_scored_updates([scored(1, 9)])
+    with open(storage.state_path(trends.CONTRIBUTIONS_FILE), 'a') as f:
+        f.write(json.dumps(["2", ["Notion", "Product", "2025-W40", 4.0, 0]]) + "\n")
+    assert trends._read_contributions()["2"] == ["Notion", "Product", "2025-W40", 4.0, 0]
+
+
+def test_log_is_compacted_and_legacy_map_converted(monkeypatch):
+    with open(storage.state_path(trends.LEGACY_CONTRIBUTIONS_FILE), 'w') as f:
+        json.dump({"1": ["Notion", "Product", "2025-W40", 9.0, 1]}, f)
+    monkeypatch.setattr(trends, 'COMPACT_MIN_LINES', 2)
+    # Legacy line + two changes: three lines for one id, compacted to one
+    for score in (5, 6):
+        trends.record_scored_updates([scored(1, score)])
+    assert log_lines() == [json.dumps(["1", ["Notion", "Product", "2025-W40", 6.0, 0]], separators=(',', ':'))]
+    assert not os.path.exists(storage.state_path(trends.LEGACY_CONTRIBUTIONS_FILE))
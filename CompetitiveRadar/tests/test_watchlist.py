@@ -0,0 +1,45 @@
+import pytest
+
+from watchlist import Watchlist
+
+
+@pytest.fixture
+def watchlist():
+    return Watchlist.parse("Notion=NotionAI|Notion AI,Monday.com,Linear=Linear App,ClickUp")
+
+
+@pytest.mark.parametrize("competitor, expected", [
+    ("Notion", "Notion"),
+    ("notion", "Notion"),
+    ("Notion AI", "Notion"),
+    ("NotionAI", "Notion"),
+    ("Monday.com", "Monday.com"),
+    ("monday", "Monday.com"),
+    ("Monday Inc", "Monday.com"),
+    ("Linear App", "Linear"),
+    ("linear", "Linear"),
+    ("Linear (YC W19)", "Linear"),
+    ("Acme (Notion)", "Notion"),
+    ("Click-Up", "ClickUp"),
+    ("Asana", None),
+    ("", None),
+    (None, None),
+])
+def test_resolve(watchlist, competitor, expected):
+    assert watchlist.resolve(competitor) == expected
+    # Second lookup comes from the memo
+    assert watchlist.resolve(competitor) == expected
+
+
+def test_filter_keeps_tracked_competitors_in_order(watchlist):
+    updates = [{"competitor": name} for name in ("Asana", "Notion AI", "Jira", "monday", "Linear")]
+    assert [u['competitor'] for u in watchlist.filter(updates)] == ["Notion AI", "monday", "Linear"]
+
+
+def test_from_competitors_and_fingerprint():
+    selected = Watchlist.from_competitors([{"name": "Linear", "aliases": ["Linear App"]}, "Notion", {"category": "x"}])
+    assert selected.resolve("linear app") == "Linear"
+    assert len(selected) == 2
+    assert selected.fingerprint() == Watchlist({"Notion": [], "Linear": ["Linear App"]}).fingerprint()
+    assert Watchlist.from_competitors([]) is None
+    assert Watchlist.parse(" , ") is None
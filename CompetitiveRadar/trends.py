@@ -0,0 +1,253 @@
+"""
+Competitor trend rollups for CompetitiveRadar.
+As updates are scored, each one is added to a rollup cell per competitor × category × ISO week
+(count, priority sum, high-urgency count). The cells live in .state/trends.json. Each update's
+contribution is remembered by id, so a re-scored update replaces its old contribution instead
+of being counted twice. Queries only touch the cells in the window they ask about, so they cost
+the same whether the archive holds a hundred updates or a million.
+
+Contributions are an append-only log (.state/trend_contributions.jsonl, one [id, contribution]
+line per change, the last line per id wins). Each process keeps the log in memory and only reads
+what other processes appended since, a run appends only the updates whose contribution changed,
+and the log is compacted once superseded lines outnumber the live ones.
+"""
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from storage import FileLock, read_json, state_path, write_json_atomic
+
+TRENDS_ENABLED = os.environ.get('TRENDS_ENABLED', 'true').lower() == 'true'
+TREND_WINDOW_WEEKS = int(os.environ.get('TREND_WINDOW_WEEKS', 13))  # one quarter
+TRENDS_FILE = 'trends.json'
+CONTRIBUTIONS_FILE = 'trend_contributions.jsonl'
+LEGACY_CONTRIBUTIONS_FILE = 'trend_contributions.json'  # whole-map file, converted on first use
+COMPACT_MIN_LINES = 1000
+
+_lock = threading.Lock()
+_cache = {"mtime": None, "data": None}
+_log = {"path": None, "inode": None, "offset": 0, "lines": 0, "by_id": {}}
+
+
+def week_of(date_string):
+    """ISO week key ('2025-W40') for a YYYY-MM-DD date, or None if it doesn't parse"""
+    try:
+        year, week, _ = datetime.strptime(str(date_string)[:10], "%Y-%m-%d").isocalendar()
+    except ValueError:
+        return None
+    return f"{year}-W{week:02d}"
+
+
+def _week_start(week):
+    return date.fromisocalendar(int(week[:4]), int(week[6:]), 1)
+
+
+def previous_weeks(week, count):
+    """`count` week keys ending with `week`, newest first"""
+    start = _week_start(week)
+    return [week_of((start - timedelta(weeks=i)).isoformat()) for i in range(count)]
+
+
+def _cell_key(competitor, category, week):
+    return f"{competitor}|{category}|{week}"
+
+
+def _empty():
+    return {"cells": {}, "competitors": {}, "latest_week": None}
+
+
+def _load():
+    """Rollups, re-read only when another process has rewritten the file"""
+    path = state_path(TRENDS_FILE)
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    if _cache["mtime"] != mtime or _cache["data"] is None:
+        _cache["data"] = read_json(path, _empty())
+        _cache["mtime"] = mtime
+    return _cache["data"]
+
+
+def _adjust(data, contribution, sign):
+    competitor, category, week, score, high = contribution
+    key = _cell_key(competitor, category, week)
+    cell = data["cells"].setdefault(key, {"count": 0, "priority_sum": 0.0, "high": 0})
+    cell["count"] += sign
+    cell["priority_sum"] += sign * score
+    cell["high"] += sign * high
+    if cell["count"] <= 0:
+        del data["cells"][key]
+    categories = data["competitors"].setdefault(competitor, {})
+    categories[category] = categories.get(category, 0) + sign
+    if categories[category] <= 0:
+        del categories[category]
+        if not categories:
+            del data["competitors"][competitor]
+
+
+def _rewrite_contributions(path, by_id):
+    """Replace the log with one line per id"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        for key, contribution in by_id.items():
+            f.write(json.dumps([key, contribution], separators=(',', ':')) + "\n")
+    os.replace(tmp_path, path)
+    stat = os.stat(path)
+    _log.update(path=path, inode=stat.st_ino, offset=stat.st_size, lines=len(by_id), by_id=dict(by_id))
+
+
+def _read_contributions():
+    """Latest contribution per id; reads only the lines appended since this process last looked"""
+    path = state_path(CONTRIBUTIONS_FILE)
+    if not os.path.exists(path):
+        legacy = state_path(LEGACY_CONTRIBUTIONS_FILE)
+        if not os.path.exists(legacy):
+            _log.update(path=path, inode=None, offset=0, lines=0, by_id={})
+            return _log["by_id"]
+        _rewrite_contributions(path, read_json(legacy, {}))
+        os.remove(legacy)
+    with open(path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        if _log["path"] != path or _log["inode"] != stat.st_ino or stat.st_size < _log["offset"]:
+            # First read in this process, or another process compacted the log
+            _log.update(path=path, inode=stat.st_ino, offset=0, lines=0, by_id={})
+        f.seek(_log["offset"])
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # torn by a crash mid-append; dropped by the next append
+            _log["offset"] += len(line)
+            try:
+                key, contribution = json.loads(line)
+            except ValueError:
+                continue
+            _log["by_id"][key] = contribution
+            _log["lines"] += 1
+    return _log["by_id"]
+
+
+def _append_contributions(changed):
+    path = state_path(CONTRIBUTIONS_FILE)
+    with open(path, 'ab') as f:
+        f.truncate(_log["offset"])
+        for key, contribution in changed.items():
+            line = (json.dumps([key, contribution], separators=(',', ':')) + "\n").encode('utf-8')
+            f.write(line)
+            _log["offset"] += len(line)
+            _log["lines"] += 1
+        _log["inode"] = os.fstat(f.fileno()).st_ino
+    _log["path"] = path
+    _log["by_id"].update(changed)
+    if _log["lines"] > max(COMPACT_MIN_LINES, 2 * len(_log["by_id"])):
+        _rewrite_contributions(path, _log["by_id"])
+
+
+def record_scored_updates(scored_updates):
+    """Add (or replace) the rollup contributions of freshly scored updates; unchanged ones are skipped"""
+    with _lock:
+        # Ingests run in several gunicorn workers and the scheduler, so the lock is a file lock
+        lock = FileLock('trends')
+        lock.acquire(blocking=True)
+        try:
+            contributions = _read_contributions()
+            changes, changed = [], {}
+            for update in scored_updates:
+                week = week_of(update.get('date'))
+                if week is None:
+                    continue
+                contribution = [
+                    update['competitor'],
+                    update.get('category', 'Unknown'),
+                    week,
+                    float(update.get('priority_score', 0)),
+                    1 if update.get('urgency_level') == 'high' else 0,
+                ]
+                key = str(update['id'])
+                previous = changed.get(key, contributions.get(key))
+                if previous == contribution:
+                    continue
+                changes.append((previous, contribution))
+                changed[key] = contribution
+            if not changes:
+                return
+
+            data = read_json(state_path(TRENDS_FILE), _empty())
+            for previous, contribution in changes:
+                if previous:
+                    _adjust(data, previous, -1)
+                _adjust(data, contribution, 1)
+                week = contribution[2]
+                if data["latest_week"] is None or week > data["latest_week"]:
+                    data["latest_week"] = week
+            write_json_atomic(state_path(TRENDS_FILE), data)
+            _append_contributions(changed)
+            _cache["mtime"] = None
+        finally:
+            lock.release()
+
+
+def _window(data, competitor, category, weeks):
+    count, priority_sum, high = 0, 0.0, 0
+    for week in weeks:
+        cell = data["cells"].get(_cell_key(competitor, category, week))
+        if cell:
+            count += cell["count"]
+            priority_sum += cell["priority_sum"]
+            high += cell["high"]
+    return count, priority_sum, high
+
+
+def query_trends(competitor=None, category=None, weeks=TREND_WINDOW_WEEKS, as_of=None):
+    """
+    Per competitor × category: counts and mean priority over the last `weeks` weeks up to as_of
+    (default: the latest week with data), the same figures for the window before it, the weekly
+    series, and each competitor's category mix over the window.
+    """
+    data = _load()
+    as_of = as_of or data["latest_week"]
+    if as_of is None:
+        return {"as_of": None, "window_weeks": weeks, "competitors": {}}
+    window = previous_weeks(as_of, weeks * 2)
+    current, prior = window[:weeks], window[weeks:]
+
+    result = {}
+    names = [competitor] if competitor else sorted(data["competitors"])
+    for name in names:
+        categories = [category] if category else sorted(data["competitors"].get(name, {}))
+        rows = {}
+        for cat in categories:
+            count, priority_sum, high = _window(data, name, cat, current)
+            prior_count, _, _ = _window(data, name, cat, prior)
+            if not count and not prior_count:
+                continue
+            rows[cat] = {
+                "count": count,
+                "prior_count": prior_count,
+                "change": count - prior_count,
+                "mean_priority": round(priority_sum / count, 1) if count else None,
+                "high_urgency": high,
+                "weekly": [data["cells"].get(_cell_key(name, cat, week), {}).get("count", 0) for week in reversed(current)],
+            }
+        if rows:
+            total = sum(row["count"] for row in rows.values())
+            result[name] = {
+                "categories": rows,
+                "total": total,
+                "category_mix": {cat: round(row["count"] / total, 2) for cat, row in rows.items()} if total else {},
+            }
+    return {"as_of": as_of, "window_weeks": weeks, "weeks": list(reversed(current)), "competitors": result}
+
+
+def trend_context(top_updates, weeks=TREND_WINDOW_WEEKS):
+    """One line of recent activity per competitor in the digest, for the summarization prompt"""
+    trends = query_trends(weeks=weeks)["competitors"]
+    lines = []
+    for name in dict.fromkeys(update['competitor'] for update in top_updates):
+        info = trends.get(name)
+        if not info:
+            continue
+        rows = info["categories"]
+        mix = ", ".join(f"{cat} {row['count']}" for cat, row in sorted(rows.items(), key=lambda r: -r[1]["count"]) if row["count"])
+        prior = sum(row["prior_count"] for row in rows.values())
+        scored = [row for row in rows.values() if row["count"]]
+        mean = sum(row["mean_priority"] * row["count"] for row in scored) / info["total"] if info["total"] else 0
+        lines.append(f"- {name}: {info['total']} updates in the last {weeks} weeks ({mix or 'none'}; "
+                     f"avg priority {mean:.1f}/10), {prior} in the {weeks} weeks before")
+    return "\n".join(lines)
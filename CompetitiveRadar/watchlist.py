@@ -0,0 +1,117 @@
+"""
+Competitor watchlists for CompetitiveRadar.
+A watchlist is a set of tracked competitors, each with a name and optional aliases. Names are
+reduced to match keys (casefolded, alphanumerics only, with and without a trailing "AI" / ".com"
+/ "Inc"-style suffix, and the part in parentheses on its own), and every key points at its
+competitor in one hash index. Resolving a feed's `competitor` field is a few dict lookups, and
+the result is memoized per distinct string, so filtering costs O(1) per update.
+
+Ingestion applies the watchlist as sources are read (sources.read_sources), so archive, agents
+and storage only ever see tracked competitors:
+  - WATCHLIST for the shared pipeline, e.g. WATCHLIST="Notion=NotionAI|Notion AI,ClickUp,Linear"
+    (Name=alias|alias, comma-separated; empty = every competitor)
+  - a founder's selected competitors for their personalized digest (Watchlist.from_competitors)
+"""
+import os
+import re
+import threading
+
+WATCHLIST = os.environ.get('WATCHLIST', '')
+
+# Trailing words dropped to form an extra key ("Notion AI", "Monday.com", "Linear Inc")
+NAME_SUFFIXES = ('ai', 'hq', 'inc', 'com', 'labs', 'ltd', 'llc', 'corp')
+# Memoized competitor strings per watchlist; feeds repeat a handful of names, this is a safety cap
+MAX_RESOLVED = 100_000
+
+_PARENS_RE = re.compile(r"\(([^)]*)\)")
+_NON_ALNUM_RE = re.compile(r"[\W_]+")
+
+
+def _compact(text):
+    return _NON_ALNUM_RE.sub('', text.casefold())
+
+
+def name_keys(name):
+    """Match keys for a competitor name or alias, most specific first"""
+    name = str(name or '')
+    variants = [name, _PARENS_RE.sub(' ', name)] + _PARENS_RE.findall(name)
+    keys = {}
+    for variant in variants:
+        key = _compact(variant)
+        if not key:
+            continue
+        keys[key] = True
+        words = _NON_ALNUM_RE.split(variant.casefold().strip())
+        while len(words) > 1 and words[-1] in ('',) + NAME_SUFFIXES:
+            words.pop()
+        keys[''.join(words)] = True
+        for suffix in NAME_SUFFIXES:
+            # Run-together suffixes ("NotionAI"), keeping at least three characters of the name
+            if key.endswith(suffix) and len(key) - len(suffix) >= 3:
+                keys[key[:-len(suffix)]] = True
+    keys.pop('', None)
+    return list(keys)
+
+
+class Watchlist:
+    """Tracked competitors with a hashed name/alias index"""
+
+    def __init__(self, competitors):
+        """competitors: {name: [aliases]}"""
+        self.competitors = {name: list(aliases) for name, aliases in competitors.items()}
+        self.index = {}
+        for name, aliases in self.competitors.items():
+            for alias in [name] + aliases:
+                for key in name_keys(alias):
+                    self.index.setdefault(key, name)
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec):
+        """From a WATCHLIST-style spec: "Name=alias|alias,Name2"; None when empty"""
+        competitors = {}
+        for item in filter(None, (part.strip() for part in spec.split(','))):
+            name, _, aliases = item.partition('=')
+            competitors[name.strip()] = [alias.strip() for alias in aliases.split('|') if alias.strip()]
+        return cls(competitors) if competitors else None
+
+    @classmethod
+    def from_competitors(cls, competitors):
+        """From discovered/selected competitor dicts ({"name": ..., "aliases": [...]}) or plain names"""
+        entries = {}
+        for competitor in competitors or []:
+            if isinstance(competitor, dict):
+                if competitor.get('name'):
+                    entries[competitor['name']] = competitor.get('aliases', [])
+            elif competitor:
+                entries[str(competitor)] = []
+        return cls(entries) if entries else None
+
+    def __len__(self):
+        return len(self.competitors)
+
+    def fingerprint(self):
+        return sorted((name, sorted(aliases)) for name, aliases in self.competitors.items())
+
+    def resolve(self, competitor):
+        """Tracked competitor name for a feed's competitor field, or None if it isn't tracked"""
+        resolved = self._resolved.get(competitor, False)
+        if resolved is not False:
+            return resolved
+        resolved = next((self.index[key] for key in name_keys(competitor) if key in self.index), None)
+        with self._lock:
+            if len(self._resolved) < MAX_RESOLVED:
+                self._resolved[competitor] = resolved
+        return resolved
+
+    def matches(self, update):
+        return self.resolve(update.get('competitor')) is not None
+
+    def filter(self, updates):
+        return [update for update in updates if self.matches(update)]
+
+
+def configured_watchlist():
+    """The shared pipeline's watchlist from WATCHLIST, or None to track every competitor"""
+    return Watchlist.parse(WATCHLIST)